@@ -158,8 +158,240 @@ out:
 	return err;
 }
 
+#if INVERSION == INV_SAFEGCD
+#define SAFEGCD_M30 ((int32_t) (UINT32_MAX >> 2))
+
+/* The transition matrix of 30 divsteps, scaled by 2^30. */
+typedef struct {
+	int32_t u, v, q, r;
+} safegcd_trans_t;
+
+/**
+ * Converts a non-negative bn (below 2^(30 * limbs)) into 30-bit limbs.
+ */
+static void safegcd_from_bn(const bn_t *one, int32_t *out, int limbs) {
+	for (int i = 0; i < limbs; i++) {
+		out[i] = (int32_t) bn_get_bits(one, 30 * i, 30);
+	}
+}
+
+/**
+ * Converts normalized (non-negative, 30-bit) limbs into a bn.
+ */
+static bn_err safegcd_to_bn(const int32_t *one, int limbs, bn_t *out) {
+	int n = (30 * limbs + MP_DIGIT_BIT - 1) / MP_DIGIT_BIT;
+	bn_err err;
+	if ((err = mp_grow(out, n)) != BN_OKAY) {
+		return err;
+	}
+	for (int i = 0; i < out->alloc; i++) {
+		out->dp[i] = 0;
+	}
+	for (int i = 0; i < limbs; i++) {
+		uint32_t limb = (uint32_t) one[i];
+		int pos = 30 * i;
+		for (int left = 30; left > 0;) {
+			int k = pos / MP_DIGIT_BIT;
+			int s = pos % MP_DIGIT_BIT;
+			int take = MP_DIGIT_BIT - s < left ? MP_DIGIT_BIT - s : left;
+			out->dp[k] |= ((bn_digit) limb << s) & MP_MASK;
+			limb >>= take;
+			pos += take;
+			left -= take;
+		}
+	}
+	out->used = n;
+	out->sign = MP_ZPOS;
+	mp_clamp(out);
+	return BN_OKAY;
+}
+
+/**
+ * Does 30 divsteps on the low limbs of f and g, returns the new delta and the transition matrix.
+ */
+static int32_t safegcd_divsteps(int32_t delta, uint32_t f, uint32_t g, safegcd_trans_t *t) {
+	uint32_t u = 1, v = 0, q = 0, r = 1;
+	for (int i = 0; i < 30; i++) {
+		/* c1 = -1 if delta > 0, c2 = -1 if g is odd, swap (and subtract) if both. */
+		uint32_t c1 = (uint32_t) ((-delta) >> 31);
+		uint32_t c2 = -(g & 1);
+		uint32_t x = (f ^ c1) - c1;
+		uint32_t y = (u ^ c1) - c1;
+		uint32_t z = (v ^ c1) - c1;
+		g += x & c2;
+		q += y & c2;
+		r += z & c2;
+		c1 &= c2;
+		delta = (int32_t) (((uint32_t) delta ^ c1) - c1) + 1;
+		f += g & c1;
+		u += q & c1;
+		v += r & c1;
+		g >>= 1;
+		u <<= 1;
+		v <<= 1;
+	}
+	t->u = (int32_t) u;
+	t->v = (int32_t) v;
+	t->q = (int32_t) q;
+	t->r = (int32_t) r;
+	return delta;
+}
+
+/**
+ * Sets [d, e] = t * [d, e] / 2^30 mod the modulus (keeping them in (-2 * modulus, modulus)).
+ */
+static void safegcd_update_de(int32_t *d, int32_t *e, const safegcd_trans_t *t, const int32_t *mod, uint32_t mod_inv, int limbs) {
+	int32_t sd = d[limbs - 1] >> 31;
+	int32_t se = e[limbs - 1] >> 31;
+	/* Add the modulus times [md, me] so that the results are divisible by 2^30 (and the negative inputs are offset). */
+	int32_t md = (t->u & sd) + (t->v & se);
+	int32_t me = (t->q & sd) + (t->r & se);
+	int64_t cd = (int64_t) t->u * d[0] + (int64_t) t->v * e[0];
+	int64_t ce = (int64_t) t->q * d[0] + (int64_t) t->r * e[0];
+	md -= (int32_t) ((mod_inv * (uint32_t) cd + (uint32_t) md) & SAFEGCD_M30);
+	me -= (int32_t) ((mod_inv * (uint32_t) ce + (uint32_t) me) & SAFEGCD_M30);
+	cd += (int64_t) mod[0] * md;
+	ce += (int64_t) mod[0] * me;
+	cd >>= 30;
+	ce >>= 30;
+	for (int i = 1; i < limbs; i++) {
+		cd += (int64_t) t->u * d[i] + (int64_t) t->v * e[i] + (int64_t) mod[i] * md;
+		ce += (int64_t) t->q * d[i] + (int64_t) t->r * e[i] + (int64_t) mod[i] * me;
+		d[i - 1] = (int32_t) cd & SAFEGCD_M30;
+		e[i - 1] = (int32_t) ce & SAFEGCD_M30;
+		cd >>= 30;
+		ce >>= 30;
+	}
+	d[limbs - 1] = (int32_t) cd;
+	e[limbs - 1] = (int32_t) ce;
+}
+
+/**
+ * Sets [f, g] = t * [f, g] / 2^30.
+ */
+static void safegcd_update_fg(int32_t *f, int32_t *g, const safegcd_trans_t *t, int limbs) {
+	int64_t cf = (int64_t) t->u * f[0] + (int64_t) t->v * g[0];
+	int64_t cg = (int64_t) t->q * f[0] + (int64_t) t->r * g[0];
+	cf >>= 30;
+	cg >>= 30;
+	for (int i = 1; i < limbs; i++) {
+		cf += (int64_t) t->u * f[i] + (int64_t) t->v * g[i];
+		cg += (int64_t) t->q * f[i] + (int64_t) t->r * g[i];
+		f[i - 1] = (int32_t) cf & SAFEGCD_M30;
+		g[i - 1] = (int32_t) cg & SAFEGCD_M30;
+		cf >>= 30;
+		cg >>= 30;
+	}
+	f[limbs - 1] = (int32_t) cf;
+	g[limbs - 1] = (int32_t) cg;
+}
+
+/**
+ * Sets r = r * sign(f) mod the modulus, from r in (-2 * modulus, modulus) to [0, modulus).
+ */
+static void safegcd_normalize(int32_t *r, int32_t sign, const int32_t *mod, int limbs) {
+	int32_t cond_add = r[limbs - 1] >> 31;
+	int32_t cond_negate = sign >> 31;
+	for (int i = 0; i < limbs; i++) {
+		r[i] += mod[i] & cond_add;
+		r[i] = (r[i] ^ cond_negate) - cond_negate;
+	}
+	for (int i = 0; i < limbs - 1; i++) {
+		r[i + 1] += r[i] >> 30;
+		r[i] &= SAFEGCD_M30;
+	}
+	cond_add = r[limbs - 1] >> 31;
+	for (int i = 0; i < limbs; i++) {
+		r[i] += mod[i] & cond_add;
+	}
+	for (int i = 0; i < limbs - 1; i++) {
+		r[i + 1] += r[i] >> 30;
+		r[i] &= SAFEGCD_M30;
+	}
+}
+
+/**
+ * Checks (without branching on the limbs) that g = 0 and f = +-1, i.e. that the inverted value was invertible.
+ */
+static bool safegcd_is_unit(const int32_t *f, const int32_t *g, int limbs) {
+	uint32_t pos = 0, neg = 0, zero = 0;
+	for (int i = 0; i < limbs; i++) {
+		/* The low limbs of -1 are all ones (30 bits), its top limb is signed. */
+		pos |= (uint32_t) f[i] ^ (i == 0 ? 1 : 0);
+		neg |= (uint32_t) f[i] ^ (i == limbs - 1 ? UINT32_MAX : SAFEGCD_M30);
+		zero |= (uint32_t) g[i];
+	}
+	/* x is zero iff the top bit of (x | -x) is zero. */
+	uint32_t pos_bad = (pos | (0 - pos)) >> 31;
+	uint32_t neg_bad = (neg | (0 - neg)) >> 31;
+	uint32_t g_bad = (zero | (0 - zero)) >> 31;
+	return ((pos_bad & neg_bad) | g_bad) == 0;
+}
+
+/**
+ * Inverts one (below the odd mod) using the constant-time Bernstein-Yang safegcd (divsteps),
+ * with a number of iterations that only depends on the bit length of mod.
+ * Returns BN_VAL if one is not invertible (e.g. zero).
+ */
+static bn_err bn_safegcd_inv(const bn_t *one, const bn_t *mod, bn_t *out) {
+	int bits = mp_count_bits(mod);
+	int limbs = bits / 30 + 1;
+	if (limbs > SAFEGCD_LIMBS || mp_iseven(mod)) {
+		return BN_VAL;
+	}
+	int32_t m[SAFEGCD_LIMBS], d[SAFEGCD_LIMBS] = {0}, e[SAFEGCD_LIMBS] = {0}, f[SAFEGCD_LIMBS], g[SAFEGCD_LIMBS];
+	safegcd_from_bn(mod, m, limbs);
+	safegcd_from_bn(one, g, limbs);
+	for (int i = 0; i < limbs; i++) {
+		f[i] = m[i];
+	}
+	e[0] = 1;
+	/* The inverse of mod modulo 2^30 (by Newton iteration). */
+	uint32_t mod_inv = (uint32_t) m[0];
+	for (int i = 0; i < 4; i++) {
+		mod_inv *= 2 - (uint32_t) m[0] * mod_inv;
+	}
+	/* The bound on the number of divsteps from the paper, for the bit length of mod. */
+	int steps = bits < 46 ? (49 * bits + 80) / 17 : (49 * bits + 57) / 17;
+	int32_t delta = 1;
+	for (int i = 0; i < steps; i += 30) {
+		safegcd_trans_t t;
+		delta = safegcd_divsteps(delta, (uint32_t) f[0], (uint32_t) g[0], &t);
+		safegcd_update_de(d, e, &t, m, mod_inv, limbs);
+		safegcd_update_fg(f, g, &t, limbs);
+	}
+	/* Now g = 0 and f = +-gcd(one, mod), which is +-1 if one is invertible, then d = +-one^-1. */
+	bool unit = safegcd_is_unit(f, g, limbs);
+	safegcd_normalize(d, f[limbs - 1], m, limbs);
+	bn_err err = safegcd_to_bn(d, limbs, out);
+	if (err == BN_OKAY && !unit) {
+		return BN_VAL;
+	}
+	return err;
+}
+#endif
+
 bn_err bn_mod_inv(const bn_t *one, const bn_t *mod, bn_t *out) {
-	return mp_invmod(one, mod, out);
+	#if INVERSION == INV_EULER
+		bn_t exp;
+		bn_err err;
+		if ((err = bn_init(&exp)) != BN_OKAY) {
+			return err;
+		}
+		if ((err = mp_sub_d(mod, 2, &exp)) == BN_OKAY) {
+			err = mp_exptmod(one, &exp, mod, out);
+		}
+		bn_clear(&exp);
+		/* The power is zero iff one is not invertible (modulo a prime), report it like mp_invmod. */
+		if (err == BN_OKAY && mp_iszero(out)) {
+			return BN_VAL;
+		}
+		return err;
+	#elif INVERSION == INV_SAFEGCD
+		return bn_safegcd_inv(one, mod, out);
+	#else
+		return mp_invmod(one, mod, out);
+	#endif
 }
 
 bn_err bn_mod_pow(const bn_t *one, const bn_t *exp, const bn_t *mod, bn_t *out) {
@@ -171,19 +403,156 @@ bn_err bn_mod(const bn_t *one, const bn_t *mod, bn_t *out) {
 }
 
 bn_err bn_red_init(red_t *out) {
+	#ifdef SPECIAL_PRIME
+		out->special_terms = 0;
+	#endif
+	#if INVERSION == INV_EULER
+		out->fermat_exp = NULL;
+	#endif
 	#if REDUCTION == RED_MONTGOMERY
 	    bn_err err;
 	    if ((err = bn_init(&out->montgomery_renorm)) != BN_OKAY) {
 	        return err;
 	    }
-	    return bn_init(&out->montgomery_renorm_sqr);
+	    if ((err = bn_init(&out->montgomery_renorm_sqr)) != BN_OKAY) {
+	        return err;
+	    }
+	    return bn_init(&out->montgomery_renorm_cube);
 	#elif REDUCTION == RED_BARRETT
 		return bn_init(&out->barrett);
 	#endif
 		return BN_OKAY;
 }
 
+#ifdef SPECIAL_PRIME
+/**
+ * Detects whether the modulus is a special (pseudo-Mersenne or Solinas) prime 2^k - c,
+ * with c of at most SPECIAL_TERMS terms in signed binary (NAF) and below 2^(k/2), so that a product
+ * of reduced values is reduced by at most three foldings. If not, out->special_terms is zero and the reduction
+ * falls back to the generic one (a prime like P-256, with c close to 2^k, folds too slowly to beat it).
+ */
+static bn_err bn_red_special_setup(const bn_t *mod, red_t *out) {
+	bn_t c;
+	bn_err err;
+	int terms = 0;
+	out->special_terms = 0;
+	out->special_bits = mp_count_bits(mod);
+	if ((err = mp_init(&c)) != BN_OKAY) {
+		return err;
+	}
+	if ((err = mp_2expt(&c, out->special_bits)) != BN_OKAY) {
+		goto out;
+	}
+	if ((err = mp_sub(&c, mod, &c)) != BN_OKAY) {
+		goto out;
+	}
+	if (2 * mp_count_bits(&c) > out->special_bits) {
+		goto out;
+	}
+	for (int shift = 0; !mp_iszero(&c); shift++) {
+		if (mp_isodd(&c)) {
+			if (terms == SPECIAL_TERMS) {
+				terms = 0;
+				goto out;
+			}
+			/* The NAF digit is 1 if c = 1 mod 4 and -1 if c = 3 mod 4. */
+			if ((c.dp[0] & 3) == 1) {
+				out->special_signs[terms] = 1;
+				err = mp_sub_d(&c, 1, &c);
+			} else {
+				out->special_signs[terms] = -1;
+				err = mp_add_d(&c, 1, &c);
+			}
+			if (err != BN_OKAY) {
+				terms = 0;
+				goto out;
+			}
+			out->special_shifts[terms++] = shift;
+		}
+		if ((err = mp_div_2(&c, &c)) != BN_OKAY) {
+			terms = 0;
+			goto out;
+		}
+	}
+out:
+	out->special_terms = terms;
+	mp_clear(&c);
+	return err;
+}
+
+/**
+ * Reduces modulo a special prime 2^k - c by folding, what = hi * 2^k + lo = lo + hi * c,
+ * with the multiplication by c done by shifts and additions.
+ */
+static bn_err bn_red_special(const bn_t *mod, const red_t *red, bn_t *what) {
+	bn_t hi, term;
+	bn_err err;
+	if ((err = mp_init_multi(&hi, &term, NULL)) != BN_OKAY) {
+		return err;
+	}
+	while (mp_count_bits(what) > red->special_bits) {
+		if ((err = mp_div_2d(what, red->special_bits, &hi, NULL)) != BN_OKAY) {
+			goto out;
+		}
+		if ((err = mp_mod_2d(what, red->special_bits, what)) != BN_OKAY) {
+			goto out;
+		}
+		for (int i = 0; i < red->special_terms; i++) {
+			if ((err = mp_mul_2d(&hi, red->special_shifts[i], &term)) != BN_OKAY) {
+				goto out;
+			}
+			if (red->special_signs[i] > 0) {
+				err = mp_add(what, &term, what);
+			} else {
+				err = mp_sub(what, &term, what);
+			}
+			if (err != BN_OKAY) {
+				goto out;
+			}
+		}
+	}
+	/* Now |what| < 2^k < 2 * mod. */
+	while (mp_cmp_d(what, 0) == MP_LT) {
+		if ((err = mp_add(what, mod, what)) != BN_OKAY) {
+			goto out;
+		}
+	}
+	while (mp_cmp(what, mod) != MP_LT) {
+		if ((err = mp_sub(what, mod, what)) != BN_OKAY) {
+			goto out;
+		}
+	}
+out:
+	mp_clear_multi(&hi, &term, NULL);
+	return err;
+}
+#endif
+
 bn_err bn_red_setup(const bn_t *mod, red_t *out) {
+	#ifdef SPECIAL_PRIME
+		bn_err special_err;
+		if ((special_err = bn_red_special_setup(mod, out)) != BN_OKAY) {
+			return special_err;
+		}
+	#endif
+	#if INVERSION == INV_EULER
+		/* The exponent is fixed for the modulus, so it is recoded once. */
+		bn_t exp;
+		bn_err exp_err;
+		if ((exp_err = bn_init(&exp)) != BN_OKAY) {
+			return exp_err;
+		}
+		if ((exp_err = mp_sub_d(mod, 2, &exp)) != BN_OKAY) {
+			bn_clear(&exp);
+			return exp_err;
+		}
+		bn_wsliding_clear(out->fermat_exp);
+		out->fermat_exp = bn_wsliding_ltr(&exp, bn_red_pow_window(bn_bit_length(&exp)));
+		bn_clear(&exp);
+		if (out->fermat_exp == NULL) {
+			return BN_MEM;
+		}
+	#endif
 	#if REDUCTION == RED_MONTGOMERY
 		bn_err err;
 		if ((err = mp_montgomery_setup(mod, &out->montgomery_digit)) != BN_OKAY) {
@@ -192,7 +561,14 @@ bn_err bn_red_setup(const bn_t *mod, red_t *out) {
 		if ((err = mp_montgomery_calc_normalization(&out->montgomery_renorm, mod)) != BN_OKAY) {
 			return err;
 		}
-		return mp_sqrmod(&out->montgomery_renorm, mod, &out->montgomery_renorm_sqr);
+		if ((err = mp_sqrmod(&out->montgomery_renorm, mod, &out->montgomery_renorm_sqr)) != BN_OKAY) {
+			return err;
+		}
+		/* R^3 = R^2 * R^2 / R, used to bring the inverses back into the Montgomery domain. */
+		if ((err = mp_sqr(&out->montgomery_renorm_sqr, &out->montgomery_renorm_cube)) != BN_OKAY) {
+			return err;
+		}
+		return mp_montgomery_reduce(&out->montgomery_renorm_cube, mod, out->montgomery_digit);
 	#elif REDUCTION == RED_BARRETT
 		return mp_reduce_setup(&out->barrett, mod);
 	#endif
@@ -201,7 +577,12 @@ bn_err bn_red_setup(const bn_t *mod, red_t *out) {
 
 bn_err bn_red_encode(bn_t *one, const bn_t *mod, const red_t *red) {
 	#if REDUCTION == RED_MONTGOMERY
-		return mp_mulmod(one, &red->montgomery_renorm, mod, one);
+		/* one * R = one * R^2 / R, a Montgomery multiplication (one needs to be below R). */
+		bn_err err;
+		if ((err = mp_mul(one, &red->montgomery_renorm_sqr, one)) != BN_OKAY) {
+			return err;
+		}
+		return mp_montgomery_reduce(one, mod, red->montgomery_digit);
 	#else
 		return BN_OKAY;
 	#endif
@@ -215,6 +596,80 @@ bn_err bn_red_decode(bn_t *one, const bn_t *mod, const red_t *red) {
 	#endif
 }
 
+#ifndef BN_NON_CONST
+/* The top bit of a digit, the borrow of a digit subtraction. */
+#define BN_DIGIT_TOP (sizeof(bn_digit) * CHAR_BIT - 1)
+
+/**
+ * Gets the i-th digit of a non-negative bn, zero above its used digits.
+ */
+static inline bn_digit bn_digit_at(const bn_t *one, int i) {
+	return i < one->used ? one->dp[i] : 0;
+}
+
+/**
+ * Sets the number of used digits of out to n (clearing the digits above them) and clamps it.
+ */
+static void bn_set_used(bn_t *out, int n) {
+	for (int i = n; i < out->used; i++) {
+		out->dp[i] = 0;
+	}
+	out->used = n;
+	out->sign = MP_ZPOS;
+	mp_clamp(out);
+}
+
+/**
+ * Subtracts mod from out + carry * 2^(MP_DIGIT_BIT * n) if it is at least mod, without branching on the comparison.
+ */
+static void bn_sub_once(bn_t *out, bn_digit carry, const bn_t *mod) {
+	int n = mod->used;
+	bn_digit borrow = 0;
+	for (int i = 0; i < n; i++) {
+		borrow = (out->dp[i] - mod->dp[i] - borrow) >> BN_DIGIT_TOP;
+	}
+	bn_digit mask = (bn_digit) 0 - (carry | (borrow ^ 1));
+	borrow = 0;
+	for (int i = 0; i < n; i++) {
+		bn_digit d = out->dp[i] - (mod->dp[i] & mask) - borrow;
+		out->dp[i] = d & MP_MASK;
+		borrow = d >> BN_DIGIT_TOP;
+	}
+	bn_set_used(out, n);
+}
+
+/**
+ * Sets out = one - other, adding mod if it borrowed (without branching on it).
+ */
+static bn_err bn_sub_add_once(const bn_t *one, const bn_t *other, const bn_t *mod, bn_t *out) {
+	int n = mod->used;
+	bn_err err;
+	if ((err = mp_grow(out, n)) != BN_OKAY) {
+		return err;
+	}
+	bn_digit borrow = 0;
+	for (int i = 0; i < n; i++) {
+		bn_digit d = bn_digit_at(one, i) - bn_digit_at(other, i) - borrow;
+		out->dp[i] = d & MP_MASK;
+		borrow = d >> BN_DIGIT_TOP;
+	}
+	bn_digit mask = (bn_digit) 0 - borrow;
+	bn_digit carry = 0;
+	for (int i = 0; i < n; i++) {
+		bn_digit s = out->dp[i] + (mod->dp[i] & mask) + carry;
+		out->dp[i] = s & MP_MASK;
+		carry = s >> MP_DIGIT_BIT;
+	}
+	bn_set_used(out, n);
+	return BN_OKAY;
+}
+#endif
+
+/*
+ * The modular addition, subtraction and negation of reduced values (below mod) do not divide,
+ * they do one conditional subtraction (addition) of mod, without a branch unless BN_NON_CONST is set.
+ */
+
 bn_err bn_red_add(const bn_t *one, const bn_t *other, const bn_t *mod, const red_t *red, bn_t *out) {
 #ifdef BN_NON_CONST
 	bn_err err;
@@ -227,7 +682,19 @@ bn_err bn_red_add(const bn_t *one, const bn_t *other, const bn_t *mod, const red
 		return err;
 	}
 #else
-	return mp_addmod(one, other, mod, out);
+	int n = mod->used;
+	bn_err err;
+	if ((err = mp_grow(out, n)) != BN_OKAY) {
+		return err;
+	}
+	bn_digit carry = 0;
+	for (int i = 0; i < n; i++) {
+		bn_digit s = bn_digit_at(one, i) + bn_digit_at(other, i) + carry;
+		out->dp[i] = s & MP_MASK;
+		carry = s >> MP_DIGIT_BIT;
+	}
+	bn_sub_once(out, carry, mod);
+	return BN_OKAY;
 #endif
 }
 
@@ -245,11 +712,12 @@ bn_err bn_red_sub(const bn_t *one, const bn_t *other, const bn_t *mod, const red
 	}
 	return err;
 #else
-	return mp_submod(one, other, mod, out);
+	return bn_sub_add_once(one, other, mod, out);
 #endif
 }
 
 bn_err bn_red_neg(const bn_t *one, const bn_t *mod, const red_t *red, bn_t *out) {
+#ifdef BN_NON_CONST
 	bn_err err;
 	if ((err = mp_neg(one, out)) != BN_OKAY) {
 		return err;
@@ -258,6 +726,10 @@ bn_err bn_red_neg(const bn_t *one, const bn_t *mod, const red_t *red, bn_t *out)
 		return mp_add(out, mod, out);
 	}
 	return err;
+#else
+	const bn_t zero = {0};
+	return bn_sub_add_once(&zero, one, mod, out);
+#endif
 }
 
 bn_err bn_red_mul(const bn_t *one, const bn_t *other, const bn_t *mod, const red_t *red, bn_t *out) {
@@ -277,15 +749,29 @@ bn_err bn_red_sqr(const bn_t *one, const bn_t *mod, const red_t *red, bn_t *out)
 }
 
 bn_err bn_red_inv(const bn_t *one, const bn_t *mod, const red_t *red, bn_t *out) {
+#if INVERSION == INV_EULER
+	/* one^(mod - 2), by the exponentiation under the reduction (it stays in the Montgomery domain). */
 	bn_err err;
-	if ((err = mp_invmod(one, mod, out)) != BN_OKAY) {
+	if ((err = bn_red_pow_wsliding(one, red->fermat_exp, mod, red, out)) != BN_OKAY) {
+		return err;
+	}
+	/* The power is zero iff one is not invertible (modulo a prime), report it like mp_invmod. */
+	return mp_iszero(out) ? BN_VAL : BN_OKAY;
+#else
+	bn_err err;
+	if ((err = bn_mod_inv(one, mod, out)) != BN_OKAY) {
 		return err;
 	}
 	#if REDUCTION == RED_MONTGOMERY
-		return mp_mulmod(out, &red->montgomery_renorm_sqr, mod, out);
+		/* (one / R)^-1 * R = one^-1 * R^3 / R, a Montgomery multiplication. */
+		if ((err = mp_mul(out, &red->montgomery_renorm_cube, out)) != BN_OKAY) {
+			return err;
+		}
+		return mp_montgomery_reduce(out, mod, red->montgomery_digit);
 	#else
 		return err;
 	#endif
+#endif
 }
 
 bn_err bn_red_div(const bn_t *one, const bn_t *other, const bn_t *mod, const red_t *red, bn_t *out) {
@@ -294,48 +780,126 @@ bn_err bn_red_div(const bn_t *one, const bn_t *other, const bn_t *mod, const red
 	if ((err = mp_init(&inv)) != BN_OKAY) {
 		return err;
 	}
-	if ((err = mp_copy(other, &inv)) != BN_OKAY) {
-		goto out;
-	}
-	#if REDUCTION == RED_MONTGOMERY
-		if ((err = mp_montgomery_reduce(&inv, mod, red->montgomery_digit)) != BN_OKAY) {
-			goto out;
-		}
-	#endif
-	if ((err = mp_invmod(&inv, mod, &inv)) != BN_OKAY) {
-		goto out;
-	}
-	if ((err = mp_mulmod(one, &inv, mod, out)) != BN_OKAY) {
+	if ((err = bn_red_inv(other, mod, red, &inv)) != BN_OKAY) {
 		goto out;
 	}
+	err = bn_red_mul(one, &inv, mod, red, out);
 out:
 	mp_clear(&inv);
 	return err;
 }
 
-bn_err bn_red_pow(const bn_t *base, const bn_t *exp, const bn_t *mod, const red_t *red, bn_t *out) {
-	int blen = bn_bit_length(exp);
+/**
+ * Multiplies one by each of the count others, outs[i] = one * others[i] (reduced), outs may be the others (but not one).
+ * With the Montgomery reduction, if one is in the Montgomery form and the others are not, the products are not either.
+ */
+bn_err bn_red_mul_batch(const bn_t *one, const bn_t *others, size_t count, const bn_t *mod, const red_t *red, bn_t *outs) {
+	bn_err err;
+	for (size_t i = 0; i < count; i++) {
+		if ((err = mp_mul(one, &others[i], &outs[i])) != BN_OKAY) {
+			return err;
+		}
+		if ((err = bn_red_reduce(mod, red, &outs[i])) != BN_OKAY) {
+			return err;
+		}
+	}
+	return BN_OKAY;
+}
+
+/**
+ * Gets the window width of the sliding window exponentiation for an exponent of the given bit length.
+ */
+int bn_red_pow_window(int bits) {
+	if (bits <= 16) {
+		return 2;
+	} else if (bits <= 64) {
+		return 3;
+	} else if (bits <= 192) {
+		return 4;
+	} else {
+		return 5;
+	}
+}
+
+/**
+ * Sets out = base^exp, with exp recoded by bn_wsliding_ltr (so that a fixed exponent is recoded once),
+ * using a table of the odd powers of base up to 2^w - 1. It is not constant-time in the exponent.
+ */
+bn_err bn_red_pow_wsliding(const bn_t *base, const wsliding_t *exp, const bn_t *mod, const red_t *red, bn_t *out) {
+	int size = 1 << (exp->w - 1);
+	bn_t table[size];
 	bn_t result;
 	bn_err err;
 	if ((err = bn_init(&result)) != BN_OKAY) {
 		return err;
 	}
-	if ((err = bn_copy(base, &result)) != BN_OKAY) {
+	if (exp->length == 0) {
+		/* base^0 = 1, in the domain of the reduction. */
+		if ((err = bn_from_int(1, &result)) == BN_OKAY && (err = bn_red_encode(&result, mod, red)) == BN_OKAY) {
+			err = bn_copy(&result, out);
+		}
 		bn_clear(&result);
 		return err;
 	}
-	for (int i = blen - 2; i >= 0; --i) {
-		bn_red_sqr(&result, mod, red, &result);
-		if (bn_get_bit(exp, i)) {
-			bn_red_mul(&result, base, mod, red, &result);
+	/* table[i] = base^(2i + 1) */
+	int inits;
+	for (inits = 0; inits < size; inits++) {
+		if ((err = bn_init(&table[inits])) != BN_OKAY) {
+			goto out;
+		}
+	}
+	if ((err = bn_copy(base, &table[0])) != BN_OKAY) {
+		goto out;
+	}
+	if (size > 1) {
+		if ((err = bn_red_sqr(base, mod, red, &result)) != BN_OKAY) {
+			goto out;
+		}
+		for (int i = 1; i < size; i++) {
+			if ((err = bn_red_mul(&table[i - 1], &result, mod, red, &table[i])) != BN_OKAY) {
+				goto out;
+			}
+		}
+	}
+	/* The first digit is non-zero (and odd). */
+	if ((err = bn_copy(&table[exp->data[0] / 2], &result)) != BN_OKAY) {
+		goto out;
+	}
+	for (size_t i = 1; i < exp->length; i++) {
+		if ((err = bn_red_sqr(&result, mod, red, &result)) != BN_OKAY) {
+			goto out;
+		}
+		if (exp->data[i]) {
+			if ((err = bn_red_mul(&result, &table[exp->data[i] / 2], mod, red, &result)) != BN_OKAY) {
+				goto out;
+			}
 		}
 	}
-	bn_copy(&result, out);
+	err = bn_copy(&result, out);
+out:
+	for (int i = 0; i < inits; i++) {
+		bn_clear(&table[i]);
+	}
 	bn_clear(&result);
-	return BN_OKAY;
+	return err;
+}
+
+bn_err bn_red_pow(const bn_t *base, const bn_t *exp, const bn_t *mod, const red_t *red, bn_t *out) {
+	wsliding_t *recoded = bn_wsliding_ltr(exp, bn_red_pow_window(bn_bit_length(exp)));
+	if (recoded == NULL) {
+		return BN_MEM;
+	}
+	bn_err err = bn_red_pow_wsliding(base, recoded, mod, red, out);
+	bn_wsliding_clear(recoded);
+	return err;
 }
 
 bn_err bn_red_reduce(const bn_t *mod, const red_t *red, bn_t *what) {
+	#ifdef SPECIAL_PRIME
+		if (red->special_terms > 0) {
+			return bn_red_special(mod, red, what);
+		}
+	#endif
 	#if REDUCTION == RED_MONTGOMERY
 		return mp_montgomery_reduce(what, mod, red->montgomery_digit);
 	#elif REDUCTION == RED_BARRETT
@@ -344,10 +908,112 @@ bn_err bn_red_reduce(const bn_t *mod, const red_t *red, bn_t *what) {
 		return mp_mod(what, mod, what);
 }
 
+bool bn_red_lazy_ok(const bn_t *mod, unsigned int bound) {
+	#if REDUCTION == RED_BASE
+		return true;
+	#else
+		// The reduction of a product of unreduced values needs the product below mod * R (Montgomery)
+		// or R^2 (Barrett), with R the smallest power of the digit base above mod.
+		int headroom = 0;
+		while ((1U << headroom) < bound) {
+			headroom++;
+		}
+		return mp_count_bits(mod) + headroom <= mod->used * MP_DIGIT_BIT;
+	#endif
+}
+
+bn_err bn_add_unred(const bn_t *one, const bn_t *other, bn_t *out) {
+	return mp_add(one, other, out);
+}
+
+bn_err bn_sub_unred(const bn_t *one, const bn_t *other, const bn_t *offset, bn_t *out) {
+	bn_err err;
+	if (one == other) {
+		return mp_copy(offset, out);
+	}
+	if (out == other) {
+		// Do not clobber the subtrahend.
+		if ((err = mp_sub(offset, other, out)) != BN_OKAY) {
+			return err;
+		}
+		return mp_add(out, one, out);
+	}
+	if ((err = mp_add(one, offset, out)) != BN_OKAY) {
+		return err;
+	}
+	return mp_sub(out, other, out);
+}
+
+bn_err bn_neg_unred(const bn_t *one, const bn_t *offset, bn_t *out) {
+	return mp_sub(offset, one, out);
+}
+
+#ifndef BN_NON_CONST
+/**
+ * Gets the i-th digit of mod * 2^shift (with shift below MP_DIGIT_BIT).
+ */
+static inline bn_digit bn_shifted_digit_at(const bn_t *mod, int i, int shift) {
+	bn_digit low = i > 0 ? bn_digit_at(mod, i - 1) : 0;
+	return ((bn_digit_at(mod, i) << shift) | (low >> (MP_DIGIT_BIT - shift))) & MP_MASK;
+}
+#endif
+
+/**
+ * Fully reduces an unreduced value (below 2^LAZY_BOUND_BITS * mod), without branching on it
+ * unless BN_NON_CONST is set: mod * 2^i is subtracted if the value is at least that, for all i
+ * from LAZY_BOUND_BITS - 1 down to 0.
+ */
+bn_err bn_red_normalize(const bn_t *one, const bn_t *mod, bn_t *out) {
+	bn_err err;
+	if ((err = mp_copy(one, out)) != BN_OKAY) {
+		return err;
+	}
+#ifdef BN_NON_CONST
+	while (mp_cmp_mag(out, mod) != MP_LT) {
+		if ((err = mp_sub(out, mod, out)) != BN_OKAY) {
+			return err;
+		}
+	}
+	return err;
+#else
+	int n = mod->used + 1;
+	if ((err = mp_grow(out, n)) != BN_OKAY) {
+		return err;
+	}
+	for (int i = out->used; i < n; i++) {
+		out->dp[i] = 0;
+	}
+	for (int shift = LAZY_BOUND_BITS - 1; shift >= 0; shift--) {
+		bn_digit borrow = 0;
+		for (int i = 0; i < n; i++) {
+			borrow = (out->dp[i] - bn_shifted_digit_at(mod, i, shift) - borrow) >> BN_DIGIT_TOP;
+		}
+		bn_digit mask = (bn_digit) 0 - (borrow ^ 1);
+		borrow = 0;
+		for (int i = 0; i < n; i++) {
+			bn_digit d = out->dp[i] - (bn_shifted_digit_at(mod, i, shift) & mask) - borrow;
+			out->dp[i] = d & MP_MASK;
+			borrow = d >> BN_DIGIT_TOP;
+		}
+	}
+	bn_set_used(out, n);
+	return BN_OKAY;
+#endif
+}
+
+bn_err bn_mul_int(const bn_t *one, unsigned int value, bn_t *out) {
+	return mp_mul_d(one, value, out);
+}
+
 void bn_red_clear(red_t *out) {
+	#if INVERSION == INV_EULER
+		bn_wsliding_clear(out->fermat_exp);
+		out->fermat_exp = NULL;
+	#endif
 	#if REDUCTION == RED_MONTGOMERY
 		bn_clear(&out->montgomery_renorm);
 		bn_clear(&out->montgomery_renorm_sqr);
+		bn_clear(&out->montgomery_renorm_cube);
 	#elif REDUCTION == RED_BARRETT
 		bn_clear(&out->barrett);
 	#endif
@@ -390,64 +1056,63 @@ int bn_get_bit(const bn_t *bn, int which) {
 	return (bn->dp[which_digit] >> which_bit) & 1;
 }
 
+/**
+ * Gets the count (at most 31) bits of bn starting at the bit which, directly from its digits
+ * (the bits above its length are zero).
+ */
+uint32_t bn_get_bits(const bn_t *bn, int which, int count) {
+	uint32_t result = 0;
+	for (int got = 0; got < count;) {
+		int which_digit = which / MP_DIGIT_BIT;
+		int which_bit = which % MP_DIGIT_BIT;
+		if (bn->used <= which_digit) {
+			break;
+		}
+		result |= (uint32_t) (bn->dp[which_digit] >> which_bit) << got;
+		got += MP_DIGIT_BIT - which_bit;
+		which += MP_DIGIT_BIT - which_bit;
+	}
+	return result & ((1u << count) - 1);
+}
+
 int bn_bit_length(const bn_t *bn) {
 	return mp_count_bits(bn);
 }
 
+/*
+ * The scalar recodings below read the digits of the scalar (bn_get_bit, bn_get_bits) in a single pass
+ * over its bits, without doing any arithmetic on it.
+ */
+
 wnaf_t *bn_wnaf(const bn_t *bn, int w) {
 	if (w > 8 || w < 2) {
 		return NULL;
 	}
-	wnaf_t *result = NULL;
-
-	size_t bits = bn_bit_length(bn) + 1;
-    int8_t arr[bits];
+	int blen = bn_bit_length(bn);
+	size_t bits = blen + 1;
+	int8_t arr[bits];
 
-	bn_t half_width;
-	if (mp_init(&half_width) != BN_OKAY) {
-		return NULL;
-	}
-	bn_from_int(1, &half_width);
-	bn_lsh(&half_width, w - 1, &half_width);
-	bn_t full_width;
-	if (mp_init(&full_width) != BN_OKAY) {
-		goto exit_full_width;
-	}
-	bn_from_int(1, &full_width);
-	bn_lsh(&full_width, w, &full_width);
-
-	bn_t k;
-	if (mp_init(&k) != BN_OKAY) {
-		goto exit_k;
-	}
-	bn_copy(bn, &k);
-
-	bn_t val_mod;
-	if (mp_init(&val_mod) != BN_OKAY) {
-		goto exit_val_mod;
-	}
+	int32_t half_width = 1 << (w - 1);
+	int32_t full_width = 1 << w;
+	/* The bits [i, i + w] of the remaining scalar (the scalar minus the digits so far), the borrow of a
+	 * negative digit stays in it. The bits above it are the ones of the scalar. */
+	int32_t window = (int32_t) bn_get_bits(bn, 0, w + 1);
 
 	size_t i = 0;
-	while (mp_cmp_d(&k, 0) == MP_GT) {
-		if (bn_get_bit(&k, 0) == 1) {
-			bn_mod(&k, &full_width, &val_mod);
-			if (mp_cmp(&val_mod, &half_width) == MP_GT) {
-				if (mp_sub(&val_mod, &full_width, &val_mod) != BN_OKAY) {
-					goto exit_result;
-				}
+	while (window != 0 || (int) i + w + 1 < blen) {
+		int32_t val = 0;
+		if (window & 1) {
+			val = window & (full_width - 1);
+			if (val > half_width) {
+				val -= full_width;
 			}
-			int8_t val = (int8_t) mp_get_i32(&val_mod);
-			arr[i++] = val;
-			if (mp_sub(&k, &val_mod, &k) != BN_OKAY) {
-				goto exit_result;
-			}
-		} else {
-			arr[i++] = 0;
+			window -= val;
 		}
-		bn_rsh(&k, 1, &k);
+		arr[i++] = (int8_t) val;
+		window = (window >> 1) + (bn_get_bit(bn, i + w) << w);
 	}
 
-	result = malloc(sizeof(wnaf_t));
+	wnaf_t *result = malloc(sizeof(wnaf_t));
 	result->w = w;
 	result->length = i;
 	result->data = calloc(result->length, sizeof(int8_t));
@@ -456,15 +1121,6 @@ wnaf_t *bn_wnaf(const bn_t *bn, int w) {
     for (size_t j = 0; j < i; j++) {
         result->data[j] = arr[i - j - 1];
     }
-
-exit_result:
-    bn_clear(&val_mod);
-exit_val_mod:
-	bn_clear(&k);
-exit_k:
-	bn_clear(&full_width);
-exit_full_width:
-	bn_clear(&half_width);
 	return result;
 }
 
@@ -561,51 +1217,33 @@ wsliding_t *bn_wsliding_ltr(const bn_t *bn, int w) {
 		return NULL;
 	}
 
-	wsliding_t *result = NULL;
-
     int blen = bn_bit_length(bn);
-    uint8_t arr[blen];
-    memset(arr, 0, blen * sizeof(uint8_t));
+    uint8_t arr[blen + 1];
+    memset(arr, 0, (blen + 1) * sizeof(uint8_t));
 
     int b = blen - 1;
-    int u = 0;
-    int c = 0;
-    bn_t mask;
-	if (mp_init(&mask) != BN_OKAY) {
-		goto exit_mask;
-	}
-
     int i = 0;
     while (b >= 0) {
         if (!bn_get_bit(bn, b)) {
-            arr[i++] = 0;  // result.append(0)
-            b--;  // b -= 1
+            arr[i++] = 0;
+            b--;
         } else {
-            u = 0;  // u = 0
-            for (int v = 1; v <= w; v++) {  // for v in range(1, w + 1):
-                if (b + 1 < v) {            // if b + 1 < v:
-                    break;
-                }
-                bn_from_int((1 << v) - 1, &mask);  // mask = ((2**v) - 1) << (b - v + 1)
-                bn_lsh(&mask, b - v + 1, &mask);
-                bn_and(&mask, bn, &mask);  // mask = (i & mask)
-                bn_rsh(&mask, b - v + 1, &mask);  // mask = mask >> (b - v + 1)
-                if (bn_get_bit(&mask, 0)) {  // if c & 1:
-                    u = (int) bn_to_int(&mask);    // u = c
-                }
-            }
-            c = u;
-            while (u) {  // k = u.bit_length()
-                arr[i++] = 0; // result.extend([0] * (k - 1))
-                b--;    // b -= k
+            // The longest window (of at most w bits) from the bit b down that is odd.
+            int v = b + 1 < w ? b + 1 : w;
+            uint32_t u = bn_get_bits(bn, b - v + 1, v);
+            while (!(u & 1)) {
                 u >>= 1;
+                v--;
             }
-            arr[i - 1] = c;  // result.append(u)
+            for (int j = 0; j < v - 1; j++) {
+                arr[i++] = 0;
+            }
+            arr[i++] = u;
+            b -= v;
         }
     }
-    bn_clear(&mask);
 
-    result = malloc(sizeof(wsliding_t));
+    wsliding_t *result = malloc(sizeof(wsliding_t));
     result->w = w;
     result->length = 0;
     result->data = NULL;
@@ -621,7 +1259,6 @@ wsliding_t *bn_wsliding_ltr(const bn_t *bn, int w) {
             result->data[j - (i - result->length)] = arr[j];
         }
     }
-exit_mask:
     return result;
 }
 
@@ -630,41 +1267,26 @@ wsliding_t *bn_wsliding_rtl(const bn_t *bn, int w) {
 		return NULL;
 	}
 
-	wsliding_t *result = NULL;
-
     int blen = bn_bit_length(bn);
     uint8_t arr[blen + w];
     memset(arr, 0, (blen + w) * sizeof(uint8_t));
 
-    bn_t k;
-	if (mp_init(&k) != BN_OKAY) {
-		goto exit_k;
-	}
-	bn_copy(bn, &k);
-
-    bn_t mask;
-	if (mp_init(&mask) != BN_OKAY) {
-		goto exit_mask;
-	}
-
+    int b = 0;
     int i = 0;
-	while (mp_cmp_d(&k, 0) == MP_GT) {
-        if (!bn_get_bit(&k, 0)) {
+	while (b < blen) {
+        if (!bn_get_bit(bn, b)) {
             arr[i++] = 0;
-            bn_rsh(&k, 1, &k);
+            b++;
         } else {
-            bn_from_int((1 << w) - 1, &mask);  // mask = ((2**w) - 1)
-            bn_and(&mask, &k, &mask);
-            arr[i++] = bn_to_int(&mask);
+            arr[i++] = bn_get_bits(bn, b, w);
             for (int j = 0; j < w - 1; j++) {
                 arr[i++] = 0;
             }
-            bn_rsh(&k, w, &k);
+            b += w;
         }
 	}
-	bn_clear(&mask);
 
-	result = malloc(sizeof(wsliding_t));
+	wsliding_t *result = malloc(sizeof(wsliding_t));
     result->w = w;
     result->length = 0;
     result->data = NULL;
@@ -680,10 +1302,6 @@ wsliding_t *bn_wsliding_rtl(const bn_t *bn, int w) {
             result->data[result->length - j - 1] = arr[j];
         }
     }
-
-exit_mask:
-    bn_clear(&k);
-exit_k:
 	return result;
 }
 
@@ -698,6 +1316,23 @@ void bn_wsliding_clear(wsliding_t *wsliding) {
 small_base_t *bn_convert_base_small(const bn_t *bn, int m) {
     small_base_t *result = NULL;
 
+    if (m > 1 && (m & (m - 1)) == 0 && bn_get_sign(bn) == BN_ZPOS) {
+        // A power of two base (radix 2^d), the digits are the d-bit chunks of the scalar.
+        int d = 0;
+        while ((1 << d) < m) {
+            d++;
+        }
+        int blen = bn_bit_length(bn);
+        result = malloc(sizeof(small_base_t));
+        result->length = blen == 0 ? 1 : (blen + d - 1) / d;
+        result->data = calloc(result->length, sizeof(int));
+        result->m = m;
+        for (size_t i = 0; i < result->length; i++) {
+            result->data[i] = (int) bn_get_bits(bn, i * d, d);
+        }
+        return result;
+    }
+
     bn_t k;
 	if (mp_init(&k) != BN_OKAY) {
 		goto exit_k;
@@ -744,6 +1379,26 @@ void bn_small_base_clear(small_base_t *sb) {
 large_base_t *bn_convert_base_large(const bn_t *bn, const bn_t *m) {
     large_base_t *result = NULL;
 
+    int d = mp_cnt_lsb(m);
+    if (d > 0 && d == bn_bit_length(m) - 1 && bn_get_sign(bn) == BN_ZPOS) {
+        // A power of two base (radix 2^d), the digits are the d-bit chunks of the scalar.
+        int blen = bn_bit_length(bn);
+        result = malloc(sizeof(large_base_t));
+        result->length = blen == 0 ? 1 : (blen + d - 1) / d;
+        result->data = calloc(result->length, sizeof(bn_t));
+        bn_init(&result->m);
+        bn_copy(m, &result->m);
+        for (size_t i = 0; i < result->length; i++) {
+            bn_init(&result->data[i]);
+            if (mp_div_2d(bn, i * d, &result->data[i], NULL) != BN_OKAY ||
+                mp_mod_2d(&result->data[i], d, &result->data[i]) != BN_OKAY) {
+                bn_large_base_clear(result);
+                return NULL;
+            }
+        }
+        return result;
+    }
+
     bn_t k;
 	if (mp_init(&k) != BN_OKAY) {
 		goto exit_k;
@@ -810,11 +1465,6 @@ booth_t *bn_booth(const bn_t *bn, int32_t w, size_t bits) {
     if (w >= 30) {
         return NULL;
     }
-    int32_t mask = (1 << (w + 1)) - 1;
-    bn_t d, m;
-    bn_init(&d);
-    bn_init(&m);
-    bn_from_int(mask, &m);
 
     size_t len = (bits / w) + 1;
     booth_t *result = malloc(sizeof(booth_t));
@@ -824,20 +1474,16 @@ booth_t *bn_booth(const bn_t *bn, int32_t w, size_t bits) {
 
     long l = 0;
     for (long i = bits + (w - (bits % w) - 1); i > 0; i -= w) {
+        // The w + 1 bits of the scalar ending at the bit i (below zero the bits are zero).
         int32_t digit;
-        bn_copy(bn, &d);
         if (i >= w) {
-            bn_rsh(&d, i - w, &d);
+            digit = (int32_t) bn_get_bits(bn, i - w, w + 1);
         } else {
-            bn_lsh(&d, w - i, &d);
+            digit = (int32_t) (bn_get_bits(bn, 0, i + 1) << (w - i));
         }
-        bn_and(&d, &m, &d);
-        digit = bn_to_int(&d);
         int32_t val = bn_booth_word(digit, w);
         result->data[l++] = val;
     }
-    bn_clear(&d);
-    bn_clear(&m);
     return result;
 }
 
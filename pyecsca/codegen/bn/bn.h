@@ -17,6 +17,30 @@
 #define SQR_COMBA	  3
 #define SQR_BASE	  4
 
+#define INV_GCD     1
+#define INV_EULER   2
+#define INV_SAFEGCD 3
+
+#ifndef INVERSION
+#define INVERSION INV_GCD
+#endif
+
+#if INVERSION == INV_SAFEGCD
+/* The most 30-bit limbs of the moduli inverted by the safegcd (the top one signed), enough for 521 bits. */
+#define SAFEGCD_LIMBS 18
+#endif
+
+#ifdef SPECIAL_PRIME
+#if REDUCTION == RED_MONTGOMERY
+#error "The special prime reduction cannot be combined with the Montgomery reduction."
+#endif
+/* The most terms of c in a special prime 2^k - c, in signed binary (NAF). */
+#define SPECIAL_TERMS 8
+#endif
+
+/* The unreduced values of the lazy reduction are below 2^LAZY_BOUND_BITS * mod (LAZY_BOUND in pyecsca.codegen.optimize). */
+#define LAZY_BOUND_BITS 4
+
 #define bn_t mp_int
 #define bn_digit mp_digit
 #define bn_err mp_err
@@ -37,14 +61,32 @@
 #define BN_EQ MP_EQ /* equal */
 #define BN_GT MP_GT /* greater than */
 
+typedef struct {
+    uint8_t *data;
+    size_t length;
+    int w;
+} wsliding_t;
+
 typedef struct {
 	#if REDUCTION == RED_MONTGOMERY
 		bn_digit montgomery_digit;
 		bn_t montgomery_renorm;
 		bn_t montgomery_renorm_sqr;
+		bn_t montgomery_renorm_cube;
 	#elif REDUCTION == RED_BARRETT
 		bn_t barrett;
 	#endif
+	#if INVERSION == INV_EULER
+		/* The Fermat inversion exponent, mod - 2, recoded for the sliding window exponentiation. */
+		wsliding_t *fermat_exp;
+	#endif
+	#ifdef SPECIAL_PRIME
+		/* The modulus is 2^special_bits - c, c = sum of special_signs[i] * 2^special_shifts[i]. */
+		int special_bits;
+		int special_terms;
+		int8_t special_signs[SPECIAL_TERMS];
+		int special_shifts[SPECIAL_TERMS];
+	#endif
 } red_t;
 
 typedef struct {
@@ -58,11 +100,6 @@ typedef struct {
 	int w;
 } wnaf_t;
 
-typedef struct {
-    uint8_t *data;
-    size_t length;
-    int w;
-} wsliding_t;
 
 typedef struct {
     int *data;
@@ -91,6 +128,7 @@ bn_err  bn_init(bn_t *bn);
 bn_err  bn_copy(const bn_t *from, bn_t *to);
 void    bn_clear(bn_t *bn);
 #define bn_clear_multi mp_clear_multi
+#define bn_zero mp_zero
 
 bn_err bn_from_bin(const uint8_t *data, size_t size, bn_t *out);
 bn_err bn_from_hex(const char *data, bn_t *out);
@@ -126,10 +164,21 @@ bn_err bn_red_mul(const bn_t *one, const bn_t *other, const bn_t *mod, const red
 bn_err bn_red_sqr(const bn_t *one, const bn_t *mod, const red_t *red, bn_t *out);
 bn_err bn_red_inv(const bn_t *one, const bn_t *mod, const red_t *red, bn_t *out);
 bn_err bn_red_div(const bn_t *one, const bn_t *other, const bn_t *mod, const red_t *red, bn_t *out);
+bn_err bn_red_mul_batch(const bn_t *one, const bn_t *others, size_t count, const bn_t *mod, const red_t *red, bn_t *outs);
 bn_err bn_red_pow(const bn_t *base, const bn_t *exp, const bn_t *mod, const red_t *red, bn_t *out);
+bn_err bn_red_pow_wsliding(const bn_t *base, const wsliding_t *exp, const bn_t *mod, const red_t *red, bn_t *out);
+int    bn_red_pow_window(int bits);
 bn_err bn_red_reduce(const bn_t *mod, const red_t *red, bn_t *what);
 void   bn_red_clear(red_t *out);
 
+/* Lazy reduction, the values are kept below a small multiple of mod. */
+bool   bn_red_lazy_ok(const bn_t *mod, unsigned int bound);
+bn_err bn_add_unred(const bn_t *one, const bn_t *other, bn_t *out);
+bn_err bn_sub_unred(const bn_t *one, const bn_t *other, const bn_t *offset, bn_t *out);
+bn_err bn_neg_unred(const bn_t *one, const bn_t *offset, bn_t *out);
+bn_err bn_red_normalize(const bn_t *one, const bn_t *mod, bn_t *out);
+bn_err bn_mul_int(const bn_t *one, unsigned int value, bn_t *out);
+
 bn_err bn_lsh(const bn_t *one, int amount, bn_t *out);
 bn_err bn_rsh(const bn_t *one, int amount, bn_t *out);
 bn_err bn_and(const bn_t *one, const bn_t *other, bn_t *out);
@@ -140,6 +189,7 @@ bool    bn_is_1(const bn_t *one);
 bn_sign bn_get_sign(const bn_t *one);
 
 int     bn_get_bit(const bn_t *bn, int which);
+uint32_t bn_get_bits(const bn_t *bn, int which, int count);
 int     bn_bit_length(const bn_t *bn);
 
 wnaf_t *bn_wnaf(const bn_t *bn, int w);
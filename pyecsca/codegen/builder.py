@@ -25,6 +25,16 @@ To list formulas for a given coordinate system and curve model, e.g. projective
 
    builder list shortw projective
 
+The field operation counts of the formulas, as rendered, are listed with the ``--costs`` option
+and the expected counts of a scalar multiplication using the given formulas with the ``--scalarmult`` option
+(a mixed addition among them is counted where the implementation uses it, the batch normalization of the
+tables with the ``--normalize-tables`` option).
+
+.. code-block:: shell
+
+   builder list --costs shortw projective
+   builder list --costs --bits 256 --scalarmult "wnaf(width=4)" shortw projective add-2007-bl dbl-2007-bl neg
+
 The following example builds an implementation for the HOST architecture,
 using the short-Weierstrass curve model, projective coordinates, ``add-2007-bl`` and ``dbl-2007-bl``
 formulas with the left-to-right double-and-add scalar multiplier. Furthermore, it uses Barrett modular
@@ -34,18 +44,130 @@ reduction.
 
     builder build --platform HOST --red BARRETT -v shortw projective add-2007-bl dbl-2007-bl "ltr()" .
 
+Builds for the HOST can be optimized for speed (``-O3 -march=native`` and libtommath with 64-bit digits)
+instead of the default size using the ``--profile`` option.
+
+.. code-block:: shell
+
+    builder build --platform HOST --profile speed shortw projective add-2007-bl dbl-2007-bl "ltr()" .
+
+A named curve can be baked into the implementation, its parameters are then set up at startup
+and the formulas are specialized to it (e.g. the multiplications by ``a = 0`` are dropped for secp256k1).
+
+.. code-block:: shell
+
+    builder build --platform HOST --curve secg/secp256k1 shortw jacobian add-2007-bl dbl-2007-bl "ltr()" .
+
+The formulas can reduce lazily, keeping the results of additions and subtractions unreduced
+(below a small multiple of the prime) where the bounds allow it, using the ``--lazy`` option.
+
+.. code-block:: shell
+
+    builder build --platform HOST --lazy shortw projective add-2015-rcb dbl-2015-rcb "ltr()" .
+
+On targets with little RAM, the operations of the formulas can be reordered to reduce the peak
+number of live temporaries (each of them a bignum) using the ``--schedule`` option, the peaks are
+reported with ``-v`` (and in the rendered formula files).
+
+.. code-block:: shell
+
+    builder build --platform CWNANO --schedule -v shortw projective add-2007-bl dbl-2007-bl "wnaf(width=4)" .
+
+The precomputed tables of the window multipliers can be normalized (to Z = 1) after the precomputation,
+all of the points of the table using one inversion, with the ``--normalize-tables`` option.
+
+.. code-block:: shell
+
+    builder build --platform HOST --normalize-tables shortw jacobian add-2007-bl dbl-2007-bl neg "wnaf(width=5)" .
+
+A mixed addition formula (one that assumes ``Z2 == 1``, like ``madd-2007-bl``) can be given alongside the general
+addition. It is then used to add the points known to have Z = 1: the input point and the normalized tables.
+
+.. code-block:: shell
+
+    builder build --platform HOST --normalize-tables shortw jacobian add-2007-bl madd-2007-bl dbl-2007-bl neg "wnaf(width=5)" .
+
+The points of the scalar multiplication (e.g. its precomputed tables) can be allocated from a pool,
+preallocated at startup and sized for the multiplier, instead of the heap, using the ``--pool`` option.
+
+.. code-block:: shell
+
+    builder build --platform CWNANO --pool shortw projective add-2007-bl dbl-2007-bl "comb(width=4)" .
+
+With a baked curve and the Montgomery reduction, the formulas can operate on fixed-width field elements
+(limb arrays sized for the prime, with dedicated add, sub and Montgomery multiplication routines) instead
+of the heap-backed big numbers, using the ``--field FIXED`` option.
+
+.. code-block:: shell
+
+    builder build --platform STM32F3 --curve secg/secp256r1 --red MONTGOMERY --field FIXED shortw jacobian add-2007-bl dbl-2007-bl "ltr()" .
+
+The reduction can use the special form of the primes (pseudo-Mersenne or Solinas, ``2^k - c`` with a sparse ``c``
+below ``2^(k/2)``, like Curve25519, secp256k1, P-224 or P-384), reducing by shifts and additions, using the
+``--special-prime`` option. The form is detected when the curve is set up, the other moduli (and primes like P-256,
+whose ``c`` is too large to fold quickly) use the reduction given by ``--red`` (not Montgomery).
+
+.. code-block:: shell
+
+    builder build --platform HOST --red BARRETT --special-prime shortw projective add-2007-bl dbl-2007-bl "ltr()" .
+
+The inversions (of the coordinates when converting to affine, in the table normalization and of the nonce in ECDSA)
+use the algorithm given by ``--inv``: ``GCD`` is the binary extended GCD of libtommath, or the constant-time
+Bernstein-Yang safegcd with the ``--safegcd`` option, ``EULER`` is the Fermat inversion, an exponentiation by the
+modulus minus two under the reduction given by ``--red`` (a sliding window exponentiation, with the exponent recoded
+once per modulus).
+
+.. code-block:: shell
+
+    builder build --platform STM32F3 --red MONTGOMERY --inv GCD --safegcd shortw projective add-2007-bl dbl-2007-bl "ltr()" .
+
 The following uses different formulas with the comb multiplier and specifies its width.
 
 .. code-block:: shell
 
     builder build --platform HOST --red BARRETT -v shortw projective add-1998-cmo dbl-1998-cmo "comb(width=5)" .
+
+Builds of identical configurations can be reused from an on-disk build cache
+(by default in ``~/.cache/pyecsca-codegen``, see ``--cache-dir``).
+
+.. code-block:: shell
+
+    builder build --cache --platform HOST shortw projective add-1998-cmo dbl-1998-cmo "comb(width=5)" .
+
+When iterating on a configuration, a persistent workspace can be used, so that only the changed
+generated files get recompiled.
+
+.. code-block:: shell
+
+    builder build --workdir work/ -j8 --platform HOST shortw projective add-1998-cmo dbl-1998-cmo "comb(width=5)" .
+    builder build --workdir work/ -j8 --platform HOST shortw projective add-1998-cmo dbl-1998-cmo "comb(width=4)" .
+
+Many configurations can be built in parallel from a JSON matrix specification using
+the ``build-matrix`` subcommand. Each list in the specification is one axis of the matrix,
+every combination is built into its own subdirectory of the output directory and a ``manifest.json``
+describing the results is written there.
+
+.. code-block:: json
+
+    {
+        "model": "shortw",
+        "coords": "projective",
+        "formulas": [["add-2007-bl", "dbl-2007-bl"], ["add-1998-cmo", "dbl-1998-cmo"]],
+        "multipliers": ["ltr()", "rtl()", "ldr()"],
+        "reductions": ["BASE", "MONTGOMERY", "BARRETT"],
+        "platforms": ["HOST"]
+    }
+
+.. code-block:: shell
+
+    builder build-matrix --workers 8 --cache spec.json out/
 """
+import itertools
+import json
 import re
-import shutil
-import subprocess
 from copy import copy
-from os import path
-from typing import List, Optional, Tuple, Type, MutableMapping, Any
+from os import path, makedirs
+from typing import List, Optional, Tuple, Type, MutableMapping, Any, Mapping
 
 import click
 from public import public
@@ -56,8 +178,32 @@ from pyecsca.ec.formula import Formula, AdditionFormula
 from pyecsca.ec.model import CurveModel
 from pyecsca.ec.mult import ScalarMultiplier, AccumulationOrder, ProcessingDirection
 
-from pyecsca.codegen.render import render
-from pyecsca.codegen.common import Platform, DeviceConfiguration, MULTIPLIERS, wrap_enum, get_model, get_coords
+from pyecsca.codegen.cache import BuildCache, DEFAULT_MAX_SIZE, config_descriptor
+from pyecsca.codegen.costs import formula_costs, scalarmult_costs
+from pyecsca.codegen.render import (render_and_build, render_and_build_many, check_config, transform_formula,
+                                    is_mixed_addition, get_input_assumptions, formula_name)
+from pyecsca.codegen.common import (Platform, Profile, Field, DeviceConfiguration, MULTIPLIERS, MODELS,
+                                    wrap_enum, get_model, get_coords)
+
+
+def check_formulas(formulas: List[Formula]) -> None:
+    """
+    Check that the `formulas` are of distinct types and have no assumptions on their inputs.
+    A mixed addition (see :py:func:`pyecsca.codegen.render.is_mixed_addition`) can accompany a general one.
+
+    :param formulas: The formulas.
+    :raises ValueError: If two formulas are of the same type, a mixed addition lacks a general one or a formula
+                        that is not a mixed addition has assumptions on its inputs.
+    """
+    for formula in formulas:
+        if get_input_assumptions(formula) and not is_mixed_addition(formula):
+            raise ValueError("Formula {} has assumptions on its inputs that are not supported.".format(formula))
+    general = [formula for formula in formulas if not is_mixed_addition(formula)]
+    mixed = [formula for formula in formulas if is_mixed_addition(formula)]
+    if len(set(formula.__class__ for formula in general)) != len(general) or len(mixed) > 1:
+        raise ValueError("Duplicate formula types.")
+    if mixed and not any(isinstance(formula, AdditionFormula) for formula in general):
+        raise ValueError("A mixed addition needs a general addition formula. None was supplied.")
 
 
 def get_formula(ctx: click.Context, param, value: Optional[Tuple[str]]) -> List[Formula]:
@@ -71,20 +217,30 @@ def get_formula(ctx: click.Context, param, value: Optional[Tuple[str]]) -> List[
             raise click.BadParameter(
                 "Formula '{}' is not a formula in '{}'.".format(formula, coords))
         result.append(coords.formulas[formula])
-    if len(set(formula.__class__ for formula in result)) != len(result):
-        raise click.BadParameter("Duplicate formula types.")
+    try:
+        check_formulas(result)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
     ctx.obj["formulas"] = copy(result)
     return result
 
 
-def get_multiplier(ctx: click.Context, param, value: Optional[str]) -> Optional[ScalarMultiplier]:
-    if value is None:
-        return None
+def parse_multiplier(value: str, formulas: List[Formula]) -> ScalarMultiplier:
+    """
+    Parse a scalar multiplier specification, like ``ltr(complete=True)`` and
+    instantiate the multiplier using the given `formulas`. A mixed addition is not passed
+    to the multiplier, it is used alongside its general addition.
+
+    :param value: The multiplier specification.
+    :param formulas: The available formulas.
+    :return: The scalar multiplier.
+    :raises ValueError: If the specification is invalid or the formulas do not fit the multiplier.
+    """
     res = re.match(
         r"(?P<name>[a-zA-Z\-]+)\((?P<args>([a-zA-Z_]+ *= *[a-zA-Z0-9.]+, ?)*?([a-zA-Z_]+ *= *[a-zA-Z0-9.]+)*)\)",
         value)
     if not res:
-        raise click.BadParameter("Couldn't parse multiplier spec: {}.".format(value))
+        raise ValueError("Couldn't parse multiplier spec: {}.".format(value))
     name = res.group("name")
     args = res.group("args")
     mult_class: Type[ScalarMultiplier] = None
@@ -93,13 +249,12 @@ def get_multiplier(ctx: click.Context, param, value: Optional[str]) -> Optional[
             mult_class = mult_def["class"]
             break
     if mult_class is None:
-        raise click.BadParameter("Unknown multiplier: {}.".format(name))
-    ctx.ensure_object(dict)
-    formulas = ctx.obj["formulas"]
+        raise ValueError("Unknown multiplier: {}.".format(name))
+    formulas = [formula for formula in formulas if not is_mixed_addition(formula)]
     classes = set(formula.__class__ for formula in formulas)
     if not all(
             any(issubclass(cls, required) for cls in classes) for required in mult_class.requires):
-        raise click.BadParameter(
+        raise ValueError(
             "Multiplier {} requires formulas: {}, got {}.".format(mult_class.__name__,
                                                                   mult_class.requires, classes))
     globs = dict(globals())
@@ -118,6 +273,112 @@ def get_multiplier(ctx: click.Context, param, value: Optional[str]) -> Optional[
     return mult
 
 
+def get_multiplier(ctx: click.Context, param, value: Optional[str]) -> Optional[ScalarMultiplier]:
+    if value is None:
+        return None
+    ctx.ensure_object(dict)
+    try:
+        return parse_multiplier(value, ctx.obj["formulas"])
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def format_costs(formula: Formula) -> str:
+    """
+    Format the field operation counts and cost of one call of a rendered `formula`.
+
+    :param formula: The formula.
+    :return: The formatted counts.
+    """
+    try:
+        counts = formula_costs(formula)
+    except ValueError as e:
+        return "n/a ({})".format(e)
+    return "{} = {:.1f}M".format(counts, counts.cost())
+
+
+def expand_matrix(spec: Mapping[str, Any]) -> List[DeviceConfiguration]:
+    """
+    Expand a build matrix specification into the list of configurations it describes.
+
+    The specification has the ``model`` and ``coords`` keys, the ``formulas`` key with a list
+    of formula sets and the ``multipliers`` key with a list of multiplier specifications. The
+    optional ``platforms``, ``hashes``, ``rands``, ``muls``, ``sqrs``, ``reductions``, ``invs``
+    and ``profiles`` keys list the enum choices (as in the ``build`` subcommand), each defaults
+    to the default of the ``build`` subcommand (``platforms`` defaults to ``["HOST"]``). The ``keygen``, ``ecdh``,
+    ``ecdsa``, ``defines``, ``curve`` (a named curve to bake in), ``lazy_reduction``, ``scheduling``,
+    ``normalize_tables``, ``point_pool``, ``field``, ``special_prime`` and ``safegcd`` keys apply to all configurations.
+
+    :param spec: The specification.
+    :return: The configurations, one for each combination of the listed choices.
+    :raises ValueError: If the specification is invalid.
+    """
+    try:
+        model = MODELS[spec["model"]]()
+    except KeyError:
+        raise ValueError("Unknown or missing curve model: {}.".format(spec.get("model")))
+    coords_name = spec.get("coords")
+    if coords_name not in model.coordinates:
+        raise ValueError("Coordinate model '{}' is not a model in '{}'.".format(coords_name, model))
+    coords = model.coordinates[coords_name]
+    formula_sets = spec.get("formulas", [])
+    if formula_sets and all(isinstance(name, str) for name in formula_sets):
+        formula_sets = [formula_sets]
+    keygen = spec.get("keygen", True)
+    ecdh = spec.get("ecdh", True)
+    ecdsa = spec.get("ecdsa", True)
+    defines = spec.get("defines")
+    curve = spec.get("curve")
+    lazy_reduction = spec.get("lazy_reduction", False)
+    scheduling = spec.get("scheduling", False)
+    normalize_tables = spec.get("normalize_tables", False)
+    point_pool = spec.get("point_pool", False)
+    special_prime = spec.get("special_prime", False)
+    safegcd = spec.get("safegcd", False)
+    try:
+        field = getattr(Field, spec.get("field", "BN").upper())
+    except AttributeError as e:
+        raise ValueError("Invalid choice in 'field': {}.".format(e))
+
+    def enum_axis(key, enum_class, default):
+        try:
+            return [getattr(enum_class, name.upper()) for name in spec.get(key, [default])]
+        except AttributeError as e:
+            raise ValueError("Invalid choice in '{}': {}.".format(key, e))
+
+    enum_axes = [
+        enum_axis("hashes", HashType, "SHA1"),
+        enum_axis("rands", RandomMod, "SAMPLE"),
+        enum_axis("muls", Multiplication, "BASE"),
+        enum_axis("sqrs", Squaring, "BASE"),
+        enum_axis("reductions", Reduction, "BASE"),
+        enum_axis("invs", Inversion, "GCD"),
+        enum_axis("platforms", Platform, "HOST"),
+        enum_axis("profiles", Profile, "SIZE"),
+    ]
+    configs = []
+    for names in formula_sets:
+        formulas = []
+        for name in names:
+            if name not in coords.formulas:
+                raise ValueError("Formula '{}' is not a formula in '{}'.".format(name, coords))
+            formulas.append(coords.formulas[name])
+        check_formulas(formulas)
+        if ecdsa and not any(isinstance(formula, AdditionFormula) for formula in formulas):
+            raise ValueError("ECDSA needs an addition formula. None was supplied.")
+        for mult_spec in spec.get("multipliers", []):
+            scalarmult = parse_multiplier(mult_spec, formulas)
+            for hash, rand, mul, sqr, red, inv, platform, profile in itertools.product(*enum_axes):
+                config = DeviceConfiguration(model, coords, formulas, scalarmult, hash, rand,
+                                             mul, sqr, red, inv, platform, keygen, ecdh,
+                                             ecdsa, defines, profile, curve, lazy_reduction,
+                                             scheduling, normalize_tables, point_pool, field,
+                                             special_prime, safegcd)
+                check_config(config)
+                configs.append(config)
+    return configs
+
+
 def get_define(ctx: click.Context, param, values: Optional[List[str]]) -> Optional[MutableMapping[str, Any]]:
     if values is None:
         return None
@@ -171,6 +432,35 @@ def main():
               type=click.Choice(Inversion.names()),
               callback=wrap_enum(Inversion),
               help="Modular inversion algorithm to use.")
+@click.option("--profile", envvar="PROFILE", default="SIZE", show_default=True,
+              type=click.Choice(Profile.names(), case_sensitive=False),
+              callback=wrap_enum(Profile),
+              help="The build profile, i.e. whether to optimize for size, speed or debugging.")
+@click.option("--curve", type=str, default=None,
+              help="Bake a named curve (e.g. secg/secp256r1) into the implementation and specialize "
+                   "the formulas to it.")
+@click.option("--lazy/--no-lazy", "lazy_reduction", is_flag=True, default=False, show_default=True,
+              help="Whether to reduce lazily in the formulas, i.e. keep the results of additions and "
+                   "subtractions unreduced where possible.")
+@click.option("--schedule/--no-schedule", "scheduling", is_flag=True, default=False, show_default=True,
+              help="Whether to reorder the operations of the formulas to reduce the peak number of live "
+                   "temporaries (and so the RAM usage).")
+@click.option("--normalize-tables/--no-normalize-tables", is_flag=True, default=False, show_default=True,
+              help="Whether to normalize the precomputed tables of the scalar multiplier (to Z = 1) "
+                   "using a single (simultaneous) inversion.")
+@click.option("--pool/--no-pool", "point_pool", is_flag=True, default=False, show_default=True,
+              help="Whether to allocate the points of the scalar multiplication from a preallocated pool, "
+                   "sized for the tables of the multiplier and reset after each scalar multiplication.")
+@click.option("--field", default="BN", show_default=True,
+              type=click.Choice(Field.names(), case_sensitive=False),
+              callback=wrap_enum(Field),
+              help="The representation of the field elements in the formulas, FIXED uses fixed-width limb "
+                   "arrays sized for the baked curve (needs --curve and --red MONTGOMERY).")
+@click.option("--special-prime/--no-special-prime", is_flag=True, default=False, show_default=True,
+              help="Whether to reduce by shifts and additions modulo the primes of a special form (2^k - c, "
+                   "with a sparse c), falling back to the reduction given by --red for the other moduli.")
+@click.option("--safegcd/--no-safegcd", is_flag=True, default=False, show_default=True,
+              help="Whether the GCD inversion is the constant-time Bernstein-Yang safegcd (needs --inv GCD).")
 @click.option("--keygen/--no-keygen", help="Whether to enable keygen.", is_flag=True, default=True,
               show_default=True)
 @click.option("--ecdh/--no-ecdh", help="Whether to enable ECDH.", is_flag=True, default=True,
@@ -182,6 +472,16 @@ def main():
 @click.option("--strip", help="Whether to strip the binary or not.", is_flag=True)
 @click.option("--remove/--no-remove", help="Whether to remove the dir.", is_flag=True, default=True,
               show_default=True)
+@click.option("--cache/--no-cache", envvar="PYECSCA_CODEGEN_USE_CACHE", is_flag=True, default=False,
+              show_default=True,
+              help="Whether to use the build cache (reuse a previously built identical configuration).")
+@click.option("--cache-dir", envvar="PYECSCA_CODEGEN_CACHE", type=click.Path(file_okay=False),
+              help="The build cache directory.")
+@click.option("--cache-size", type=int, default=DEFAULT_MAX_SIZE >> 20, show_default=True,
+              help="The maximum size of the build cache, in MiB.")
+@click.option("--workdir", type=click.Path(file_okay=False),
+              help="A persistent workspace to render and build in incrementally (never removed).")
+@click.option("-j", "--jobs", type=int, default=None, help="The number of parallel make jobs.")
 @click.option("-v", "--verbose", count=True)
 @click.argument("model", required=True,
                 type=click.Choice(["shortw", "montgom", "edwards", "twisted"]),
@@ -195,8 +495,12 @@ def main():
 @click.argument("outdir")
 @click.pass_context
 @public
-def build_impl(ctx, platform, hash, rand, mul, sqr, red, inv, keygen, ecdh, ecdsa, define, strip, remove,
-               verbose, model, coords, formulas, scalarmult, outdir):
+def build_impl(ctx, platform, hash, rand, mul, sqr, red, inv, profile, curve, lazy_reduction, scheduling,
+               normalize_tables, point_pool, field, special_prime, safegcd, keygen, ecdh, ecdsa,
+               define, strip,
+               remove,
+               cache, cache_dir, cache_size, workdir, jobs, verbose, model, coords, formulas, scalarmult,
+               outdir):
     """This command builds an ECC implementation.
 
     \b
@@ -211,35 +515,93 @@ def build_impl(ctx, platform, hash, rand, mul, sqr, red, inv, keygen, ecdh, ecds
     if ecdsa and not any(isinstance(formula, AdditionFormula) for formula in formulas):
         raise click.BadParameter("ECDSA needs an addition formula. None was supplied.")
 
-    click.echo("[ ] Rendering...")
     config = DeviceConfiguration(model, coords, formulas, scalarmult, hash, rand, mul, sqr, red,
-                                 inv, platform, keygen, ecdh, ecdsa, define)
-    dir, elf_file, hex_file = render(config)
-    click.echo("[*] Rendered.")
-
+                                 inv, platform, keygen, ecdh, ecdsa, define, profile, curve, lazy_reduction,
+                                 scheduling, normalize_tables, point_pool, field, special_prime, safegcd)
+    try:
+        params = check_config(config)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    build_cache = BuildCache(cache_dir, cache_size << 20) if cache else None
     click.echo("[ ] Building...")
-    result = subprocess.run(["make"], cwd=dir, capture_output=not verbose)
-    if result.returncode != 0:
+    try:
+        dir, elf_file, hex_file, _ = render_and_build(config, outdir, strip, remove, build_cache, workdir, jobs,
+                                                      verbose > 0)
+    except ValueError:
         click.echo("[x] Build failed.")
-        shutil.rmtree(dir)
+        return
+    if dir is None:
+        click.echo("[*] Cache hit.")
     else:
         click.echo("[*] Built.")
+    if verbose:
+        peaks = ["{}: {}".format(formula_name(formula),
+                                 transform_formula(formula, params, lazy_reduction, scheduling,
+                                                   field == Field.FIXED)["temporaries"])
+                 for formula in formulas]
+        click.echo("[*] Peak live temporaries: {}.".format(", ".join(peaks)))
+    click.echo(elf_file)
+    click.echo(hex_file)
+    if dir is not None and (not remove or workdir is not None):
+        click.echo(dir)
+
+
+@main.command("build-matrix")
+@click.option("-j", "--workers", type=int, default=None,
+              help="The number of parallel builds (defaults to the number of CPUs).")
+@click.option("--strip", help="Whether to strip the binaries or not.", is_flag=True)
+@click.option("--cache/--no-cache", envvar="PYECSCA_CODEGEN_USE_CACHE", is_flag=True, default=False,
+              show_default=True,
+              help="Whether to use the build cache (reuse a previously built identical configuration).")
+@click.option("--cache-dir", envvar="PYECSCA_CODEGEN_CACHE", type=click.Path(file_okay=False),
+              help="The build cache directory.")
+@click.option("--cache-size", type=int, default=DEFAULT_MAX_SIZE >> 20, show_default=True,
+              help="The maximum size of the build cache, in MiB.")
+@click.argument("spec", type=click.File("r"))
+@click.argument("outdir", type=click.Path(file_okay=False))
+@public
+def build_matrix(workers, strip, cache, cache_dir, cache_size, spec, outdir):
+    """This command builds a matrix of ECC implementations in parallel.
 
-        if strip:
-            subprocess.run(["make", "strip"], cwd=dir, capture_output=not verbose)
-        full_elf_path = path.join(dir, elf_file)
-        full_hex_path = path.join(dir, hex_file)
-        shutil.copy(full_elf_path, outdir)
-        shutil.copy(full_hex_path, outdir)
-        click.echo(elf_file)
-        click.echo(hex_file)
-        if remove:
-            shutil.rmtree(dir)
-        else:
-            click.echo(dir)
+    \b
+    SPEC: The JSON file with the matrix specification.
+    OUTDIR: The output directory, gets a subdirectory per implementation and a manifest.json.
+    """
+    try:
+        configs = expand_matrix(json.load(spec))
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="SPEC")
+    click.echo("[ ] Building {} configurations...".format(len(configs)))
+    build_cache = BuildCache(cache_dir, cache_size << 20) if cache else None
+    results = render_and_build_many(configs, outdir, workers, strip, build_cache)
+    manifest = []
+    for result in results:
+        manifest.append({
+            "config": config_descriptor(result.config),
+            "outdir": path.relpath(result.outdir, outdir),
+            "elf": result.elf_file,
+            "hex": result.hex_file,
+            "status": result.status,
+            "error": result.error
+        })
+        if result.status == "failed":
+            click.echo("[x] {}: {}".format(result.outdir, result.error))
+    makedirs(outdir, exist_ok=True)
+    with open(path.join(outdir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    failed = sum(1 for result in results if result.status == "failed")
+    click.echo("[*] Built {}, failed {}.".format(len(results) - failed, failed))
 
 
 @main.command("list")
+@click.option("--costs", help="Whether to list the field operation counts and costs of the formulas.",
+              is_flag=True)
+@click.option("--scalarmult", type=str, default=None,
+              help="Scalar multiplier (e.g. \"ltr()\") to report the expected costs of, using the listed formulas.")
+@click.option("--bits", type=int, default=256, show_default=True,
+              help="The bit-length of the scalar, for the expected costs of the scalar multiplier.")
+@click.option("--normalize-tables", is_flag=True, default=False,
+              help="Whether the tables of the scalar multiplier are normalized, for its expected costs.")
 @click.argument("model",
                 type=click.Choice(["shortw", "montgom", "edwards", "twisted"]),
                 callback=get_model, required=False)
@@ -248,12 +610,17 @@ def build_impl(ctx, platform, hash, rand, mul, sqr, red, inv, keygen, ecdh, ecds
 @click.argument("formulas", required=False, nargs=-1,
                 callback=get_formula)
 @public
-def list_impl(model: Optional[CurveModel], coords: Optional[CoordinateModel],
-              formulas: Optional[Tuple[Formula]]):
+def list_impl(costs: bool, scalarmult: Optional[str], bits: int, normalize_tables: bool,
+              model: Optional[CurveModel], coords: Optional[CoordinateModel], formulas: Optional[Tuple[Formula]]):
     """This command lists possible choices for an ECC implementation.
     If no arguments are provided the argument lists other implementation options,
     such as modular reduction algorithms, build platforms and so on.
 
+    With --costs, the field operation counts of the rendered formulas are listed
+    and the formulas are ranked by their cost. With --scalarmult, the expected
+    counts of a scalar multiplication using the given formulas are listed (with a mixed
+    addition among them, it is used where the implementation uses it).
+
     \b
     MODEL: The curve model to list.
     COORDS: The coordinate model to list.
@@ -263,8 +630,18 @@ def list_impl(model: Optional[CurveModel], coords: Optional[CoordinateModel],
         for formula in formulas:
             click.echo(formula)
             click.echo("\t{}".format(formula.meta))
+            if costs:
+                click.echo("\t{}".format(format_costs(formula)))
             for op in formula.code:
                 click.echo("\t{}".format(op))
+        if scalarmult is not None:
+            try:
+                mult = parse_multiplier(scalarmult, list(formulas))
+                madd = next((formula for formula in formulas if is_mixed_addition(formula)), None)
+                counts = scalarmult_costs(mult, bits, madd=madd, normalize_tables=normalize_tables)
+            except ValueError as e:
+                raise click.BadParameter(str(e), param_hint="--scalarmult")
+            click.echo("{} ({} bits): {} = {:.0f}M".format(scalarmult, bits, counts, counts.cost()))
         return
     if not formulas and coords:
         click.echo(coords)
@@ -274,8 +651,20 @@ def list_impl(model: Optional[CurveModel], coords: Optional[CoordinateModel],
             category.append(val)
         for cls, category in types.items():
             click.echo(cls.__name__)
+            if costs:
+                ranked = []
+                for form in category:
+                    try:
+                        cost = formula_costs(form).cost()
+                    except ValueError:
+                        cost = float("inf")
+                    ranked.append((cost, form.name, form))
+                category = [form for _, _, form in sorted(ranked)]
             for form in category:
-                click.echo("\t {}: {}".format(form.name, form.meta))
+                if costs:
+                    click.echo("\t {}: {}".format(form.name, format_costs(form)))
+                else:
+                    click.echo("\t {}: {}".format(form.name, form.meta))
         return
     if not coords and model:
         click.echo(model)
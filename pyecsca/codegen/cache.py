@@ -0,0 +1,364 @@
+"""Content-addressed on-disk cache of built implementations."""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from functools import lru_cache
+from importlib.metadata import version
+from os import path
+from typing import Optional, Tuple, Mapping, MutableMapping, Any
+
+from importlib_resources import files
+from public import public
+
+from pyecsca.codegen.common import Platform, DeviceConfiguration
+
+DEFAULT_MAX_SIZE = 1 << 30
+"""Default maximum size of the cache, in bytes (1 GiB)."""
+
+COMPILERS = {
+    Platform.HOST: "gcc",
+    Platform.XMEGA: "avr-gcc",
+    Platform.STM32F0: "arm-none-eabi-gcc",
+    Platform.STM32F3: "arm-none-eabi-gcc",
+    Platform.NANO: "arm-none-eabi-gcc",
+}
+"""Compilers used by the HALs of the different platforms."""
+
+ENV_FLAGS = ("CFLAGS", "LDFLAGS", "CPPFLAGS", "ASFLAGS")
+"""Environment variables that influence the build (make picks them up)."""
+
+
+def default_cache_dir() -> str:
+    """
+    Get the default cache directory.
+
+    Uses ``$PYECSCA_CODEGEN_CACHE`` if set, otherwise ``$XDG_CACHE_HOME/pyecsca-codegen``
+    (with ``~/.cache`` as the default for ``$XDG_CACHE_HOME``).
+
+    :return: The path to the default cache directory.
+    """
+    if env_dir := os.environ.get("PYECSCA_CODEGEN_CACHE"):
+        return env_dir
+    cache_home = os.environ.get("XDG_CACHE_HOME", path.join(path.expanduser("~"), ".cache"))
+    return path.join(cache_home, "pyecsca-codegen")
+
+
+def config_descriptor(config: DeviceConfiguration) -> Mapping[str, Any]:
+    """
+    Describe a configuration by a JSON-serializable mapping that is stable across runs.
+
+    :param config: The configuration to describe.
+    :return: The mapping describing the configuration.
+    """
+    return {
+        "model": config.model.shortname,
+        "coords": config.coords.name,
+        "formulas": sorted(str(formula) for formula in config.formulas),
+        "scalarmult": repr(config.scalarmult),
+        "hash_type": str(config.hash_type),
+        "mod_rand": str(config.mod_rand),
+        "mult": str(config.mult),
+        "sqr": str(config.sqr),
+        "red": str(config.red),
+        "inv": str(config.inv),
+        "platform": str(config.platform),
+        "keygen": config.keygen,
+        "ecdh": config.ecdh,
+        "ecdsa": config.ecdsa,
+        "defines": {str(k): str(v) for k, v in sorted((config.defines or {}).items())},
+        "profile": str(config.profile),
+        "curve": config.curve,
+        "lazy_reduction": config.lazy_reduction,
+        "scheduling": config.scheduling,
+        "normalize_tables": config.normalize_tables,
+        "point_pool": config.point_pool,
+        "field": str(config.field),
+        "special_prime": config.special_prime,
+        "safegcd": config.safegcd,
+    }
+
+
+def config_id(config: DeviceConfiguration) -> str:
+    """
+    Compute a short, stable identifier of a `config` (independent of the sources and toolchain).
+
+    :param config: The configuration.
+    :return: The identifier, a truncated hex digest.
+    """
+    return hashlib.sha256(json.dumps(config_descriptor(config), sort_keys=True).encode()).hexdigest()[:16]
+
+
+def tree_digest(root: str) -> str:
+    """
+    Compute a digest of the files in a directory tree (its paths and contents), skipping caches and build outputs.
+
+    :param root: The root of the tree.
+    :return: The hex digest.
+    """
+    h = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+        dirnames[:] = sorted(d for d in dirnames if d not in ("__pycache__", "objdir", ".dep"))
+        for fname in sorted(filenames):
+            if fname.endswith((".pyc", ".o")):
+                continue
+            full = path.join(dirpath, fname)
+            h.update(path.relpath(full, root).encode())
+            with open(full, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def source_digest() -> str:
+    """
+    Compute a digest of the package sources (templates, runtime C sources, HALs, renderer
+    and the prebuilt libtommath) that the rendered and built implementation depends on.
+
+    Rendering is a deterministic function of the configuration, the templates and the
+    formulas, models and curves of pyecsca (see :py:func:`dependency_digest`), so the two digests
+    (together with the configuration) cover the rendered sources.
+
+    :return: The hex digest.
+    """
+    return tree_digest(str(files("pyecsca.codegen")))
+
+
+@lru_cache(maxsize=None)
+def dependency_digest() -> str:
+    """
+    Compute a digest of the installed pyecsca (its version and the sources and data of ``pyecsca.ec``,
+    the formulas, coordinate models and curve parameters) that the rendered implementation depends on.
+
+    :return: The hex digest.
+    """
+    h = hashlib.sha256()
+    h.update(version("pyecsca").encode())
+    h.update(tree_digest(str(files("pyecsca.ec"))).encode())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def toolchain_version(platform: Platform) -> str:
+    """
+    Get the version string of the toolchain used to build for `platform`.
+
+    :param platform: The platform.
+    :return: The output of ``cc --version`` or ``"unknown"`` if the compiler is not available.
+    """
+    try:
+        res = subprocess.run([COMPILERS[platform], "--version"], capture_output=True, text=True)
+    except OSError:
+        return "unknown"
+    return res.stdout.strip()
+
+
+def build_environment() -> Mapping[str, str]:
+    """
+    Get the environment variables that influence the build.
+
+    :return: The mapping of the set variables.
+    """
+    return {var: os.environ[var] for var in ENV_FLAGS if var in os.environ}
+
+
+@public
+class BuildCache:
+    """
+    A content-addressed, size-bounded on-disk cache of built implementations.
+
+    Entries are keyed by a stable hash of the configuration, the package sources
+    (templates and runtime), the installed pyecsca, the toolchain version and the build environment. Each entry
+    is a directory holding the elf and hex files. The cache also holds prebuilt runtime
+    libraries, shared by all configurations with the same runtime key. When the total size
+    of the cache exceeds `max_size` the least recently used entries are evicted.
+    """
+    directory: str
+    """The cache directory."""
+    max_size: int
+    """The maximum size of the cache, in bytes."""
+
+    def __init__(self, directory: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_size = max_size
+
+    @property
+    def artifact_dir(self) -> str:
+        return path.join(self.directory, "artifacts")
+
+    @property
+    def runtime_dir(self) -> str:
+        return path.join(self.directory, "runtime")
+
+    def key(self, config: DeviceConfiguration, strip: bool = False) -> str:
+        """
+        Compute the cache key of a `config`.
+
+        :param config: The configuration.
+        :param strip: Whether the binary is stripped.
+        :return: The key, a hex digest.
+        """
+        description = {
+            "config": config_descriptor(config),
+            "strip": strip,
+            "sources": source_digest(),
+            "dependencies": dependency_digest(),
+            "toolchain": toolchain_version(config.platform),
+            "environment": build_environment(),
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def runtime_key(self, config: DeviceConfiguration) -> str:
+        """
+        Compute the cache key of the runtime library of a `config`.
+
+        The runtime (bn, asn1, hash, prng, simpleserial and the HAL) only depends on the platform,
+        the hash, random sampling, reduction (and special prime), multiplication, squaring and inversion (and safegcd) choices, the custom
+        defines and the build profile, so configurations that share these also share the runtime library.
+
+        :param config: The configuration.
+        :return: The key, a hex digest.
+        """
+        description = {
+            "platform": str(config.platform),
+            "hash_type": str(config.hash_type),
+            "mod_rand": str(config.mod_rand),
+            "mult": str(config.mult),
+            "sqr": str(config.sqr),
+            "red": str(config.red),
+            "special_prime": config.special_prime,
+            "inv": str(config.inv),
+            "safegcd": config.safegcd,
+            "defines": {str(k): str(v) for k, v in sorted((config.defines or {}).items())},
+            "profile": str(config.profile),
+            "sources": source_digest(),
+            "dependencies": dependency_digest(),
+            "toolchain": toolchain_version(config.platform),
+            "environment": build_environment(),
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def entry(self, key: str) -> str:
+        """
+        Get the path of the entry with a given `key`.
+
+        :param key: The key.
+        :return: The path of the entry directory (may not exist).
+        """
+        return path.join(self.artifact_dir, key)
+
+    def get(self, key: str, outdir: str) -> Optional[Tuple[str, str]]:
+        """
+        Copy the artifacts stored under `key` into `outdir`.
+
+        :param key: The key.
+        :param outdir: The output directory to copy the elf and hex files into.
+        :return: The elf-file name and the hex-file name, or None on a cache miss.
+        """
+        entry = self.entry(key)
+        meta_path = path.join(entry, "meta.json")
+        if not path.isfile(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        elf_file, hex_file = meta["elf"], meta["hex"]
+        os.makedirs(outdir, exist_ok=True)
+        shutil.copy(path.join(entry, elf_file), outdir)
+        shutil.copy(path.join(entry, hex_file), outdir)
+        # Touch the entry to mark it as recently used.
+        os.utime(meta_path)
+        return elf_file, hex_file
+
+    def put(self, key: str, elf_path: str, hex_path: str) -> None:
+        """
+        Store the built artifacts under `key` and evict old entries if needed.
+
+        :param key: The key.
+        :param elf_path: Path to the built elf-file.
+        :param hex_path: Path to the built hex-file.
+        """
+        self._store(self.artifact_dir, key, {"elf": elf_path, "hex": hex_path})
+        self.evict()
+
+    def get_runtime(self, key: str) -> Optional[str]:
+        """
+        Get the runtime library stored under `key`.
+
+        :param key: The runtime key (see :py:meth:`runtime_key`).
+        :return: The path to the stored library, or None on a cache miss.
+        """
+        entry = path.join(self.runtime_dir, key)
+        meta_path = path.join(entry, "meta.json")
+        if not path.isfile(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        os.utime(meta_path)
+        return path.join(entry, meta["lib"])
+
+    def put_runtime(self, key: str, lib_path: str) -> str:
+        """
+        Store the runtime library under `key` and evict old entries if needed.
+
+        :param key: The runtime key (see :py:meth:`runtime_key`).
+        :param lib_path: Path to the built library.
+        :return: The path to the stored library.
+        """
+        self._store(self.runtime_dir, key, {"lib": lib_path})
+        self.evict()
+        return path.join(self.runtime_dir, key, path.basename(lib_path))
+
+    def _store(self, directory: str, key: str, artifacts: Mapping[str, str]) -> None:
+        os.makedirs(directory, exist_ok=True)
+        temp = tempfile.mkdtemp(dir=directory, prefix=".tmp-")
+        meta: MutableMapping[str, Any] = {"created": time.time()}
+        for name, artifact_path in artifacts.items():
+            shutil.copy(artifact_path, temp)
+            meta[name] = path.basename(artifact_path)
+        with open(path.join(temp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        try:
+            os.rename(temp, path.join(directory, key))
+        except OSError:
+            # Someone else stored the same entry concurrently, keep theirs.
+            shutil.rmtree(temp, ignore_errors=True)
+
+    def size(self) -> int:
+        """
+        Compute the total size of the stored entries.
+
+        :return: The size, in bytes.
+        """
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        entries = []
+        for directory in (self.artifact_dir, self.runtime_dir):
+            if not path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                entry = path.join(directory, name)
+                meta_path = path.join(entry, "meta.json")
+                if name.startswith(".") or not path.isfile(meta_path):
+                    continue
+                size = sum(path.getsize(path.join(entry, fname)) for fname in os.listdir(entry))
+                entries.append((path.getmtime(meta_path), entry, size))
+        return entries
+
+    def evict(self) -> None:
+        """Evict the least recently used entries until the cache fits into `max_size`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        shutil.rmtree(self.artifact_dir, ignore_errors=True)
+        shutil.rmtree(self.runtime_dir, ignore_errors=True)
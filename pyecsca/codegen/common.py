@@ -36,6 +36,21 @@ class Platform(EnumDefine):
     NANO = "CWNANO"
 
 
+@public
+class Profile(EnumDefine):
+    """Build profile, i.e. what to optimize the build for."""
+    SIZE = "SIZE"
+    SPEED = "SPEED"
+    DEBUG = "DEBUG"
+
+
+@public
+class Field(EnumDefine):
+    """Representation of the field elements in the formulas."""
+    BN = "BN"
+    FIXED = "FIXED"
+
+
 @public
 @dataclass(frozen=True)
 class DeviceConfiguration(Configuration):
@@ -51,6 +66,26 @@ class DeviceConfiguration(Configuration):
     """Whether the ECDSA command is present."""
     defines: Optional[MutableMapping[str, Any]] = None
     """Optional defines passed to the compilation."""
+    profile: Profile = Profile.SIZE
+    """The build profile."""
+    curve: Optional[str] = None
+    """The named curve (``category/name``) baked into the implementation, if any."""
+    lazy_reduction: bool = False
+    """Whether the formulas keep the results of additions and subtractions unreduced where possible."""
+    scheduling: bool = False
+    """Whether the operations of the formulas are reordered to reduce the peak number of live temporaries."""
+    normalize_tables: bool = False
+    """Whether the precomputed tables of the scalar multipliers are normalized (to Z = 1) in a batch."""
+    point_pool: bool = False
+    """Whether the points of the scalar multiplication are allocated from a preallocated pool (reset after each)."""
+    field: Field = Field.BN
+    """The representation of the field elements in the formulas, the fixed-width one needs a baked curve and the Montgomery reduction."""
+    special_prime: bool = False
+    """Whether the reduction uses the special form (2^k - c, with a sparse c) of the moduli that have one,
+    falling back to the (non-Montgomery) ``red`` for the others."""
+    safegcd: bool = False
+    """Whether the GCD inversion (``inv``) is the constant-time Bernstein-Yang safegcd instead of the
+    (variable-time) binary extended GCD of libtommath."""
 
 
 MULTIPLIERS = [
@@ -71,6 +106,14 @@ MULTIPLIERS = [
 ]
 
 
+MODELS = {
+    "shortw": ShortWeierstrassModel,
+    "montgom": MontgomeryModel,
+    "edwards": EdwardsModel,
+    "twisted": TwistedEdwardsModel
+}
+
+
 def wrap_enum(enum_class: Type[EnumDefine]):
     def callback(ctx, param, value):
         try:
@@ -87,13 +130,7 @@ def get_model(ctx: click.Context, param, value: str) -> CurveModel:
     """A click callback func for model setup."""
     if value is None:
         return None
-    classes = {
-        "shortw": ShortWeierstrassModel,
-        "montgom": MontgomeryModel,
-        "edwards": EdwardsModel,
-        "twisted": TwistedEdwardsModel
-    }
-    model = classes[value]()
+    model = MODELS[value]()
     ctx.ensure_object(dict)
     ctx.obj["model"] = model
     return model
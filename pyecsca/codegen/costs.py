@@ -0,0 +1,328 @@
+"""Static operation counts and costs of the rendered formulas and scalar multipliers."""
+from dataclasses import dataclass, fields
+from math import ceil, log2
+from typing import Mapping, Optional, Iterable, MutableMapping
+
+from public import public
+from pyecsca.ec.coordinates import CoordinateModel
+from pyecsca.ec.formula import Formula
+from pyecsca.ec.mult import (
+    ScalarMultiplier,
+    LTRMultiplier,
+    RTLMultiplier,
+    CoronMultiplier,
+    LadderMultiplier,
+    SimpleLadderMultiplier,
+    DifferentialLadderMultiplier,
+    BinaryNAFMultiplier,
+    WindowNAFMultiplier,
+    WindowBoothMultiplier,
+    SlidingWindowMultiplier,
+    FixedWindowLTRMultiplier,
+    FullPrecompMultiplier,
+    BGMWMultiplier,
+    CombMultiplier,
+    ProcessingDirection,
+    AccumulationOrder,
+)
+from pyecsca.ec.op import OpType, CodeOp
+from pyecsca.ec.params import DomainParameters
+
+from pyecsca.codegen.render import optimize_formula, get_normalization_formula
+
+DEFAULT_WEIGHTS = {
+    "mult": 1.0,
+    "sqr": 0.8,
+    "add": 0.1,
+    "sub": 0.1,
+    "neg": 0.1,
+    "inv": 100.0,
+    "pow": 10.0,
+}
+"""Default relative costs of the field operations, in field multiplications."""
+
+
+@public
+@dataclass
+class OpCounts:
+    """Counts of the field operations (possibly expected counts, hence floats)."""
+    mult: float = 0
+    """Multiplications (M)."""
+    sqr: float = 0
+    """Squarings (S)."""
+    add: float = 0
+    """Additions."""
+    sub: float = 0
+    """Subtractions."""
+    neg: float = 0
+    """Negations."""
+    inv: float = 0
+    """Inversions (and divisions)."""
+    pow: float = 0
+    """Exponentiations (by other exponents than 2)."""
+
+    def __add__(self, other: "OpCounts") -> "OpCounts":
+        if not isinstance(other, OpCounts):
+            return NotImplemented
+        return OpCounts(**{f.name: getattr(self, f.name) + getattr(other, f.name) for f in fields(self)})
+
+    def __mul__(self, factor: float) -> "OpCounts":
+        return OpCounts(**{f.name: getattr(self, f.name) * factor for f in fields(self)})
+
+    __rmul__ = __mul__
+
+    def cost(self, weights: Optional[Mapping[str, float]] = None) -> float:
+        """
+        Compute the weighted cost of the operations.
+
+        :param weights: The relative costs of the operations, in field multiplications
+                        (see :py:data:`DEFAULT_WEIGHTS`, which is used for the missing ones).
+        :return: The cost, in field multiplications.
+        """
+        w = dict(DEFAULT_WEIGHTS)
+        if weights:
+            w.update(weights)
+        return sum(getattr(self, f.name) * w[f.name] for f in fields(self))
+
+    def __str__(self):
+        def fmt(value):
+            return "{:g}".format(round(value, 1))
+
+        parts = ["{}M".format(fmt(self.mult)), "{}S".format(fmt(self.sqr))]
+        for name in ("add", "sub", "neg", "inv", "pow"):
+            value = getattr(self, name)
+            if value:
+                parts.append("{}{}".format(fmt(value), name))
+        return " + ".join(parts)
+
+
+@public
+def count_ops(ops: Iterable[CodeOp]) -> OpCounts:
+    """
+    Count the field operations in a list of operations.
+
+    A division is counted as an inversion and a multiplication, copies are not counted.
+
+    :param ops: The operations.
+    :return: The counts.
+    """
+    counts = OpCounts()
+    for op in ops:
+        if op.operator == OpType.Mult:
+            counts.mult += 1
+        elif op.operator == OpType.Sqr or (op.operator == OpType.Pow and op.right == 2):
+            counts.sqr += 1
+        elif op.operator == OpType.Pow:
+            counts.pow += 1
+        elif op.operator == OpType.Add:
+            counts.add += 1
+        elif op.operator == OpType.Sub:
+            counts.sub += 1
+        elif op.operator == OpType.Neg:
+            counts.neg += 1
+        elif op.operator == OpType.Inv:
+            counts.inv += 1
+        elif op.operator == OpType.Div:
+            counts.inv += 1
+            counts.mult += 1
+    return counts
+
+
+@public
+def formula_costs(formula: Formula, params: Optional[DomainParameters] = None) -> OpCounts:
+    """
+    Count the field operations of one call of the rendered `formula`.
+
+    The counts are taken from the optimized operations (see :py:func:`pyecsca.codegen.render.optimize_formula`),
+    the operations that are computed once per curve are not counted.
+
+    :param formula: The formula.
+    :param params: The domain parameters the formula is specialized to, if any.
+    :return: The counts.
+    """
+    ops, invariants, _ = optimize_formula(formula, params)
+    return count_ops(ops[invariants:])
+
+
+@public
+def multiplier_calls(
+    scalarmult: ScalarMultiplier, bits: int, madd: bool = False, normalize_tables: bool = False
+) -> Mapping[str, float]:
+    """
+    Compute the expected number of formula calls of one scalar multiplication, as rendered
+    by the ``mult_*.c`` templates (including the precomputation).
+
+    The scalar is assumed to be uniformly random with `bits` bits, which is also taken to be
+    the bit-length of the order of the curve. With a mixed addition, the additions of the input
+    point (and of the normalized tables) are counted as ``madd`` calls, as in the templates.
+
+    :param scalarmult: The scalar multiplier.
+    :param bits: The bit-length of the scalar.
+    :param madd: Whether a mixed addition accompanies the general addition of the multiplier.
+    :param normalize_tables: Whether the precomputed tables are normalized (``point_normalize_batch``).
+    :return: A mapping of formula shortnames (``add``, ``madd``, ``dbl``, ``ladd``, ...) to the expected number
+             of calls, with the normalized tables, ``normalize`` is the number of points of the batch normalization.
+    """
+    calls: MutableMapping[str, float] = {}
+
+    def call(name: str, count: float):
+        calls[name] = calls.get(name, 0) + count
+
+    def normalize(count: float):
+        if normalize_tables:
+            call("normalize", count)
+
+    # The formulas of the add_point, accumulate_point and accumulate_table calls of the templates (see mult.c).
+    mixed = madd and getattr(scalarmult, "accumulation_order", None) == AccumulationOrder.PeqPR
+    add_point = "madd" if madd else "add"
+    accumulate_point = "madd" if mixed else "add"
+    accumulate_table = "madd" if mixed and normalize_tables else "add"
+
+    if isinstance(scalarmult, LTRMultiplier):
+        iters = bits if scalarmult.complete else bits - 1
+        call("dbl", iters)
+        call(accumulate_point, iters if scalarmult.always else iters / 2)
+    elif isinstance(scalarmult, RTLMultiplier):
+        call("dbl", bits)
+        call("add", bits if scalarmult.always else bits / 2)
+    elif isinstance(scalarmult, CoronMultiplier):
+        call("dbl", bits - 1)
+        call(add_point, bits - 1)
+    elif isinstance(scalarmult, LadderMultiplier):
+        if scalarmult.complete:
+            call("ladd", bits)
+        else:
+            call("dbl", 1)
+            call("ladd", bits - 1)
+    elif isinstance(scalarmult, SimpleLadderMultiplier):
+        call("add", bits)
+        call("dbl", bits)
+    elif isinstance(scalarmult, DifferentialLadderMultiplier):
+        call("dadd", bits)
+        call("dbl", bits)
+    elif isinstance(scalarmult, BinaryNAFMultiplier):
+        # A NAF has one digit more than the scalar, a third of the digits is non-zero.
+        digits = bits + 1
+        nonzero = digits / 3
+        call("neg", 1)
+        if scalarmult.direction == ProcessingDirection.LTR:
+            # The leading digit only initializes the accumulator.
+            call("dbl", digits - 1)
+            call(accumulate_point, 2 * nonzero if scalarmult.always else nonzero)
+        else:
+            call("dbl", digits)
+            call("neg", nonzero if scalarmult.always else nonzero / 2)
+            call("add", 2 * nonzero if scalarmult.always else nonzero)
+    elif isinstance(scalarmult, WindowNAFMultiplier):
+        table = 2 ** (scalarmult.width - 2)
+        digits = bits + 1
+        nonzero = digits / (scalarmult.width + 1)
+        call("dbl", 1 + digits)
+        call("add", table - 1)
+        normalize(table)
+        call(accumulate_table, nonzero)
+        call("neg", table if scalarmult.precompute_negation else nonzero / 2)
+    elif isinstance(scalarmult, WindowBoothMultiplier):
+        table = 2 ** (scalarmult.width - 1)
+        digits = bits // scalarmult.width + 1
+        nonzero = digits * (1 - 2 ** -scalarmult.width)
+        call("dbl", 1 + digits * scalarmult.width)
+        call(add_point, max(table - 2, 0))
+        normalize(table)
+        call(accumulate_table, nonzero)
+        call("neg", table if scalarmult.precompute_negation else nonzero / 2)
+    elif isinstance(scalarmult, SlidingWindowMultiplier):
+        table = 2 ** (scalarmult.width - 1)
+        call("dbl", 1 + bits)
+        call("add", table - 1)
+        normalize(table)
+        call(accumulate_table, bits / (scalarmult.width + 1))
+    elif isinstance(scalarmult, FixedWindowLTRMultiplier):
+        m = scalarmult.m
+        digits = ceil(bits / log2(m))
+        call("dbl", 1)
+        call(add_point, max(m - 3, 0))
+        normalize(m - 1)
+        call(accumulate_table, digits * (m - 1) / m)
+        if bin(m).count("1") == 1:
+            call("dbl", digits * (m.bit_length() - 1))
+        else:
+            call("dbl", digits)
+            call("add", digits * (m - 2))
+    elif isinstance(scalarmult, FullPrecompMultiplier):
+        call("dbl", bits)
+        normalize(bits + 1)
+        call(accumulate_table, bits if scalarmult.always else bits / 2)
+    elif isinstance(scalarmult, BGMWMultiplier):
+        d = ceil(bits / scalarmult.width)
+        call("dbl", (d - 1) * scalarmult.width)
+        normalize(d)
+        call(accumulate_table, d * (1 - 2 ** -scalarmult.width))
+        call("add", 2 ** scalarmult.width)
+    elif isinstance(scalarmult, CombMultiplier):
+        w = scalarmult.width
+        d = ceil(bits / w)
+        call("dbl", (w - 1) * d + d)
+        call("add", w * 2 ** (w - 1) - 2 ** w + 1)
+        normalize(2 ** w - 1)
+        call(accumulate_table, d * (1 - 2 ** -w))
+        if scalarmult.always:
+            # The dummy additions of the zero words, every 2^w-th one adds the input point.
+            call(accumulate_table, d * 2 ** -w * (1 - 2 ** -w))
+            call(accumulate_point, d * 2 ** -w * 2 ** -w)
+    else:
+        raise ValueError("Unknown multiplier: {}.".format(scalarmult.__class__.__name__))
+    if "scl" in scalarmult.formulas:
+        call("scl", 1)
+    return calls
+
+
+@public
+def normalization_costs(coords: CoordinateModel, points: float) -> OpCounts:
+    """
+    Compute the field operation counts of the batch normalization of `points` points (``point_normalize_batch``).
+
+    It does one inversion (Montgomery's simultaneous inversion, three multiplications per point)
+    and the scaling formula without its inversion for each point.
+
+    :param coords: The coordinate model.
+    :param points: The number of points.
+    :return: The counts, zero if the coordinate model has no scaling formula to normalize with.
+    """
+    formula = get_normalization_formula(coords)
+    if formula is None or points == 0:
+        return OpCounts()
+    return OpCounts(mult=3 * points - 1, inv=1) + count_ops(formula.code[1:]) * points
+
+
+@public
+def scalarmult_costs(
+    scalarmult: ScalarMultiplier,
+    bits: int,
+    params: Optional[DomainParameters] = None,
+    madd: Optional[Formula] = None,
+    normalize_tables: bool = False,
+) -> OpCounts:
+    """
+    Compute the expected field operation counts of one scalar multiplication.
+
+    :param scalarmult: The scalar multiplier.
+    :param bits: The bit-length of the scalar (see :py:func:`multiplier_calls`).
+    :param params: The domain parameters the formulas are specialized to, if any.
+    :param madd: The mixed addition that accompanies the general addition of the multiplier, if any.
+    :param normalize_tables: Whether the precomputed tables are normalized.
+    :return: The expected counts.
+    :raises ValueError: If the multiplier lacks a formula it calls.
+    """
+    counts = OpCounts()
+    for name, calls in multiplier_calls(scalarmult, bits, madd is not None, normalize_tables).items():
+        if name == "madd":
+            counts += formula_costs(madd, params) * calls
+        elif name == "normalize":
+            coords = next(iter(scalarmult.formulas.values())).coordinate_model
+            counts += normalization_costs(coords, calls)
+        elif name not in scalarmult.formulas:
+            raise ValueError("Multiplier {} calls a missing '{}' formula.".format(scalarmult.__class__.__name__, name))
+        else:
+            counts += formula_costs(scalarmult.formulas[name], params) * calls
+    return counts
@@ -0,0 +1,30 @@
+"""ChipWhisperer-based device target."""
+import chipwhisperer as cw
+from chipwhisperer.capture.api.programmers import STM32FProgrammer, XMEGAProgrammer
+from chipwhisperer.capture.targets import SimpleSerial
+from public import public
+
+from pyecsca.ec.coordinates import CoordinateModel
+from pyecsca.ec.model import CurveModel
+from pyecsca.sca.target.chipwhisperer import ChipWhispererTarget
+from pyecsca.codegen.client import ImplTarget
+from pyecsca.codegen.common import Platform
+
+
+@public
+class DeviceTarget(ImplTarget, ChipWhispererTarget):  # pragma: no cover
+    """
+    A ChipWhisperer-based device target.
+    """
+
+    def __init__(self, model: CurveModel, coords: CoordinateModel, platform: Platform, **kwargs):
+        scope = cw.scope()
+        scope.default_setup()
+        target = SimpleSerial()
+        if platform in (Platform.STM32F0, Platform.STM32F3):
+            programmer = STM32FProgrammer
+        elif platform == Platform.XMEGA:
+            programmer = XMEGAProgrammer
+        else:
+            raise ValueError
+        super().__init__(model, coords, target=target, scope=scope, programmer=programmer, **kwargs)
@@ -0,0 +1,213 @@
+"""Emulator-based target, using the rainbow emulator."""
+import bisect
+from binascii import unhexlify
+from typing import Optional, Tuple
+
+import numpy as np
+from public import public
+from rainbow.devices import rainbow_stm32f215
+from rainbow import TraceConfig, Print
+
+from pyecsca.ec.coordinates import CoordinateModel, AffineCoordinateModel
+from pyecsca.ec.mod import mod
+from pyecsca.ec.model import CurveModel
+from pyecsca.ec.params import DomainParameters
+from pyecsca.ec.point import Point
+from pyecsca.sca.target import Target
+from pyecsca.sca.trace import Trace
+from pyecsca.codegen.client import (cmd_set_params, cmd_scalar_mult, cmd_init_prng, cmd_generate,
+                                    cmd_set_privkey, cmd_set_pubkey, cmd_ecdh, cmd_ecdsa_sign,
+                                    cmd_ecdsa_verify)
+
+
+@public
+class EmulatorTarget(Target):
+    """
+    An emulator-based target, using the rainbow emulator.
+
+    This target will load the binary in an emulator and run the commands
+    by calling the corresponding functions in the binary. It will also
+    hook the ``simpleserial_put`` function to get the output data from
+    the implementation.
+
+    Note that this target does not support triggers, as the rainbow
+    emulator does not support GPIOs.
+    """
+    emulator: rainbow_stm32f215
+    """The rainbow emulator instance."""
+    result: list
+    """The result of the last command."""
+    model: CurveModel
+    """The curve model."""
+    coords: CoordinateModel
+    """The coordinate model."""
+    seed: Optional[bytes]
+    """The PRNG seed, if any."""
+    params: Optional[DomainParameters]
+    """The domain parameters, if any."""
+    privkey: Optional[int]
+    """The private key, if any."""
+    pubkey: Optional[Point]
+    """The public key, if any."""
+    trace: list
+    """The trace collected during the emulation."""
+
+
+    def __init__(self, model: CurveModel, coords: CoordinateModel, print_config: Print = Print(0),
+                 trace_config: TraceConfig = TraceConfig(), allow_breakpoints: bool = False):
+        super().__init__()
+        self.emulator = rainbow_stm32f215(print_config=print_config, trace_config=trace_config,
+                                          allow_stubs=True, allow_breakpoints=allow_breakpoints)
+        self.result = []
+        self.trace = []
+        self.model = model
+        self.coords = coords
+        self.seed = None
+        self.params = None
+        self.privkey = None
+        self.pubkey = None
+        self._funcs = []
+        self._addrs = []
+
+    def __emulate(self, command: str, function: str) -> None:
+        data = unhexlify(command[1:])
+        length = len(data)
+        data_adress = 0xDEAD0000
+        self.emulator[data_adress] = data
+        self.emulator['r0'] = data_adress
+        self.emulator['r1'] = length
+        self.emulator.start(self.emulator.functions[function] | 1, 0)
+        self.trace.extend(self.emulator.trace)
+        self.emulator.reset()
+
+    def connect(self, **kwargs) -> None:
+        self.emulator.load(kwargs["binary"])
+        self.emulator.setup()
+        self.emulator.start(self.emulator.functions['init_implementation'] | 1, 0)
+        self.emulator.reset()
+        # Compute the function map from the emulator.
+        addr_map = [(addr, name) for name, addr in self.emulator.functions.items()]
+        addr_map.sort()
+        self._addrs = [addr - 1 for addr, name in addr_map]
+        self._funcs = [name for addr, name in addr_map]
+
+    def set_params(self, params: DomainParameters) -> None:
+        command = cmd_set_params(params)
+        self.__emulate(command, 'cmd_set_params')
+        self.params = params
+
+    def __scalar_mult_hook(self, emulator) -> None:
+        point_length = emulator['r1'] // len(self.coords.variables)
+        res_adress = emulator['r2']
+        self.result.append({var: mod(int.from_bytes(emulator[res_adress + i * point_length:
+                                                             res_adress + (i + 1) * point_length], 'big'),
+                                     self.params.curve.prime)
+                            for i, var in enumerate(self.coords.variables)})
+
+    def scalar_mult(self, scalar: int, point: Point) -> Point:
+        self.result = []
+        self.emulator.hook_bypass("simpleserial_put", self.__scalar_mult_hook)
+        command = cmd_scalar_mult(scalar, point)
+        self.__emulate(command, 'cmd_scalar_mult')
+        return Point(self.coords, **self.result[0])
+
+    def init_prng(self, seed: bytes) -> None:
+        command = cmd_init_prng(seed)
+        self.__emulate(command, 'cmd_init_prng')
+        self.seed = seed
+
+    def __generate_hook(self, emulator) -> None:
+        key_length = emulator['r1']
+        key_bytes = emulator[emulator['r2']: emulator['r2'] + key_length]
+        self.result.append(key_length)
+        self.result.append(key_bytes)
+
+    def generate(self) -> Tuple[int, Point]:
+        self.result = []
+        self.emulator.hook_bypass("simpleserial_put", self.__generate_hook)
+        command = cmd_generate()
+        self.__emulate(command, 'cmd_generate')
+        priv = int.from_bytes(self.result[1], 'big')
+        pub_x = int.from_bytes(self.result[3][0:self.result[2] // 2], 'big')
+        pub_y = int.from_bytes(self.result[3][self.result[2] // 2:self.result[2]], 'big')
+        return priv, Point(AffineCoordinateModel(self.model), x=mod(pub_x, self.params.curve.prime),
+                           y=mod(pub_y, self.params.curve.prime))
+
+    def set_privkey(self, privkey: int) -> None:
+        command = cmd_set_privkey(privkey)
+        self.__emulate(command, 'cmd_set_privkey')
+        self.privkey = privkey
+
+    def set_pubkey(self, pubkey: Point) -> None:
+        command = cmd_set_pubkey(pubkey)
+        self.__emulate(command, 'cmd_set_pubkey')
+        self.pubkey = pubkey
+
+    def __ec_hook(self, simulator) -> None:
+        self.result.append(simulator[simulator['r2']:simulator['r2'] + simulator['r1']])
+
+    def ecdh(self, other_pubkey: Point) -> bytes:
+        self.result = []
+        self.emulator.hook_bypass("simpleserial_put", self.__ec_hook)
+        command = cmd_ecdh(other_pubkey)
+        self.__emulate(command, 'cmd_ecdh')
+        shared_secret = self.result[0]
+        return shared_secret
+
+    def ecdsa_sign(self, data: bytes) -> bytes:
+        self.result = []
+        self.emulator.hook_bypass("simpleserial_put", self.__ec_hook)
+        command = cmd_ecdsa_sign(data)
+        self.__emulate(command, 'cmd_ecdsa_sign')
+        signature = self.result[0]
+        return signature
+
+    def ecdsa_verify(self, data: bytes, signature: bytes) -> bool:
+        self.result = []
+        self.emulator.hook_bypass("simpleserial_put", self.__ec_hook)
+        command = cmd_ecdsa_verify(data, signature)
+        self.__emulate(command, 'cmd_ecdsa_verify')
+        return bool(int.from_bytes(self.result[0], 'big'))
+
+    def transform_trace(self, filter_malloc: bool = True, save_instructions: bool = False) -> Trace:
+        """Transform the collected trace into a :py:class:`pyecsca.sca.trace.Trace` object."""
+        samples = []
+        instructions = []
+        inside_malloc = False
+        # Get the trace but filter out known non-CT malloc functions.
+        for event in self.trace:
+            sample = event.get("register", 0)
+            instruction = event.get("instruction", None)
+            if instruction is None or not filter_malloc:
+                samples.append(sample)
+                continue
+            addr = int(instruction.split(" ")[1], 16)
+            func = self._funcs[bisect.bisect(self._addrs, addr) - 1]
+            if func == "__malloc_lock":
+                inside_malloc = True
+            if func == "__malloc_unlock":
+                inside_malloc = False
+            if not inside_malloc and func not in ("free", "_free_r",
+                                                  "calloc", "_calloc_r",
+                                                  "realloc", "_realloc_r",
+                                                  "malloc", "_malloc_r",
+                                                  "__malloc_lock", "__malloc_unlock",
+                                                  "_sbrk_r", "_sbrk",
+                                                  "__udivmoddi4", "__aeabi_uldivmod"):
+                samples.append(sample)
+                if save_instructions:
+                    instructions.append(instruction)
+        return Trace(np.array(samples, dtype=np.int32), meta={"instructions": instructions})
+
+    def set_trigger(self):
+        pass
+
+    def debug(self) -> Tuple[str, str]:
+        return self.model.shortname, self.coords.name
+
+    def quit(self):
+        pass
+
+    def disconnect(self):
+        self.emulator.start(self.emulator.functions['deinit'] | 1, 0)
+        self.emulator.reset()
@@ -1,8 +1,12 @@
 #ifndef FORMULAS_H_
 #define FORMULAS_H_
 
+#include "defs.h"
+
 void formulas_init(void);
 
+void formulas_set_curve(const curve_t *curve);
+
 void formulas_zero(void);
 
 void formulas_clear(void);
@@ -0,0 +1,628 @@
+"""Optimization passes over the operations of formulas (lists of :py:class:`pyecsca.ec.op.CodeOp`)."""
+from collections import Counter
+from typing import List, Sequence, Mapping, Iterable, Union, Optional, MutableMapping, Tuple, Set, Collection
+
+from public import public
+from pyecsca.ec.op import OpType, CodeOp
+from pyecsca.misc.utils import pexec
+
+CONSTANT_BOUND = 1 << 16
+"""Bound on the constants that are propagated into the operations (they are loaded with ``bn_from_int``)."""
+
+MAX_CHAIN_ADDS = 4
+"""Maximum number of additions a multiplication by a small constant is strength-reduced into."""
+
+MAX_CHAIN_MULTS = 8
+"""Maximum number of multiplications and squarings a power by a small constant is strength-reduced into."""
+
+LAZY_BOUND = 16
+"""
+Bound on the values kept unreduced in the lazy reduction mode, as a multiple of the prime.
+This is also the bound on the product of the bounds of the operands of a multiplication,
+the reduction then needs ``log2(LAZY_BOUND)`` bits of headroom above the prime in its top digit.
+It is a power of two, ``LAZY_BOUND_BITS`` in the runtime (``bn.h``) is its logarithm.
+"""
+
+Operand = Union[str, int, None]
+
+_OP_FORMATS = {
+    OpType.Add: "{l} + {r}",
+    OpType.Sub: "{l} - {r}",
+    OpType.Neg: "-{r}",
+    OpType.Mult: "{l} * {r}",
+    OpType.Div: "{l} / {r}",
+    OpType.Inv: "1 / {r}",
+    OpType.Sqr: "{l}**2",
+    OpType.Pow: "{l}**{r}",
+    OpType.Id: "{l}",
+}
+
+
+@public
+def make_op(result: str, operator: OpType, left: Operand, right: Operand) -> CodeOp:
+    """
+    Construct an operation.
+
+    :param result: The name of the result variable.
+    :param operator: The operator.
+    :param left: The left operand, a variable name or a constant.
+    :param right: The right operand, a variable name or a constant.
+    :return: The operation.
+    """
+    code = _OP_FORMATS[operator].format(l=left, r=right)
+    return CodeOp(pexec("{} = {}".format(result, code)))
+
+
+def _evaluate(operator: OpType, left: Operand, right: Operand, prime: Optional[int]) -> Optional[int]:
+    if prime is None:
+        # Unknown field, only fold what is the same over the integers and over any (large) prime field.
+        if operator == OpType.Add:
+            return left + right
+        elif operator == OpType.Sub:
+            return left - right if left >= right else None
+        elif operator == OpType.Mult:
+            return left * right
+        elif operator == OpType.Sqr:
+            return left * left
+        elif operator == OpType.Pow:
+            return left ** right if right.bit_length() <= 8 else None
+        elif operator == OpType.Id:
+            return left
+        return None
+    try:
+        if operator == OpType.Add:
+            return (left + right) % prime
+        elif operator == OpType.Sub:
+            return (left - right) % prime
+        elif operator == OpType.Neg:
+            return (-right) % prime
+        elif operator == OpType.Mult:
+            return (left * right) % prime
+        elif operator == OpType.Div:
+            return (left * pow(right, -1, prime)) % prime
+        elif operator == OpType.Inv:
+            return pow(right, -1, prime)
+        elif operator == OpType.Sqr:
+            return (left * left) % prime
+        elif operator == OpType.Pow:
+            return pow(left, right, prime)
+        elif operator == OpType.Id:
+            return left % prime
+    except ValueError:
+        # Not invertible, leave it to the runtime.
+        return None
+    return None
+
+
+def _simplify(operator: OpType, left: Operand, right: Operand, prime: Optional[int]):
+    """
+    Simplify an operation with some operands possibly being known constants.
+
+    :return: A known constant (int), an alias of a variable (str) or an (operator, left, right) tuple.
+    """
+    operands = [left] if operator == OpType.Id else [right] if operator in (OpType.Neg, OpType.Inv) else [left, right]
+    if all(isinstance(operand, int) for operand in operands):
+        value = _evaluate(operator, left, right, prime)
+        if value is not None and value < CONSTANT_BOUND:
+            return value
+        return operator, left, right
+    if operator == OpType.Id:
+        return left
+    if operator == OpType.Add:
+        if left == 0:
+            return right
+        if right == 0:
+            return left
+    elif operator == OpType.Sub:
+        if left == right:
+            return 0
+        if right == 0:
+            return left
+        if left == 0:
+            return OpType.Neg, None, right
+    elif operator == OpType.Mult:
+        if left == 0 or right == 0:
+            return 0
+        if left == 1:
+            return right
+        if right == 1:
+            return left
+    elif operator == OpType.Div:
+        if left == 0:
+            return 0
+        if right == 1:
+            return left
+    elif operator in (OpType.Sqr, OpType.Pow):
+        if left in (0, 1):
+            return left
+        if operator == OpType.Pow and right == 1:
+            return left
+    return operator, left, right
+
+
+def _expression(operator: OpType, left: Operand, right: Operand) -> Tuple:
+    """Get a canonical form of an operation, equal for operations computing the same value."""
+    if operator == OpType.Sqr or (operator == OpType.Pow and right == 2):
+        return OpType.Mult, left, left
+    if operator in (OpType.Add, OpType.Mult):
+        left, right = sorted((left, right), key=repr)
+    return operator, left, right
+
+
+@public
+def optimize(
+    ops: Sequence[CodeOp],
+    outputs: Iterable[str],
+    values: Optional[Mapping[str, int]] = None,
+    prime: Optional[int] = None,
+) -> List[CodeOp]:
+    """
+    Optimize the operations.
+
+    Propagates the known small constants (and parameter values) through the operations,
+    folds operations on constants, simplifies operations with a neutral or absorbing
+    operand (e.g. ``0 * x`` or ``x + 0``), eliminates common subexpressions, propagates
+    the resulting copies (dropping the ``Id`` operations) and eliminates the operations
+    that do not contribute to the outputs.
+
+    :param ops: The operations.
+    :param outputs: The names of the outputs, these are always computed.
+    :param values: The known values of some parameters, if any.
+    :param prime: The prime of the field, if known. Without it, only the operations on constants
+                  that give the same result in any (large enough) prime field are folded.
+    :return: The optimized operations.
+    """
+    outputs = set(outputs)
+    known: MutableMapping[str, int] = {}
+    for name, value in (values or {}).items():
+        if prime is not None:
+            value %= prime
+        if 0 <= value < CONSTANT_BOUND:
+            known[name] = value
+    aliases: MutableMapping[str, str] = {}
+    # Available expressions, mapped to the variable that holds their value.
+    available: MutableMapping[Tuple, str] = {}
+
+    def resolve(operand: Operand) -> Operand:
+        if isinstance(operand, str):
+            operand = aliases.get(operand, operand)
+            return known.get(operand, operand)
+        return operand
+
+    result: List[CodeOp] = []
+    for op in ops:
+        simplified = _simplify(op.operator, resolve(op.left), resolve(op.right), prime)
+        expression = None
+        if isinstance(simplified, tuple):
+            expression = _expression(*simplified)
+            if expression in available:
+                simplified = available[expression]
+        if simplified == op.result:
+            # The result already holds the value.
+            continue
+        # The result gets overwritten, materialize the copies of its old value first.
+        for alias, target in list(aliases.items()):
+            if target == op.result:
+                result.append(make_op(alias, OpType.Id, target, None))
+                del aliases[alias]
+        # And forget the expressions that involve its old value.
+        for expr, holder in list(available.items()):
+            if holder == op.result or op.result in expr[1:]:
+                del available[expr]
+        known.pop(op.result, None)
+        aliases.pop(op.result, None)
+        if isinstance(simplified, tuple):
+            result.append(make_op(op.result, *simplified))
+            if op.result not in expression[1:]:
+                available[expression] = op.result
+        elif isinstance(simplified, int):
+            known[op.result] = simplified
+            if op.result in outputs:
+                result.append(make_op(op.result, OpType.Id, simplified, None))
+        elif op.result in outputs:
+            result.append(make_op(op.result, OpType.Id, simplified, None))
+        else:
+            aliases[op.result] = simplified
+    return eliminate_dead_code(result, outputs)
+
+
+@public
+def specialize(
+    ops: Sequence[CodeOp],
+    values: Mapping[str, int],
+    prime: int,
+    outputs: Iterable[str],
+) -> List[CodeOp]:
+    """
+    Specialize the operations to known values of some parameters (i.e. of a fixed curve).
+
+    This is :py:func:`optimize` with the parameter values and the prime known.
+
+    :param ops: The operations.
+    :param values: The known values of the parameters.
+    :param prime: The prime of the field.
+    :param outputs: The names of the outputs, these are always computed.
+    :return: The specialized operations.
+    """
+    return optimize(ops, outputs, values, prime)
+
+
+def _chain(constant: int) -> List[bool]:
+    """
+    Get the addition chain (double-and-add, from the top bit) for a constant, True for an addition of the base.
+
+    For a power, the doublings are squarings and the additions multiplications by the base.
+    """
+    steps = []
+    for bit in bin(constant)[3:]:
+        steps.append(False)
+        if bit == "1":
+            steps.append(True)
+    return steps
+
+
+@public
+def strength_reduce(
+    ops: Sequence[CodeOp],
+    max_adds: int = MAX_CHAIN_ADDS,
+    max_mults: int = MAX_CHAIN_MULTS,
+) -> List[CodeOp]:
+    """
+    Replace expensive operations by cheaper ones computing the same value.
+
+    Multiplications by small constants become chains of additions (doublings and additions
+    of the multiplicand), squarings written as a power or as a multiplication of a variable by
+    itself become squarings. Powers by small constants become addition chains of squarings and
+    multiplications by the base, so that they do not go through the (generic) exponentiation.
+
+    :param ops: The operations.
+    :param max_adds: The maximum number of additions a multiplication by a constant is replaced by.
+    :param max_mults: The maximum number of multiplications and squarings a power by a constant is replaced by.
+    :return: The rewritten operations.
+    """
+    used = set()
+    for op in ops:
+        used.add(op.result)
+        used.update(_operands(op))
+    counter = 0
+
+    def fresh() -> str:
+        nonlocal counter
+        while "sr{}".format(counter) in used:
+            counter += 1
+        name = "sr{}".format(counter)
+        used.add(name)
+        return name
+
+    result: List[CodeOp] = []
+    for op in ops:
+        if op.operator == OpType.Pow and op.right == 2:
+            result.append(make_op(op.result, OpType.Sqr, op.left, 2))
+        elif op.operator == OpType.Pow and isinstance(op.left, str) and isinstance(op.right, int) and op.right > 2:
+            steps = _chain(op.right)
+            if len(steps) > max_mults:
+                result.append(op)
+                continue
+            current = op.left
+            for i, mult in enumerate(steps):
+                target = op.result if i == len(steps) - 1 else fresh()
+                if mult:
+                    result.append(make_op(target, OpType.Mult, current, op.left))
+                else:
+                    result.append(make_op(target, OpType.Sqr, current, 2))
+                current = target
+        elif op.operator == OpType.Mult and isinstance(op.left, str) and op.left == op.right:
+            result.append(make_op(op.result, OpType.Sqr, op.left, 2))
+        elif op.operator == OpType.Mult and isinstance(op.left, int) != isinstance(op.right, int):
+            constant, base = (op.left, op.right) if isinstance(op.left, int) else (op.right, op.left)
+            steps = _chain(constant) if constant > 1 else []
+            if not steps or len(steps) > max_adds:
+                result.append(op)
+                continue
+            # The intermediate steps get fresh variables (assigned once), these get pooled later.
+            current = base
+            for i, add in enumerate(steps):
+                target = op.result if i == len(steps) - 1 else fresh()
+                result.append(make_op(target, OpType.Add, current, base if add else current))
+                current = target
+        else:
+            result.append(op)
+    return result
+
+
+@public
+def hoist_invariants(
+    ops: Sequence[CodeOp],
+    parameters: Iterable[str],
+    outputs: Iterable[str],
+) -> Tuple[List[CodeOp], int]:
+    """
+    Move the operations that only depend on the `parameters` and constants to the front.
+
+    Only operations whose result is assigned once and is not an output are moved. The moved
+    operations compute the same values for all inputs, so they can be computed once per curve.
+
+    :param ops: The operations.
+    :param parameters: The names of the parameters (of the curve).
+    :param outputs: The names of the outputs.
+    :return: The reordered operations and the number of the leading invariant operations.
+    """
+    outputs = set(outputs)
+    assigned = Counter(op.result for op in ops)
+    invariant = {parameter for parameter in parameters if parameter not in assigned}
+    hoisted: List[CodeOp] = []
+    rest: List[CodeOp] = []
+    for op in ops:
+        if (
+            op.result not in outputs
+            and assigned[op.result] == 1
+            and all(operand in invariant for operand in _operands(op))
+        ):
+            hoisted.append(op)
+            invariant.add(op.result)
+        else:
+            rest.append(op)
+    return hoisted + rest, len(hoisted)
+
+
+@public
+def lazy_reduce(
+    ops: Sequence[CodeOp],
+    outputs: Iterable[str],
+    bound: int = LAZY_BOUND,
+) -> Tuple[List[CodeOp], List[Optional[int]]]:
+    """
+    Plan lazy modular reduction of the operations.
+
+    Tracks bounds on the values (as multiples of the prime p, the inputs, parameters and constants
+    are reduced, i.e. below p). Additions, subtractions and negations are done without reduction,
+    a subtraction (negation) adds a multiple of p at least as large as the bound of the subtrahend
+    to stay non-negative. Multiplications and squarings reduce their result, their operands can
+    stay unreduced as long as the product of their bounds is at most `bound`. Where a bound would
+    be exceeded (and for the operands of divisions, inversions and powers, and for the outputs)
+    a reduction is inserted, as an ``Id`` operation on the value.
+
+    :param ops: The operations.
+    :param outputs: The names of the outputs, these are fully reduced at the end.
+    :param bound: The bound on the unreduced values and on the products of the bounds of the
+                  operands of multiplications.
+    :return: The operations with the reductions inserted and their annotations: None for an
+             operation rendered as usual (with reduction), otherwise the operation is rendered
+             without reduction and the annotation is the multiple of p added (for subtractions and
+             negations, 0 otherwise). An annotated ``Id`` operation fully reduces its operand.
+    """
+    bounds: MutableMapping[str, int] = {}
+    result: List[CodeOp] = []
+    annotations: List[Optional[int]] = []
+
+    def get(operand: Operand) -> int:
+        return bounds.get(operand, 1) if isinstance(operand, str) else 1
+
+    def reduce(operand: Operand):
+        if get(operand) > 1:
+            result.append(make_op(operand, OpType.Id, operand, None))
+            annotations.append(0)
+            bounds[operand] = 1
+
+    def fit(left: Operand, right: Operand, combine) -> None:
+        # Reduce the operand with the larger bound until the combined bound fits.
+        while combine(get(left), get(right)) > bound:
+            reduce(left if get(left) >= get(right) else right)
+
+    for op in ops:
+        annotation: Optional[int] = None
+        if op.operator == OpType.Add:
+            fit(op.left, op.right, lambda a, b: a + b)
+            res_bound = get(op.left) + get(op.right)
+            annotation = 0
+        elif op.operator == OpType.Sub:
+            fit(op.left, op.right, lambda a, b: a + b)
+            annotation = get(op.right)
+            res_bound = get(op.left) + annotation
+        elif op.operator == OpType.Neg:
+            # The result a*p - x equals a*p for x = 0, so it is only below (a + 1)*p.
+            if get(op.right) + 1 > bound:
+                reduce(op.right)
+            annotation = get(op.right)
+            res_bound = annotation + 1
+        elif op.operator in (OpType.Mult, OpType.Sqr):
+            right = op.left if op.operator == OpType.Sqr else op.right
+            fit(op.left, right, lambda a, b: a * b)
+            res_bound = 1
+        elif op.operator == OpType.Id:
+            res_bound = get(op.left)
+        else:
+            for operand in (op.left, op.right):
+                reduce(operand)
+            res_bound = 1
+        result.append(op)
+        annotations.append(annotation)
+        bounds[op.result] = res_bound
+    for output in sorted(outputs):
+        reduce(output)
+    return result, annotations
+
+
+@public
+def count_multiplications(ops: Iterable[CodeOp]) -> Tuple[int, int]:
+    """
+    Count the field multiplications and squarings in the operations.
+
+    A power by a constant counts as its (square-and-multiply) addition chain.
+
+    :param ops: The operations.
+    :return: The number of multiplications and the number of squarings.
+    """
+    mults = sqrs = 0
+    for op in ops:
+        if op.operator == OpType.Mult:
+            mults += 1
+        elif op.operator == OpType.Sqr:
+            sqrs += 1
+        elif op.operator == OpType.Pow and isinstance(op.right, int) and op.right > 1:
+            steps = _chain(op.right)
+            mults += sum(steps)
+            sqrs += len(steps) - sum(steps)
+    return mults, sqrs
+
+
+@public
+def eliminate_dead_code(ops: Sequence[CodeOp], outputs: Iterable[str]) -> List[CodeOp]:
+    """
+    Remove the operations whose results do not contribute to the outputs.
+
+    :param ops: The operations.
+    :param outputs: The names of the outputs.
+    :return: The live operations, in the original order.
+    """
+    live = set(outputs)
+    kept = []
+    for op in reversed(ops):
+        if op.result not in live:
+            continue
+        live.discard(op.result)
+        live.update(op.variables)
+        live.update(op.parameters)
+        kept.append(op)
+    kept.reverse()
+    return kept
+
+
+def _operands(op: CodeOp) -> List[str]:
+    return [operand for operand in (op.left, op.right) if isinstance(operand, str)]
+
+
+@public
+def allocate_temporaries(
+    ops: Sequence[CodeOp],
+    temporaries: Collection[str],
+    prefix: str = "tmp",
+) -> Tuple[List[CodeOp], int]:
+    """
+    Map the `temporaries` onto a minimal set of reusable temporary variables.
+
+    Computes the lifetime of every value assigned to a temporary (from its assignment to its
+    last use) and assigns the values to temporary variables (named `prefix` followed by a number)
+    in a linear scan, reusing a variable as soon as the value it holds is dead. The result of an
+    operation may share a variable with one of its operands, if that operand dies in the operation.
+
+    :param ops: The operations.
+    :param temporaries: The names of the variables that can be reallocated, the other variables
+                        (inputs, outputs, parameters) are left as is.
+    :param prefix: The prefix of the names of the temporary variables.
+    :return: The rewritten operations and the number of temporary variables used
+             (the peak number of live temporaries).
+    """
+    temporaries = set(temporaries)
+    # The last use of the value assigned in an operation (by index), the index itself if the value is dead.
+    last_use: MutableMapping[int, int] = {}
+    current: MutableMapping[str, int] = {}
+    for i, op in enumerate(ops):
+        for operand in _operands(op):
+            if operand in current:
+                last_use[current[operand]] = i
+        if op.result in temporaries:
+            current[op.result] = i
+            last_use[i] = i
+
+    used: Set[str] = set()
+    for op in ops:
+        used.add(op.result)
+        used.update(_operands(op))
+    names: List[str] = []
+    free: List[str] = []
+    mapping: MutableMapping[str, str] = {}
+    dying: MutableMapping[int, List[str]] = {}
+    result: List[CodeOp] = []
+    for i, op in enumerate(ops):
+        left = mapping.get(op.left, op.left) if isinstance(op.left, str) else op.left
+        right = mapping.get(op.right, op.right) if isinstance(op.right, str) else op.right
+        # Release the variables of the values that die in this operation.
+        free.extend(dying.pop(i, []))
+        free.sort(key=names.index)
+        if op.result in temporaries:
+            if free:
+                name = free.pop(0)
+            else:
+                name = "{}{}".format(prefix, len(names))
+                while name in used:
+                    name += "_"
+                names.append(name)
+            mapping[op.result] = name
+            dying.setdefault(last_use[i], []).append(name)
+            if last_use[i] == i:
+                free.extend(dying.pop(i))
+            res = name
+        else:
+            res = op.result
+        if (res, left, right) == (op.result, op.left, op.right):
+            result.append(op)
+        else:
+            result.append(make_op(res, op.operator, left, right))
+    return result, len(names)
+
+
+@public
+def schedule(ops: Sequence[CodeOp], temporaries: Collection[str]) -> List[CodeOp]:
+    """
+    Reorder the operations to reduce the peak number of live temporaries.
+
+    The operations are list-scheduled, subject to their data dependencies (including the
+    reassignments of variables): out of the operations that are ready, the one that frees the
+    most temporaries (it is the last use of its operands) and allocates the fewest is picked,
+    the earlier one in the original order on ties. The original order is kept if the schedule
+    does not lower the peak (as computed by :py:func:`allocate_temporaries`).
+
+    :param ops: The operations.
+    :param temporaries: The names of the variables that hold intermediate values, see :py:func:`allocate_temporaries`.
+    :return: The reordered operations.
+    """
+    temporaries = set(temporaries)
+    count = len(ops)
+    preds: List[Set[int]] = [set() for _ in range(count)]
+    # The values (by the index of the operation assigning them) read by each operation.
+    reads: List[Set[int]] = [set() for _ in range(count)]
+    readers: Counter = Counter()
+    current: MutableMapping[str, int] = {}
+    current_readers: MutableMapping[str, List[int]] = {}
+    for i, op in enumerate(ops):
+        for operand in _operands(op):
+            if operand in current:
+                preds[i].add(current[operand])
+                if current[operand] not in reads[i]:
+                    reads[i].add(current[operand])
+                    readers[current[operand]] += 1
+            current_readers.setdefault(operand, []).append(i)
+        # A reassignment has to wait for the previous assignment and for all of its uses.
+        if op.result in current:
+            preds[i].add(current[op.result])
+        preds[i].update(reader for reader in current_readers.get(op.result, []) if reader != i)
+        current[op.result] = i
+        current_readers[op.result] = []
+
+    succs: List[List[int]] = [[] for _ in range(count)]
+    for i in range(count):
+        for pred in preds[i]:
+            succs[pred].append(i)
+    waiting = [len(pred) for pred in preds]
+    ready = [i for i in range(count) if not waiting[i]]
+    order: List[int] = []
+    while ready:
+        def score(i: int) -> Tuple[int, int]:
+            allocated = int(ops[i].result in temporaries and readers[i] > 0)
+            freed = sum(1 for value in reads[i] if ops[value].result in temporaries and readers[value] == 1)
+            return allocated - freed, i
+
+        best = min(ready, key=score)
+        ready.remove(best)
+        order.append(best)
+        for value in reads[best]:
+            readers[value] -= 1
+        for succ in succs[best]:
+            waiting[succ] -= 1
+            if not waiting[succ]:
+                ready.append(succ)
+    scheduled = [ops[i] for i in order]
+    if allocate_temporaries(scheduled, temporaries)[1] < allocate_temporaries(ops, temporaries)[1]:
+        return scheduled
+    return list(ops)
@@ -4,11 +4,13 @@ import os
 import shutil
 import subprocess
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from os import path
 from os import makedirs
-from typing import Optional, List, Set, Mapping, MutableMapping, Any, Tuple
+from typing import Optional, List, Set, Mapping, MutableMapping, Any, Tuple, Sequence, TYPE_CHECKING
 
-from jinja2 import Environment, PackageLoader
 from importlib_resources import files
 from public import public
 from pyecsca.ec.configuration import (
@@ -17,9 +19,10 @@ from pyecsca.ec.configuration import (
     Reduction,
     Multiplication,
     Squaring,
+    Inversion,
 )
 from pyecsca.ec.coordinates import CoordinateModel
-from pyecsca.ec.formula import Formula
+from pyecsca.ec.formula import Formula, ScalingFormula, AdditionFormula
 from pyecsca.ec.model import CurveModel
 from pyecsca.ec.mult import (
     ScalarMultiplier,
@@ -41,21 +44,39 @@ from pyecsca.ec.mult import (
     WindowBoothMultiplier,
 )
 from pyecsca.ec.op import OpType, CodeOp
-
-from pyecsca.codegen.common import Platform, DeviceConfiguration
+from pyecsca.ec.params import DomainParameters, get_params
+from pyecsca.ec.point import InfinityPoint
+
+from pyecsca.codegen.cache import BuildCache, config_id
+from pyecsca.codegen.common import Platform, DeviceConfiguration, Profile, Field
+from pyecsca.codegen.optimize import (
+    LAZY_BOUND,
+    optimize,
+    specialize,
+    strength_reduce,
+    hoist_invariants,
+    lazy_reduce,
+    allocate_temporaries,
+    count_multiplications,
+    schedule,
+)
 from pyecsca.misc.utils import pexec
 
-env = Environment(loader=PackageLoader("pyecsca.codegen"))
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+POOL_BITS = 256
+"""The bit-length of the order the point pool is sized for, if the curve is not baked in (see :py:func:`point_pool_size`)."""
 
-# Make some Python functions available in the templates.
-env.globals["isinstance"] = isinstance
-env.globals["bin"] = bin
-env.globals["AccumulationOrder"] = AccumulationOrder
-env.globals["ProcessingDirection"] = ProcessingDirection
+SPECIAL_TERMS = 8
+"""The most terms (in signed binary) of `c` in a special prime ``2^k - c`` (see :py:func:`special_prime_form`)."""
+
+AFFINE_ONE = ("Z", "ZZ", "ZZZ")
+"""The coordinates that are one in the points mapped from affine coordinates (see ``point_from_affine``)."""
 
 
 def render_op(
-    op: OpType, result: str, left: str, right: str, mod: str, red: str
+    op: OpType, result: str, left: str, right: str, mod: str, red: str, lazy: Optional[str] = None
 ) -> Optional[str]:
     """
     Render an operation `op` (add, sub, neg, ...) into a C string.
@@ -70,8 +91,20 @@ def render_op(
     :param right: The right operand variable name (if any).
     :param mod: The modulus variable name.
     :param red: The reduction context variable name.
+    :param lazy: If not None, the operation is done without reduction (see :py:func:`pyecsca.codegen.optimize.lazy_reduce`),
+                 for subtractions and negations this is the name of the multiple of the modulus to add,
+                 an ``Id`` operation then fully reduces its operand.
     :return: The rendered C source code as a string, or None if the operation is not supported.
     """
+    if lazy is not None:
+        if op == OpType.Add:
+            return "bn_add_unred(&{}, &{}, &{});".format(left, right, result)
+        elif op == OpType.Sub:
+            return "bn_sub_unred(&{}, &{}, &{}, &{});".format(left, right, lazy, result)
+        elif op == OpType.Neg:
+            return "bn_neg_unred(&{}, &{}, &{});".format(right, lazy, result)
+        elif op == OpType.Id:
+            return "bn_red_normalize(&{}, &{}, &{});".format(left, mod, result)
     if op == OpType.Add:
         return "bn_red_add(&{}, &{}, &{}, &{}, &{});".format(
             left, right, mod, red, result
@@ -103,7 +136,58 @@ def render_op(
         return None
 
 
-env.globals["render_op"] = render_op
+def render_fe_op(op: OpType, result: str, left: str, right: str) -> Optional[str]:
+    """
+    Render an operation `op` (add, sub, neg, ...) on the fixed-width field elements (``fe_t``) into a C string.
+
+    The exponents of ``Pow`` operations stay ``bn_t``, the field is set up per curve
+    (see ``fe_set_curve``), so no modulus nor reduction context is passed.
+
+    :param op: The operation type.
+    :param result: The variable name to store the result in.
+    :param left: The left operand variable name (if any).
+    :param right: The right operand variable name (if any).
+    :return: The rendered C source code as a string, or None if the operation is not supported.
+    """
+    if op == OpType.Add:
+        return "fe_add(&{}, &{}, &{});".format(left, right, result)
+    elif op == OpType.Sub:
+        return "fe_sub(&{}, &{}, &{});".format(left, right, result)
+    elif op == OpType.Neg:
+        return "fe_neg(&{}, &{});".format(right, result)
+    elif op == OpType.Mult:
+        return "fe_mul(&{}, &{}, &{});".format(left, right, result)
+    elif op == OpType.Div or op == OpType.Inv:
+        return "fe_div(&{}, &{}, &{});".format(left, right, result)
+    elif op == OpType.Sqr:
+        return "fe_sqr(&{}, &{});".format(left, result)
+    elif op == OpType.Pow:
+        return "fe_pow(&{}, &{}, &{});".format(left, right, result)
+    elif op == OpType.Id:
+        return "fe_copy(&{}, &{});".format(left, result)
+    else:
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_env() -> "Environment":
+    """
+    Get the Jinja environment with the templates, it is created on first use.
+
+    :return: The environment.
+    """
+    from jinja2 import Environment, PackageLoader
+
+    env = Environment(loader=PackageLoader("pyecsca.codegen"))
+
+    # Make some Python functions available in the templates.
+    env.globals["isinstance"] = isinstance
+    env.globals["bin"] = bin
+    env.globals["AccumulationOrder"] = AccumulationOrder
+    env.globals["ProcessingDirection"] = ProcessingDirection
+    env.globals["render_op"] = render_op
+    env.globals["render_fe_op"] = render_fe_op
+    return env
 
 
 def render_defs(model: CurveModel, coords: CoordinateModel) -> str:
@@ -117,7 +201,7 @@ def render_defs(model: CurveModel, coords: CoordinateModel) -> str:
     :param coords: The coordinate model to render.
     :return: The rendered C source code as a string.
     """
-    return env.get_template("defs.h").render(
+    return get_env().get_template("defs.h").render(
         params=model.parameter_names, variables=coords.variables
     )
 
@@ -131,7 +215,7 @@ def render_curve_impl(model: CurveModel) -> str:
     :param model: The curve model to render.
     :return: The rendered C source code as a string.
     """
-    return env.get_template("curve.c").render(params=model.parameter_names)
+    return get_env().get_template("curve.c").render(params=model.parameter_names)
 
 
 def transform_ops(
@@ -139,6 +223,8 @@ def transform_ops(
     parameters: List[str],
     outputs: Set[str],
     renames: Mapping[str, str] = None,
+    invariants: int = 0,
+    lazy: Optional[Sequence[Optional[int]]] = None,
 ) -> MutableMapping[Any, Any]:
     """
     Transform a list of CodeOps, parameters, outputs and renames into a mapping
@@ -150,17 +236,30 @@ def transform_ops(
     Useful when you have a list of operations and want to render them,
     such as when executing a formula or coordinate transformation.
 
+    The intermediate results (neither outputs, parameters nor renamed) are mapped onto
+    a minimal set of reusable temporaries, based on their lifetimes
+    (see :py:func:`pyecsca.codegen.optimize.allocate_temporaries`).
+
     :param ops: The list of operations to transform.
     :param parameters: The list of parameter names that are inputs to the operations.
     :param outputs: The set of output names that should not be freed.
     :param renames: Optional mapping of variable names to renamed versions.
+    :param invariants: The number of leading operations that only depend on the parameters and constants
+                       (see :py:func:`pyecsca.codegen.optimize.hoist_invariants`). These are computed once
+                       per curve, their results keep their own variables.
+    :param lazy: Optional lazy reduction annotations of the operations
+                 (see :py:func:`pyecsca.codegen.optimize.lazy_reduce`).
     :return: A mapping with keys:
         - allocations: List of variable names that need to be allocated.
         - initializations: Mapping of variable names to (constant, encode) tuples for initialization.
         - const_mapping: Mapping of (constant, encode) tuples to variable names.
-        - operations: List of (op, result, left, right) tuples for the operations
+        - operations: List of (op, result, left, right, lazy) tuples for the operations
+        - invariant_operations: List of (op, result, left, right, lazy) tuples for the invariant operations.
+        - multiples: Mapping of variable names to the multiples of the modulus they hold (for lazy reduction).
+        - invariants: List of variable names computed once per curve (constants, multiples and invariant results).
         - frees: List of variable names that need to be freed.
         - returns: Mapping of output variable names to renamed versions.
+        - temporaries: The number of temporaries used (the peak number of live intermediates).
     """
 
     def rename(name: str):
@@ -168,9 +267,14 @@ def transform_ops(
             return renames.get(name, name)
         return name
 
+    intermediates = {op.result for op in ops[invariants:]} - {op.result for op in ops[:invariants]}
+    intermediates -= set(outputs) | set(parameters) | set(renames or {})
+    ops, temporaries = allocate_temporaries(ops, intermediates)
+
     allocations: List[str] = []
     initializations = {}
     const_mapping = {}
+    multiples = {}
     operations = []
     frees = []
     # Go over the ops, track allocations needed for intermediates and constants.
@@ -178,14 +282,29 @@ def transform_ops(
     # ones are default, the non-encoded ones are only in the exponents, where
     # you don't want to encode using the reduction object (i.e. Montgomery form).
     # Also constructs a mapping from raw constants to their variable names.
-    for op in ops:
+    for i, op in enumerate(ops):
         if op.result not in allocations:
             allocations.append(op.result)
             frees.append(op.result)
+        # The unreduced operations get the name of the multiple of the modulus they add (if any).
+        offset = None
+        if lazy is not None and lazy[i] is not None:
+            offset = ""
+            if lazy[i] == 1:
+                offset = "curve->p"
+            elif lazy[i] > 1:
+                offset = "p_" + str(lazy[i])
+                if offset not in allocations:
+                    allocations.append(offset)
+                    multiples[offset] = lazy[i]
+                    frees.append(offset)
         for param in op.parameters:
             if param not in allocations and param not in parameters:
                 raise ValueError("Should be allocated or parameter: {}".format(param))
         for const in op.constants:
+            if op.operator == OpType.Sqr:
+                # The exponent of a squaring is implicit.
+                continue
             if op.operator == OpType.Pow:
                 name = "cu" + str(const)
                 encode = False
@@ -197,7 +316,7 @@ def transform_ops(
                 initializations[name] = (const, encode)
                 const_mapping[(const, encode)] = name
                 frees.append(name)
-        operations.append((op.operator, op.result, rename(op.left), rename(op.right)))
+        operations.append((op.operator, op.result, rename(op.left), rename(op.right), offset))
     mapped = []
     # Go over the operations and map constants to their variable names,
     # make sure the encoded/non-encoded version is used where appropriate.
@@ -209,7 +328,7 @@ def transform_ops(
         o3_enc = op[0] != OpType.Pow
         if (o3, o3_enc) in const_mapping:
             o3 = const_mapping[(o3, o3_enc)]
-        mapped.append((op[0], op[1], o2, o3))
+        mapped.append((op[0], op[1], o2, o3, op[4]))
     returns = {}
     # Handle renames in the returns.
     if renames:
@@ -221,20 +340,31 @@ def transform_ops(
         allocations=allocations,
         initializations=initializations,
         const_mapping=const_mapping,
-        operations=mapped,
+        operations=mapped[invariants:],
+        invariant_operations=mapped[:invariants],
+        multiples=multiples,
+        invariants=list(initializations) + list(multiples) + [op.result for op in ops[:invariants]],
         frees=frees,
         returns=returns,
+        temporaries=temporaries,
     )
 
 
 def render_coords_impl(
-    coords: CoordinateModel, accumulation_order: Optional[AccumulationOrder]
+    coords: CoordinateModel,
+    accumulation_order: Optional[AccumulationOrder],
+    madd: bool = False,
+    pool_size: Optional[int] = None,
 ) -> str:
     """
     Render the point.c file with coordinate operations for a given curve model.
 
     :param coords: The coordinate model containing variables and satisfying equations.
     :param accumulation_order: The accumulation order for scalar multiplication, if any.
+    :param madd: Whether a mixed addition (``point_madd``) is rendered, the accumulation
+                 of points mapped from affine coordinates (``point_accumulate_mixed``) then uses it.
+    :param pool_size: The number of points in the pool the scalar multiplication allocates its points from
+                      (see :py:func:`point_pool_size`), if None the points are always allocated on the heap.
     :return: Rendered C source code as a string.
     """
     ops = []
@@ -259,52 +389,171 @@ def render_coords_impl(
     frees = namespace["frees"]
     namespace["frees"] = {}
 
-    return env.get_template("point.c").render(
+    return get_env().get_template("point.c").render(
         variables=coords.variables,
         **namespace,
         to_affine_rets=returns,
         to_affine_frees=frees,
         accumulation_order=accumulation_order,
+        normalize=transform_normalization(coords),
+        madd=madd,
+        pool_size=pool_size,
     )
 
 
-def render_formulas_impl(formulas: Set[Formula]) -> str:
+def get_normalization_formula(coords: CoordinateModel) -> Optional[ScalingFormula]:
     """
-    Render the formulas.c file with formula dispatch functions.
+    Get the scaling formula of the coordinate model that the batch normalization (``point_normalize_batch``) uses.
 
-    :param formulas: The set of formulas to render.
-    :return: The rendered C source code as a string.
+    This is a scaling formula that starts with the inversion of one of the coordinates (the denominator).
+
+    :param coords: The coordinate model.
+    :return: The scaling formula or None, if the coordinate model has no such formula.
     """
-    names = {formula.shortname for formula in formulas}
-    return env.get_template("formulas.c").render(names=names)
+    for formula in coords.formulas.values():
+        if not isinstance(formula, ScalingFormula) or not formula.code:
+            continue
+        inv = formula.code[0]
+        if inv.operator == OpType.Inv and inv.right in formula.inputs:
+            return formula
+    return None
 
 
-def render_formula_impl(formula: Formula, short_circuit: bool = False) -> str:
+def transform_normalization(coords: CoordinateModel) -> Optional[MutableMapping[Any, Any]]:
     """
-    Render a single formula into its own C file.
+    Transform the scaling formula of the coordinate model into a mapping that will be used by the
+    point.c template to render the batch normalization.
 
-    :param formula: The formula to render.
-    :param short_circuit: Whether to short-circuit on zero inputs.
-    :return: The rendered C source code as a string.
+    The inversion of the denominator is left out, the inverse (computed by the simultaneous inversion)
+    is in the ``zinv`` variable, the point is normalized in place.
+
+    :param coords: The coordinate model.
+    :return: The mapping, see :py:func:`transform_ops`, with the ``denominator`` variable added,
+             or None, if the coordinate model has no suitable scaling formula.
     """
-    template = env.get_template(f"formula_{formula.shortname}.c")
-    inputs = ["one", "other", "diff"]
-    outputs = ["out_one", "out_other"]
-    renames = {}
+    formula = get_normalization_formula(coords)
+    if formula is None:
+        return None
+    inv, *ops = formula.code
+    suffix = len(str(formula.input_index))
+    renames = {inv.result: "zinv"}
     for input in formula.inputs:
-        var = input[0]
-        num = int(input[1:]) - formula.input_index
-        renames[input] = "{}->{}".format(inputs[num], var)
-    for param in formula.coordinate_model.curve_model.parameter_names:
+        renames[input] = "point->{}".format(input[:-suffix])
+    for param in coords.curve_model.parameter_names:
         renames[param] = "curve->{}".format(param)
+    suffix = len(str(formula.output_index))
     for output in formula.outputs:
-        var = output[0]
-        num = int(output[1:]) - formula.output_index
-        renames[output] = "{}->{}".format(outputs[num], var)
+        renames[output] = "point->{}".format(output[:-suffix])
+    parameters = list(coords.curve_model.parameter_names) + [inv.result]
+    namespace = transform_ops(ops, parameters, formula.outputs, renames)
+    namespace["denominator"] = inv.right[:-len(str(formula.input_index))]
+    return namespace
+
+
+def get_input_assumptions(formula: Formula) -> Mapping[str, int]:
+    """
+    Get the assumptions of the formula that fix one of its input coordinates to a constant (e.g. ``Z2 == 1``).
+
+    :param formula: The formula.
+    :return: The mapping of the input coordinates to their assumed values.
+    :raises ValueError: If an assumption on an input coordinate is not a constant one (e.g. ``Z1 == Z2``).
+    """
+    values = {}
+    for assumption_str in formula.assumptions_str:
+        lhs, rhs = assumption_str.split(" == ")
+        if lhs in formula.inputs:
+            try:
+                values[lhs] = int(rhs)
+            except ValueError:
+                raise ValueError("WIP: assumption not supported: {}".format(assumption_str))
+    return values
+
+
+@public
+def is_mixed_addition(formula: Formula) -> bool:
+    """
+    Check whether the formula is a mixed addition, i.e. an addition formula that assumes
+    its second input is mapped from affine coordinates (e.g. ``Z2 == 1``).
+
+    Such a formula is rendered as ``point_madd``, alongside the general ``point_add``.
+
+    :param formula: The formula.
+    :return: Whether the formula is a mixed addition.
+    """
+    if not isinstance(formula, AdditionFormula):
+        return False
+    try:
+        values = get_input_assumptions(formula)
+    except ValueError:
+        return False
+    suffix = str(formula.input_index + 1)
+    return bool(values) and all(
+        name.endswith(suffix) and name[: -len(suffix)] in AFFINE_ONE and value == 1
+        for name, value in values.items()
+    )
+
+
+@public
+def formula_name(formula: Formula) -> str:
+    """
+    Get the name the formula is rendered under (``point_<name>``).
+
+    :param formula: The formula.
+    :return: ``madd`` for a mixed addition (see :py:func:`is_mixed_addition`), the shortname of the formula otherwise.
+    """
+    return "madd" if is_mixed_addition(formula) else formula.shortname
+
+
+def render_formulas_impl(formulas: Set[Formula], fixed_field: bool = False) -> str:
+    """
+    Render the formulas.c file with formula dispatch functions.
+
+    :param formulas: The set of formulas to render.
+    :param fixed_field: Whether the formulas use the fixed-width field elements (see :py:func:`render_field_impl`),
+                        their field is then set up along with the formulas.
+    :return: The rendered C source code as a string.
+    """
+    names = sorted({formula_name(formula) for formula in formulas})
+    return get_env().get_template("formulas.c").render(names=names, fixed_field=fixed_field)
+
+
+def render_field_impl(params: DomainParameters) -> Tuple[str, str]:
+    """
+    Render the fe.h and fe.c files with the fixed-width field elements, sized for the prime of `params`.
+
+    :param params: The domain parameters baked into the implementation.
+    :return: The rendered header and C source code as strings.
+    """
+    env = get_env()
+    bits = params.curve.prime.bit_length()
+    return env.get_template("fe.h").render(bits=bits), env.get_template("fe.c").render()
+
+
+@public
+def optimize_formula(
+    formula: Formula, params: Optional[DomainParameters] = None
+) -> Tuple[List[CodeOp], int, Mapping[str, int]]:
+    """
+    Get the optimized operations of a formula, as they are rendered.
+
+    The assumptions of the formula on the curve parameters are prepended to its code, the ones on
+    its inputs (e.g. ``Z2 == 1``) are substituted into it. The operations are then optimized
+    (or specialized to the `params`), strength-reduced and the operations that only depend on the
+    curve parameters are hoisted to the front.
+
+    :param formula: The formula.
+    :param params: The domain parameters to specialize the formula to, if any.
+    :return: The operations, the number of leading invariant operations (computed once per curve) and
+             the number of multiplications (``M``) and squarings (``S``) the optimization saved.
+    :raises ValueError: If the formula has an unsupported assumption.
+    """
     ops = []
+    values = get_input_assumptions(formula)
     for assumption_str in formula.assumptions_str:
         lhs, rhs = assumption_str.split(" == ")
-        if lhs in formula.parameters:
+        if lhs in values:
+            continue
+        elif lhs in formula.parameters:
             try:
                 code = CodeOp(pexec(assumption_str.replace("==", "=").replace("^", "**")))
                 ops.append(code)
@@ -313,26 +562,202 @@ def render_formula_impl(formula: Formula, short_circuit: bool = False) -> str:
         else:
             raise ValueError("WIP: assumption not supported: {}".format(assumption_str))
     ops.extend(formula.code)
+    mults, sqrs = count_multiplications(ops)
+    if params is not None:
+        values.update({name: int(value) for name, value in params.curve.parameters.items()})
+        ops = specialize(ops, values, params.curve.prime, formula.outputs)
+    else:
+        ops = optimize(ops, formula.outputs, values)
+    ops = strength_reduce(ops)
+    opt_mults, opt_sqrs = count_multiplications(ops)
+    ops, invariants = hoist_invariants(ops, formula.coordinate_model.curve_model.parameter_names, formula.outputs)
+    return ops, invariants, {"M": mults - opt_mults, "S": sqrs - opt_sqrs}
+
+
+def transform_formula(
+    formula: Formula,
+    params: Optional[DomainParameters] = None,
+    lazy_reduction: bool = False,
+    scheduling: bool = False,
+    fixed_field: bool = False,
+) -> MutableMapping[Any, Any]:
+    """
+    Transform a formula into a mapping that will be used by its template to render it.
+
+    The operations of the formula are optimized first (see :py:func:`optimize_formula`), then
+    optionally scheduled and lazily reduced and finally transformed (see :py:func:`transform_ops`).
+
+    With the fixed-width field elements, the used input coordinates (``one_X``, ...) are loaded
+    from the points at the start of the formula and the used curve parameters (``curve_a``, ...)
+    once per curve, the outputs are stored back into the points.
+
+    :param formula: The formula to transform.
+    :param params: The domain parameters baked into the implementation, if any. The formula is
+                   then specialized to the known curve parameters (see :py:func:`pyecsca.codegen.optimize.specialize`).
+    :param lazy_reduction: Whether to keep the results of additions and subtractions unreduced where the bounds
+                           allow it (see :py:func:`pyecsca.codegen.optimize.lazy_reduce`).
+    :param scheduling: Whether to reorder the operations to reduce the peak number of live temporaries
+                       (see :py:func:`pyecsca.codegen.optimize.schedule`).
+    :param fixed_field: Whether to operate on the fixed-width field elements (see :py:func:`render_field_impl`),
+                        instead of the ``bn_t`` ones.
+    :return: The mapping, see :py:func:`transform_ops`, with the ``formula``, the ``saved`` multiplications
+             and squarings, the ``loads`` of the inputs and the ``curve_loads`` of the curve parameters added
+             (both mappings of the sources to the variables).
+    """
+    inputs = ["one", "other", "diff"]
+    outputs = ["out_one", "out_other"]
+    parameters = formula.coordinate_model.curve_model.parameter_names
+    renames = {}
+    sources = {}
+    for input in sorted(formula.inputs):
+        var = input[0]
+        num = int(input[1:]) - formula.input_index
+        renames[input] = "{}->{}".format(inputs[num], var)
+        if fixed_field:
+            sources[input] = renames[input]
+            renames[input] = "{}_{}".format(inputs[num], var)
+    for param in parameters:
+        renames[param] = "curve->{}".format(param)
+        if fixed_field:
+            sources[param] = renames[param]
+            renames[param] = "curve_{}".format(param)
+    for output in sorted(formula.outputs):
+        var = output[0]
+        num = int(output[1:]) - formula.output_index
+        renames[output] = "{}->{}".format(outputs[num], var)
+    ops, invariants, saved = optimize_formula(formula, params)
+    if scheduling:
+        intermediates = {op.result for op in ops[invariants:]} - {op.result for op in ops[:invariants]}
+        intermediates -= set(formula.outputs) | set(parameters) | set(renames)
+        ops = ops[:invariants] + schedule(ops[invariants:], intermediates)
+    lazy = None
+    if lazy_reduction:
+        # The invariant operations are done as usual, they only run once per curve.
+        lazy_ops, annotations = lazy_reduce(ops[invariants:], formula.outputs)
+        ops = ops[:invariants] + lazy_ops
+        lazy = [None] * invariants + annotations
     namespace = transform_ops(
         ops,
-        formula.coordinate_model.curve_model.parameter_names,
+        parameters,
         formula.outputs,
         renames,
+        invariants,
+        lazy,
     )
-    namespace["short_circuit"] = short_circuit
+    namespace["loads"] = {}
+    namespace["curve_loads"] = {}
+    if fixed_field:
+        used = {operand for op in ops for operand in op.variables | op.parameters}
+        for name, source in sources.items():
+            if name not in used:
+                continue
+            loads = namespace["curve_loads"] if name in parameters else namespace["loads"]
+            loads[source] = renames[name]
+            namespace["allocations"].append(renames[name])
+        namespace["invariants"].extend(namespace["curve_loads"].values())
+        # Only the exponents are bn_t.
+        namespace["frees"] = [init for init, (value, encode) in namespace["initializations"].items() if not encode]
     namespace["formula"] = formula
+    namespace["saved"] = saved
+    return namespace
+
+
+def render_formula_impl(
+    formula: Formula,
+    short_circuit: bool = False,
+    params: Optional[DomainParameters] = None,
+    lazy_reduction: bool = False,
+    scheduling: bool = False,
+    fixed_field: bool = False,
+) -> str:
+    """
+    Render a single formula into its own C file.
+
+    The operations of the formula are optimized first (see :py:func:`pyecsca.codegen.optimize.optimize`)
+    and multiplications by small constants are strength-reduced
+    (see :py:func:`pyecsca.codegen.optimize.strength_reduce`), the rendered file reports the number
+    of field multiplications and squarings this saved and the peak number of live temporaries.
+    The constants and the operations that only depend on the curve parameters are computed once
+    per curve, in ``point_<name>_set_curve``. A mixed addition (see :py:func:`is_mixed_addition`)
+    is rendered as ``point_madd``.
+
+    :param formula: The formula to render.
+    :param short_circuit: Whether to short-circuit on zero inputs.
+    :param params: The domain parameters baked into the implementation, if any. The formula is
+                   then specialized to the known curve parameters (see :py:func:`pyecsca.codegen.optimize.specialize`).
+    :param lazy_reduction: Whether to keep the results of additions and subtractions unreduced where the bounds
+                           allow it (see :py:func:`pyecsca.codegen.optimize.lazy_reduce`).
+    :param scheduling: Whether to reorder the operations to reduce the peak number of live temporaries
+                       (see :py:func:`pyecsca.codegen.optimize.schedule`).
+    :param fixed_field: Whether to operate on the fixed-width field elements (see :py:func:`render_field_impl`),
+                        instead of the ``bn_t`` ones.
+    :return: The rendered C source code as a string.
+    """
+    template = get_env().get_template(f"formula_{formula.shortname}.c")
+    namespace = transform_formula(formula, params, lazy_reduction, scheduling, fixed_field)
+    namespace["short_circuit"] = short_circuit
+    namespace["name"] = formula_name(formula)
+    namespace["fixed_field"] = fixed_field
+    namespace["ops_template"] = "ops_fe.c" if fixed_field else "ops.c"
     return template.render(namespace)
 
 
-def render_scalarmult_impl(scalarmult: ScalarMultiplier) -> str:
+def point_pool_size(scalarmult: ScalarMultiplier, bits: int) -> int:
+    """
+    Compute the number of points one scalar multiplication allocates, as rendered by the ``mult_*.c`` templates.
+
+    The points that are freed right after their use (i.e. from the top of the pool) are counted once.
+
+    :param scalarmult: The scalar multiplier.
+    :param bits: The bit-length of the order of the curve.
+    :return: The number of points.
+    """
+    always = int(getattr(scalarmult, "always", False))
+    if isinstance(scalarmult, (LTRMultiplier, RTLMultiplier)):
+        return 2 + always
+    elif isinstance(scalarmult, (CoronMultiplier, LadderMultiplier, SimpleLadderMultiplier,
+                                 DifferentialLadderMultiplier)):
+        return 2
+    elif isinstance(scalarmult, BinaryNAFMultiplier):
+        return (3 if scalarmult.direction == ProcessingDirection.LTR else 5) + always
+    elif isinstance(scalarmult, WindowNAFMultiplier):
+        table = 2 ** (scalarmult.width - 2)
+        return 3 + table + (table if scalarmult.precompute_negation else 1)
+    elif isinstance(scalarmult, WindowBoothMultiplier):
+        table = 2 ** (scalarmult.width - 1)
+        return 4 + table + (table if scalarmult.precompute_negation else 0)
+    elif isinstance(scalarmult, SlidingWindowMultiplier):
+        return 3 + 2 ** (scalarmult.width - 1)
+    elif isinstance(scalarmult, FixedWindowLTRMultiplier):
+        return 3 + scalarmult.m
+    elif isinstance(scalarmult, FullPrecompMultiplier):
+        return 3 + bits
+    elif isinstance(scalarmult, BGMWMultiplier):
+        return 3 + -(-bits // scalarmult.width)
+    elif isinstance(scalarmult, CombMultiplier):
+        return 1 + scalarmult.width + 2 ** scalarmult.width + always
+    raise ValueError("Unknown multiplier: {}.".format(scalarmult.__class__.__name__))
+
+
+def render_scalarmult_impl(
+    scalarmult: ScalarMultiplier, normalize_tables: bool = False, madd: bool = False, point_pool: bool = False
+) -> str:
     """
     Render the mult.c file with scalar multiplication implementation.
 
     :param scalarmult: The scalar multiplication algorithm to render.
+    :param normalize_tables: Whether to normalize the precomputed tables of the multiplier
+                             (with ``point_normalize_batch``), if it has any.
+    :param madd: Whether a mixed addition (``point_madd``) is rendered, it is then used to add
+                 the points known to have Z = 1 (the input point and the normalized tables).
+    :param point_pool: Whether the points are allocated from the pool during the scalar multiplication.
     :return: The rendered C source code as a string.
     """
-    return env.get_template("mult.c").render(
+    return get_env().get_template("mult.c").render(
         scalarmult=scalarmult,
+        normalize_tables=normalize_tables,
+        madd=madd,
+        point_pool=point_pool,
         LTRMultiplier=LTRMultiplier,
         RTLMultiplier=RTLMultiplier,
         CoronMultiplier=CoronMultiplier,
@@ -356,7 +781,7 @@ def render_action() -> str:
 
     :return: The rendered C source code as a string.
     """
-    return env.get_template("action.c").render()
+    return get_env().get_template("action.c").render()
 
 
 def render_rand() -> str:
@@ -365,11 +790,18 @@ def render_rand() -> str:
 
     :return: The rendered C source code as a string.
     """
-    return env.get_template("rand.c").render()
+    return get_env().get_template("rand.c").render()
 
 
 def render_main(
-    model: CurveModel, coords: CoordinateModel, keygen: bool, ecdh: bool, ecdsa: bool
+    model: CurveModel,
+    coords: CoordinateModel,
+    keygen: bool,
+    ecdh: bool,
+    ecdsa: bool,
+    params: Optional[DomainParameters] = None,
+    lazy_reduction: bool = False,
+    point_pool: bool = False,
 ) -> str:
     """
     Render the main.c file with the main function and high-level operations.
@@ -379,9 +811,26 @@ def render_main(
     :param keygen: Whether to include key generation.
     :param ecdh: Whether to include ECDH.
     :param ecdsa: Whether to include ECDSA.
+    :param params: The domain parameters to bake into the implementation, if any.
+    :param lazy_reduction: Whether the formulas use lazy reduction (the curve is then checked to allow it).
+    :param point_pool: Whether the point pool of the scalar multiplication is set up.
     :return: The rendered C source code as a string.
     """
-    return env.get_template("main.c").render(
+    baked = None
+    if params is not None:
+        neutral = params.curve.neutral
+        generator = params.generator.to_affine()
+        baked = {
+            "p": hex(params.curve.prime)[2:],
+            "n": hex(params.order)[2:],
+            "h": hex(params.cofactor)[2:],
+            "params": {name: hex(int(value))[2:] for name, value in params.curve.parameters.items()},
+            "gx": hex(int(generator.x))[2:],
+            "gy": hex(int(generator.y))[2:],
+            "neutral": None if isinstance(neutral, InfinityPoint)
+            else {var: hex(int(value))[2:] for var, value in neutral.coords.items()},
+        }
+    return get_env().get_template("main.c").render(
         model=model,
         coords=coords,
         curve_variables=coords.variables,
@@ -389,6 +838,9 @@ def render_main(
         keygen=keygen,
         ecdh=ecdh,
         ecdsa=ecdsa,
+        baked=baked,
+        lazy_bound=LAZY_BOUND if lazy_reduction else None,
+        point_pool=point_pool,
     )
 
 
@@ -400,6 +852,10 @@ def render_makefile(
     mul: Multiplication,
     sqr: Squaring,
     defines: Optional[MutableMapping[str, Any]],
+    profile: Profile = Profile.SIZE,
+    special_prime: bool = False,
+    inversion: Inversion = Inversion.GCD,
+    safegcd: bool = False,
 ) -> str:
     """
     Render the Makefile with the given configuration options.
@@ -411,9 +867,15 @@ def render_makefile(
     :param mul: The multiplication method.
     :param sqr: The squaring method.
     :param defines: Optional mapping of additional defines to include.
+    :param profile: The build profile.
+    :param special_prime: Whether the reduction uses the special form of the moduli that have one
+                          (see :py:func:`special_prime_form`).
+    :param inversion: The modular inversion method, the Euler one is the Fermat inversion (an exponentiation
+                      by the modulus minus two under the reduction).
+    :param safegcd: Whether the GCD inversion is the constant-time Bernstein-Yang safegcd.
     :return: The rendered Makefile as a string.
     """
-    return env.get_template("Makefile").render(
+    return get_env().get_template("Makefile").render(
         platform=str(platform),
         hash_type=str(hash_type),
         mod_rand=str(mod_rand),
@@ -421,23 +883,154 @@ def render_makefile(
         mul=str(mul),
         sqr=str(sqr),
         defines=defines,
+        profile=str(profile),
+        special_prime=special_prime,
+        inversion="INV_SAFEGCD" if safegcd else str(inversion),
     )
 
 
-def save_render(dir: str, fname: str, rendered: str):
-    with open(path.join(dir, fname), "w") as f:
+@public
+def special_prime_form(prime: int) -> Optional[Tuple[int, List[Tuple[int, int]]]]:
+    """
+    Get the special form ``2^k - c`` of a `prime` (pseudo-Mersenne or Solinas), as detected by ``bn_red_setup``.
+
+    The prime has the form if `c` has at most :py:data:`SPECIAL_TERMS` terms in signed binary (NAF) and
+    is below ``2^(k/2)``, so that at most three foldings (``hi * 2^k + lo = lo + hi * c``) reduce a product
+    of reduced values.
+
+    :param prime: The prime.
+    :return: The `k` and the terms (sign, shift) of `c`, or None if the prime has no special form.
+    """
+    k = prime.bit_length()
+    c = 2**k - prime
+    if 2 * c.bit_length() > k:
+        return None
+    terms = []
+    shift = 0
+    while c:
+        if c & 1:
+            if len(terms) == SPECIAL_TERMS:
+                return None
+            sign = 1 if c & 3 == 1 else -1
+            c -= sign
+            terms.append((sign, shift))
+        c >>= 1
+        shift += 1
+    return k, terms
+
+
+def get_baked_params(config: DeviceConfiguration) -> Optional[DomainParameters]:
+    """
+    Get the domain parameters of the named curve baked into the `config`, if any.
+
+    :param config: The configuration.
+    :return: The domain parameters (in the coordinate model of the `config`) or None.
+    :raises ValueError: If the named curve does not match the curve model of the `config`
+                        or does not allow the lazy reduction the `config` asks for.
+    """
+    if config.curve is None:
+        return None
+    category, name = config.curve.split("/", 1)
+    params = get_params(category, name, config.coords.name)
+    if not isinstance(params.curve.model, config.model.__class__):
+        raise ValueError("Curve {} is not a {} curve.".format(config.curve, config.model.shortname))
+    if config.lazy_reduction and config.red != Reduction.BASE:
+        # Mirrors bn_red_lazy_ok, with the libtommath digit size of the platform.
+        digit_bits = 60 if config.platform == Platform.HOST else 28
+        bits = params.curve.prime.bit_length()
+        headroom = (LAZY_BOUND - 1).bit_length()
+        if bits + headroom > -(-bits // digit_bits) * digit_bits:
+            raise ValueError("Curve {} does not leave enough headroom for lazy reduction.".format(config.curve))
+    return params
+
+
+def save_render(dir: str, fname: str, rendered: str) -> bool:
+    """
+    Save the `rendered` file, unless it already exists with the same content (to keep its mtime).
+
+    :return: Whether the file was written.
+    """
+    full_path = path.join(dir, fname)
+    if path.isfile(full_path):
+        with open(full_path) as f:
+            if f.read() == rendered:
+                return False
+    with open(full_path, "w") as f:
         f.write(rendered)
+    return True
+
+
+@public
+def check_config(config: DeviceConfiguration) -> Optional[DomainParameters]:
+    """
+    Check that the `config` can be rendered.
+
+    :param config: The configuration to check.
+    :return: The domain parameters of the baked curve, if any (see :py:func:`get_baked_params`).
+    :raises ValueError: If the baked curve does not fit the `config` (see :py:func:`get_baked_params`),
+                        or if the `config` asks for normalized tables and the coordinate model has no
+                        scaling formula to normalize with, or if it has a formula with assumptions
+                        on its inputs that is not a mixed addition alongside a general one, or if it asks
+                        for the fixed-width field elements without a baked curve, with a reduction other
+                        than the Montgomery one or with lazy reduction, or if it asks for the special prime
+                        reduction along with the Montgomery one or the prime of its baked curve has no special form,
+                        or if it asks for the safegcd with an inversion other than the GCD one.
+    """
+    if config.field == Field.FIXED:
+        if config.curve is None:
+            raise ValueError("The fixed-width field elements need a baked curve.")
+        if config.red != Reduction.MONTGOMERY:
+            raise ValueError("The fixed-width field elements need the Montgomery reduction.")
+        if config.lazy_reduction:
+            raise ValueError("The fixed-width field elements are always reduced, lazy reduction is not supported.")
+    if config.special_prime and config.red == Reduction.MONTGOMERY:
+        raise ValueError("The special prime reduction cannot be combined with the Montgomery reduction.")
+    if config.safegcd and config.inv != Inversion.GCD:
+        raise ValueError("The safegcd is a GCD inversion, it cannot be combined with the {} one.".format(config.inv.name))
+    if config.normalize_tables and get_normalization_formula(config.coords) is None:
+        raise ValueError("Coordinate model {} has no scaling formula to normalize the tables with.".format(config.coords))
+    for formula in config.formulas:
+        if get_input_assumptions(formula) and not is_mixed_addition(formula):
+            raise ValueError("Formula {} has assumptions on its inputs that are not supported.".format(formula))
+    for formula in config.scalarmult.formulas.values():
+        if is_mixed_addition(formula):
+            raise ValueError("Mixed addition {} cannot be the general addition of the multiplier.".format(formula))
+    params = get_baked_params(config)
+    if config.special_prime and params is not None and special_prime_form(params.curve.prime) is None:
+        raise ValueError("The prime of the baked curve {} has no special form.".format(config.curve))
+    return params
 
 
 @public
-def render(config: DeviceConfiguration) -> Tuple[str, str, str]:
+def render(config: DeviceConfiguration, workdir: Optional[str] = None) -> Tuple[str, str, str]:
     """
     Render the `config`dispatching into a temporary directory.
 
+    If a `workdir` is given, it is used instead of a fresh temporary directory. An existing
+    workspace is reused: only the generated files whose content changed are rewritten and
+    stale generated files are removed, so that a subsequent :py:func:`build` only recompiles
+    what changed.
+
     :param config: The configuration to render.
-    :return: The temporary directory, the elf-file name, the hex-file name.
+    :param workdir: The (possibly existing) workspace directory to render into.
+    :return: The temporary directory (or `workdir`), the elf-file name, the hex-file name.
+    :raises ValueError: If the `config` cannot be rendered (see :py:func:`check_config`).
     """
-    temp = tempfile.mkdtemp()
+    params = check_config(config)
+    fixed_field = config.field == Field.FIXED
+    madd = any(is_mixed_addition(formula) for formula in config.formulas)
+    if workdir is None:
+        temp = tempfile.mkdtemp()
+    else:
+        temp = workdir
+        makedirs(temp, exist_ok=True)
+    pool_size = None
+    if config.point_pool:
+        # Without a baked curve, the pool fits the tables for orders of up to POOL_BITS bits.
+        bits = params.order.bit_length() if params is not None else POOL_BITS
+        pool_size = point_pool_size(config.scalarmult, bits)
+    elf_file = "pyecsca-codegen-{}.elf".format(str(config.platform))
+    hex_file = "pyecsca-codegen-{}.hex".format(str(config.platform))
     symlinks = [
         "asn1",
         "bn",
@@ -456,9 +1049,16 @@ def render(config: DeviceConfiguration) -> Tuple[str, str, str]:
         "Makefile.inc",
     ]
     for sym in symlinks:
-        os.symlink(files("pyecsca.codegen").joinpath(sym), path.join(temp, sym))
+        target = str(files("pyecsca.codegen").joinpath(sym))
+        link = path.join(temp, sym)
+        if path.islink(link):
+            if os.readlink(link) == target:
+                continue
+            os.unlink(link)
+        os.symlink(target, link)
     gen_dir = path.join(temp, "gen")
     makedirs(gen_dir, exist_ok=True)
+    stale = set(os.listdir(gen_dir))
 
     save_render(
         temp,
@@ -471,39 +1071,90 @@ def render(config: DeviceConfiguration) -> Tuple[str, str, str]:
             config.mult,
             config.sqr,
             config.defines,
+            config.profile,
+            config.special_prime,
+            config.inv,
+            config.safegcd,
         ),
     )
     save_render(
         temp,
         "main.c",
         render_main(
-            config.model, config.coords, config.keygen, config.ecdh, config.ecdsa
+            config.model,
+            config.coords,
+            config.keygen,
+            config.ecdh,
+            config.ecdsa,
+            params,
+            config.lazy_reduction,
+            config.point_pool,
         ),
     )
+    stale.discard("defs.h")
     save_render(gen_dir, "defs.h", render_defs(config.model, config.coords))
     save_render(
         gen_dir,
         "point.c",
         render_coords_impl(
-            config.coords, getattr(config.scalarmult, "accumulation_order", None)
+            config.coords, getattr(config.scalarmult, "accumulation_order", None), madd, pool_size
         ),
     )
-    save_render(gen_dir, "formulas.c", render_formulas_impl(config.formulas))
+    save_render(gen_dir, "formulas.c", render_formulas_impl(config.formulas, fixed_field))
+    if fixed_field:
+        fe_h, fe_c = render_field_impl(params)
+        stale -= {"fe.h", "fe.c"}
+        save_render(gen_dir, "fe.h", fe_h)
+        save_render(gen_dir, "fe.c", fe_c)
     for formula in config.formulas:
+        name = formula_name(formula)
+        stale.discard(f"formula_{name}.c")
         save_render(
             gen_dir,
-            f"formula_{formula.shortname}.c",
-            render_formula_impl(formula, config.scalarmult.short_circuit),
+            f"formula_{name}.c",
+            render_formula_impl(
+                formula, config.scalarmult.short_circuit, params, config.lazy_reduction, config.scheduling,
+                fixed_field
+            ),
         )
     save_render(gen_dir, "action.c", render_action())
     save_render(gen_dir, "rand.c", render_rand())
     save_render(gen_dir, "curve.c", render_curve_impl(config.model))
-    save_render(gen_dir, "mult.c", render_scalarmult_impl(config.scalarmult))
-    return (
-        temp,
-        "pyecsca-codegen-{}.elf".format(str(config.platform)),
-        "pyecsca-codegen-{}.hex".format(str(config.platform)),
-    )
+    save_render(gen_dir, "mult.c", render_scalarmult_impl(config.scalarmult, config.normalize_tables, madd, config.point_pool))
+    stale -= {"point.c", "formulas.c", "action.c", "rand.c", "curve.c", "mult.c"}
+    if stale:
+        for fname in stale:
+            os.remove(path.join(gen_dir, fname))
+        # The set of linked objects changed, make would not notice that by itself.
+        for fname in (elf_file, hex_file):
+            if path.isfile(path.join(temp, fname)):
+                os.remove(path.join(temp, fname))
+    return temp, elf_file, hex_file
+
+
+@public
+def build_runtime(
+    dir: str, config: DeviceConfiguration, cache: BuildCache
+) -> Optional[str]:
+    """
+    Get the prebuilt runtime library (the configuration-independent C sources) for a `config`
+    from the `cache`. On a miss, the library is built in the rendered directory and stored
+    in the `cache`.
+
+    :param dir: Directory with the rendered implementation of `config`.
+    :param config: The configuration.
+    :param cache: The build cache.
+    :return: The path to the runtime library, or None if it could not be built.
+    """
+    key = cache.runtime_key(config)
+    lib = cache.get_runtime(key)
+    if lib is None:
+        res = subprocess.run(["make", "runtime"], cwd=dir, capture_output=True)
+        if res.returncode != 0:
+            return None
+        lib_file = "libruntime-pyecsca-codegen-{}.a".format(str(config.platform))
+        lib = cache.put_runtime(key, path.join(dir, lib_file))
+    return lib
 
 
 @public
@@ -514,6 +1165,9 @@ def build(
     outdir: str,
     strip: bool = False,
     remove: bool = True,
+    runtime_lib: Optional[str] = None,
+    jobs: Optional[int] = None,
+    verbose: bool = False,
 ) -> subprocess.CompletedProcess:
     """
     Build a rendered configuration.
@@ -524,13 +1178,25 @@ def build(
     :param outdir: Output directory to copy the elf and hex files into.
     :param strip: Whether to strip the resulting binary of debug symbols.
     :param remove: Whether to remove the original directory after build.
+    :param runtime_lib: Path to a prebuilt runtime library to link against (see :py:func:`build_runtime`),
+                        if None the runtime is compiled along with the implementation.
+    :param jobs: The number of parallel make jobs, if None make runs serially.
+    :param verbose: Whether to let the output of make through instead of capturing it.
     :return: The subprocess that ran the build (make).
+    :raises ValueError: If the build fails, the directory is then removed if `remove` is set.
     """
-    res = subprocess.run(["make"], cwd=dir, capture_output=True)
+    command = ["make"]
+    if jobs is not None:
+        command.append("-j{}".format(jobs))
+    if runtime_lib is not None:
+        command.append("RUNTIME_LIB={}".format(path.abspath(runtime_lib)))
+    res = subprocess.run(command, cwd=dir, capture_output=not verbose)
     if res.returncode != 0:
+        if remove:
+            shutil.rmtree(dir)
         raise ValueError("Build failed!")
     if strip:
-        subprocess.run(["make", "strip"], cwd=dir, capture_output=True)
+        subprocess.run(["make", "strip"], cwd=dir, capture_output=not verbose)
     full_elf_path = path.join(dir, elf_file)
     full_hex_path = path.join(dir, hex_file)
     makedirs(outdir, exist_ok=True)
@@ -541,19 +1207,128 @@ def build(
     return res
 
 
+def _render_and_build(
+    config: DeviceConfiguration,
+    outdir: str,
+    strip: bool,
+    remove: bool,
+    cache: Optional[BuildCache],
+    workdir: Optional[str],
+    jobs: Optional[int],
+    verbose: bool,
+) -> Tuple[Optional[str], str, str, Optional[subprocess.CompletedProcess], bool]:
+    if cache is not None:
+        key = cache.key(config, strip)
+        hit = cache.get(key, outdir)
+        if hit is not None:
+            elf_file, hex_file = hit
+            return None, elf_file, hex_file, None, True
+    dir, elf_file, hex_file = render(config, workdir)
+    runtime_lib = build_runtime(dir, config, cache) if cache is not None else None
+    res = build(dir, elf_file, hex_file, outdir, strip, remove and workdir is None, runtime_lib, jobs, verbose)
+    if cache is not None:
+        cache.put(key, path.join(outdir, elf_file), path.join(outdir, hex_file))
+    return dir, elf_file, hex_file, res, False
+
+
 @public
 def render_and_build(
-    config: DeviceConfiguration, outdir: str, strip: bool = False, remove: bool = True
-) -> Tuple[str, str, str, subprocess.CompletedProcess]:
+    config: DeviceConfiguration,
+    outdir: str,
+    strip: bool = False,
+    remove: bool = True,
+    cache: Optional[BuildCache] = None,
+    workdir: Optional[str] = None,
+    jobs: Optional[int] = None,
+    verbose: bool = False,
+) -> Tuple[Optional[str], str, str, Optional[subprocess.CompletedProcess]]:
     """
     Render and build a `config` in one go.
 
+    If a `cache` is given, it is consulted first and on a hit the cached elf and hex files
+    are copied into `outdir` without rendering or compiling. In that case there is no
+    directory and no process, both are returned as None. On a miss the
+    implementation is linked against the prebuilt runtime library from the cache
+    (see :py:func:`build_runtime`) and the freshly built artifacts are stored in the cache.
+
     :param config: The configuration to build.
     :param outdir: Output directory to copy the elf and hex files into.
     :param strip: Whether to strip the resulting binary of debug symbols.
     :param remove: Whether to remove the original directory after build.
-    :return: The subprocess that ran the build (make).
+    :param cache: The build cache to use, if any.
+    :param workdir: The persistent workspace to render and build in incrementally
+                    (see :py:func:`render`), it is never removed.
+    :param jobs: The number of parallel make jobs.
+    :param verbose: Whether to let the output of make through instead of capturing it.
+    :return: The directory, the elf-file name, the hex-file name and the subprocess that ran the build (make).
+    :raises ValueError: If the `config` cannot be rendered (see :py:func:`render`) or the build fails.
     """
-    dir, elf_file, hex_file = render(config)
-    res = build(dir, elf_file, hex_file, outdir, strip, remove)
+    dir, elf_file, hex_file, res, _ = _render_and_build(config, outdir, strip, remove, cache, workdir, jobs,
+                                                        verbose)
     return dir, elf_file, hex_file, res
+
+
+@public
+@dataclass
+class BuildResult:
+    """The result of building one configuration of a batch."""
+
+    config: DeviceConfiguration
+    """The configuration."""
+    outdir: str
+    """The output directory with the elf and hex files."""
+    elf_file: Optional[str]
+    """The elf-file name, if built."""
+    hex_file: Optional[str]
+    """The hex-file name, if built."""
+    status: str
+    """The build status, one of ``"built"``, ``"cached"`` or ``"failed"``."""
+    error: Optional[str] = None
+    """The error message, if the build failed."""
+
+
+def _render_and_build_one(
+    config: DeviceConfiguration, outdir: str, strip: bool, cache: Optional[BuildCache]
+) -> Tuple[Optional[str], Optional[str], str, Optional[str]]:
+    try:
+        _, elf_file, hex_file, _, cached = _render_and_build(config, outdir, strip, True, cache, None, None, False)
+    except Exception as e:
+        return None, None, "failed", str(e)
+    return elf_file, hex_file, "cached" if cached else "built", None
+
+
+@public
+def render_and_build_many(
+    configs: Sequence[DeviceConfiguration],
+    outdir: str,
+    workers: Optional[int] = None,
+    strip: bool = False,
+    cache: Optional[BuildCache] = None,
+) -> List[BuildResult]:
+    """
+    Render and build many `configs` in parallel, using a pool of `workers` processes.
+
+    Each configuration is built into its own subdirectory of `outdir`, named by the
+    configuration identifier (see :py:func:`pyecsca.codegen.cache.config_id`). A failure
+    to build one configuration does not stop the others.
+
+    :param configs: The configurations to build.
+    :param outdir: Output directory, the artifacts of each configuration go into a subdirectory.
+    :param workers: The number of worker processes (defaults to the number of CPUs).
+    :param strip: Whether to strip the resulting binaries of debug symbols.
+    :param cache: The build cache to use, if any.
+    :return: The build results, in the order of `configs`.
+    """
+    outdirs = [path.join(outdir, config_id(config)) for config in configs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_render_and_build_one, config, config_outdir, strip, cache)
+            for config, config_outdir in zip(configs, outdirs)
+        ]
+        results = []
+        for config, config_outdir, future in zip(configs, outdirs, futures):
+            elf_file, hex_file, status, error = future.result()
+            results.append(
+                BuildResult(config, config_outdir, elf_file, hex_file, status, error)
+            )
+    return results
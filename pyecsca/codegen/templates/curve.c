@@ -8,6 +8,7 @@ curve_t* curve_new(void) {
 	bn_init(&result->{{ param }});
 	{%- endfor %}
 	bn_red_init(&result->p_red);
+	bn_red_init(&result->n_red);
 	result->generator = point_new();
 	result->neutral = point_new();
 
@@ -19,6 +20,7 @@ void curve_free(curve_t *curve) {
 	bn_clear(&curve->{{ param }});
 	{%- endfor %}
 	bn_red_clear(&curve->p_red);
+	bn_red_clear(&curve->n_red);
 	if (curve->generator) {
 		point_free(curve->generator);
 	}
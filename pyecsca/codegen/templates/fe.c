@@ -0,0 +1,227 @@
+#include "fe.h"
+
+#if REDUCTION != RED_MONTGOMERY
+#error "The fixed-width field elements need the Montgomery reduction."
+#endif
+
+/* The prime, -1/p mod 2^MP_DIGIT_BIT and R^2 mod p, of the current curve. */
+static fe_t fe_p;
+static bn_digit fe_rho;
+static fe_t fe_r2;
+static const curve_t *fe_curve;
+/* A scratch bn for the operations that are done by the bn reduction (division and exponentiation). */
+static bn_t fe_tmp;
+
+bool fe_init(void) {
+	return bn_init(&fe_tmp) == BN_OKAY;
+}
+
+/**
+ * Sets up the field of the curve, its prime needs to have FE_BITS bits.
+ */
+void fe_set_curve(const curve_t *curve) {
+	fe_curve = curve;
+	fe_from_bn(&curve->p, &fe_p);
+	fe_rho = curve->p_red.montgomery_digit;
+	fe_from_bn(&curve->p_red.montgomery_renorm_sqr, &fe_r2);
+}
+
+void fe_clear(void) {
+	bn_clear(&fe_tmp);
+}
+
+void fe_from_bn(const bn_t *one, fe_t *out) {
+	int i;
+	for (i = 0; i < FE_LIMBS && i < one->used; i++) {
+		out->d[i] = one->dp[i];
+	}
+	for (; i < FE_LIMBS; i++) {
+		out->d[i] = 0;
+	}
+}
+
+void fe_to_bn(const fe_t *one, bn_t *out) {
+	if (mp_grow(out, FE_LIMBS) != MP_OKAY) {
+		return;
+	}
+	for (int i = FE_LIMBS; i < out->used; i++) {
+		out->dp[i] = 0;
+	}
+	for (int i = 0; i < FE_LIMBS; i++) {
+		out->dp[i] = one->d[i];
+	}
+	out->used = FE_LIMBS;
+	out->sign = MP_ZPOS;
+	mp_clamp(out);
+}
+
+/**
+ * Sets the element to a small value (in the Montgomery form).
+ */
+void fe_from_int(unsigned int value, fe_t *out) {
+	fe_t raw;
+	bn_digit rest = value;
+	for (int i = 0; i < FE_LIMBS; i++) {
+		raw.d[i] = rest & MP_MASK;
+		rest >>= MP_DIGIT_BIT;
+	}
+	fe_mul(&raw, &fe_r2, out);
+}
+
+void fe_zero(fe_t *out) {
+	for (int i = 0; i < FE_LIMBS; i++) {
+		out->d[i] = 0;
+	}
+}
+
+void fe_copy(const fe_t *one, fe_t *out) {
+	for (int i = 0; i < FE_LIMBS; i++) {
+		out->d[i] = one->d[i];
+	}
+}
+
+/**
+ * Sets out = t + carry * 2^(MP_DIGIT_BIT * FE_LIMBS) reduced by one conditional
+ * subtraction of p (without a branch), the value needs to be below 2p.
+ */
+static void fe_reduce_once(const bn_digit *t, bn_digit carry, fe_t *out) {
+	bn_digit u[FE_LIMBS];
+	bn_digit borrow = 0;
+	for (int i = 0; i < FE_LIMBS; i++) {
+		bn_digit d = t[i] - fe_p.d[i] - borrow;
+		u[i] = d & MP_MASK;
+		borrow = d >> (sizeof(bn_digit) * 8 - 1);
+	}
+	/* Keep t if t - p borrowed and there was no carry. */
+	bn_digit keep = (bn_digit) 0 - (borrow & (carry ^ 1));
+	for (int i = 0; i < FE_LIMBS; i++) {
+		out->d[i] = (t[i] & keep) | (u[i] & ~keep);
+	}
+}
+
+void fe_add(const fe_t *one, const fe_t *other, fe_t *out) {
+	bn_digit t[FE_LIMBS];
+	bn_digit carry = 0;
+	for (int i = 0; i < FE_LIMBS; i++) {
+		bn_digit s = one->d[i] + other->d[i] + carry;
+		t[i] = s & MP_MASK;
+		carry = s >> MP_DIGIT_BIT;
+	}
+	fe_reduce_once(t, carry, out);
+}
+
+void fe_sub(const fe_t *one, const fe_t *other, fe_t *out) {
+	bn_digit t[FE_LIMBS];
+	bn_digit borrow = 0;
+	for (int i = 0; i < FE_LIMBS; i++) {
+		bn_digit d = one->d[i] - other->d[i] - borrow;
+		t[i] = d & MP_MASK;
+		borrow = d >> (sizeof(bn_digit) * 8 - 1);
+	}
+	/* Add p back (without a branch) if it borrowed. */
+	bn_digit mask = (bn_digit) 0 - borrow;
+	bn_digit carry = 0;
+	for (int i = 0; i < FE_LIMBS; i++) {
+		bn_digit s = t[i] + (fe_p.d[i] & mask) + carry;
+		out->d[i] = s & MP_MASK;
+		carry = s >> MP_DIGIT_BIT;
+	}
+}
+
+void fe_neg(const fe_t *one, fe_t *out) {
+	fe_t zero;
+	fe_zero(&zero);
+	fe_sub(&zero, one, out);
+}
+
+/* acc += one * other, compilers emit a single multiply-accumulate (e.g. UMLAL on Cortex-M3/M4) for it. */
+#define FE_MAC(acc, one, other) ((acc) += (fe_word) (one) * (other))
+
+/*
+ * The Montgomery multiplication and squaring scan the product by columns and interleave the
+ * reduction (FIPS), a column of products of digits fits into the double-digit accumulator.
+ * The results are below 2p before the final conditional subtraction.
+ */
+
+/**
+ * Montgomery multiplication, out = one * other / R mod p.
+ */
+void fe_mul(const fe_t *one, const fe_t *other, fe_t *out) {
+	bn_digit m[FE_LIMBS];
+	bn_digit t[FE_LIMBS];
+	fe_word acc = 0;
+	for (int i = 0; i < FE_LIMBS; i++) {
+		for (int j = 0; j < i; j++) {
+			FE_MAC(acc, one->d[j], other->d[i - j]);
+			FE_MAC(acc, m[j], fe_p.d[i - j]);
+		}
+		FE_MAC(acc, one->d[i], other->d[0]);
+		m[i] = ((bn_digit) acc * fe_rho) & MP_MASK;
+		FE_MAC(acc, m[i], fe_p.d[0]);
+		acc >>= MP_DIGIT_BIT;
+	}
+	for (int i = FE_LIMBS; i < 2 * FE_LIMBS; i++) {
+		for (int j = i - FE_LIMBS + 1; j < FE_LIMBS; j++) {
+			FE_MAC(acc, one->d[j], other->d[i - j]);
+			FE_MAC(acc, m[j], fe_p.d[i - j]);
+		}
+		t[i - FE_LIMBS] = (bn_digit) acc & MP_MASK;
+		acc >>= MP_DIGIT_BIT;
+	}
+	fe_reduce_once(t, (bn_digit) acc, out);
+}
+
+/**
+ * Montgomery squaring, out = one^2 / R mod p, the products of distinct digits are computed once (doubled).
+ */
+void fe_sqr(const fe_t *one, fe_t *out) {
+	bn_digit m[FE_LIMBS];
+	bn_digit t[FE_LIMBS];
+	bn_digit twice[FE_LIMBS];
+	fe_word acc = 0;
+	for (int i = 0; i < FE_LIMBS; i++) {
+		twice[i] = one->d[i] << 1;
+	}
+	for (int i = 0; i < FE_LIMBS; i++) {
+		for (int j = 0; j < i - j; j++) {
+			FE_MAC(acc, twice[j], one->d[i - j]);
+		}
+		if ((i & 1) == 0) {
+			FE_MAC(acc, one->d[i / 2], one->d[i / 2]);
+		}
+		for (int j = 0; j < i; j++) {
+			FE_MAC(acc, m[j], fe_p.d[i - j]);
+		}
+		m[i] = ((bn_digit) acc * fe_rho) & MP_MASK;
+		FE_MAC(acc, m[i], fe_p.d[0]);
+		acc >>= MP_DIGIT_BIT;
+	}
+	for (int i = FE_LIMBS; i < 2 * FE_LIMBS; i++) {
+		for (int j = i - FE_LIMBS + 1; j < i - j; j++) {
+			FE_MAC(acc, twice[j], one->d[i - j]);
+		}
+		if ((i & 1) == 0 && i / 2 < FE_LIMBS) {
+			FE_MAC(acc, one->d[i / 2], one->d[i / 2]);
+		}
+		for (int j = i - FE_LIMBS + 1; j < FE_LIMBS; j++) {
+			FE_MAC(acc, m[j], fe_p.d[i - j]);
+		}
+		t[i - FE_LIMBS] = (bn_digit) acc & MP_MASK;
+		acc >>= MP_DIGIT_BIT;
+	}
+	fe_reduce_once(t, (bn_digit) acc, out);
+}
+
+void fe_div(const fe_t *one, const fe_t *other, fe_t *out) {
+	fe_t inv;
+	fe_to_bn(other, &fe_tmp);
+	bn_red_inv(&fe_tmp, &fe_curve->p, &fe_curve->p_red, &fe_tmp);
+	fe_from_bn(&fe_tmp, &inv);
+	fe_mul(one, &inv, out);
+}
+
+void fe_pow(const fe_t *one, const bn_t *exp, fe_t *out) {
+	fe_to_bn(one, &fe_tmp);
+	bn_red_pow(&fe_tmp, exp, &fe_curve->p, &fe_curve->p_red, &fe_tmp);
+	fe_from_bn(&fe_tmp, out);
+}
@@ -0,0 +1,44 @@
+#ifndef FE_H_
+#define FE_H_
+
+#include "defs.h"
+
+/*
+ * Fixed-width field elements for a prime of FE_BITS bits.
+ *
+ * The limbs have the radix of the libtommath digits, so that an element is in the Montgomery
+ * form of the bn reduction (R = 2^(MP_DIGIT_BIT * FE_LIMBS)) and converts from and to a bn_t
+ * by copying the digits. The elements are always fully reduced.
+ */
+#define FE_BITS {{ bits }}
+#define FE_LIMBS ((FE_BITS + MP_DIGIT_BIT - 1) / MP_DIGIT_BIT)
+
+#if MP_DIGIT_BIT > 32
+typedef unsigned __int128 fe_word;
+#else
+typedef uint64_t fe_word;
+#endif
+
+typedef struct {
+	bn_digit d[FE_LIMBS];
+} fe_t;
+
+bool fe_init(void);
+void fe_set_curve(const curve_t *curve);
+void fe_clear(void);
+
+void fe_from_bn(const bn_t *one, fe_t *out);
+void fe_to_bn(const fe_t *one, bn_t *out);
+void fe_from_int(unsigned int value, fe_t *out);
+void fe_zero(fe_t *out);
+void fe_copy(const fe_t *one, fe_t *out);
+
+void fe_add(const fe_t *one, const fe_t *other, fe_t *out);
+void fe_sub(const fe_t *one, const fe_t *other, fe_t *out);
+void fe_neg(const fe_t *one, fe_t *out);
+void fe_mul(const fe_t *one, const fe_t *other, fe_t *out);
+void fe_sqr(const fe_t *one, fe_t *out);
+void fe_div(const fe_t *one, const fe_t *other, fe_t *out);
+void fe_pow(const fe_t *one, const bn_t *exp, fe_t *out);
+
+#endif //FE_H_
@@ -1,16 +1,23 @@
 #include "point.h"
 #include "action.h"
 #include "hal/hal.h"
-{% import "ops.c" as ops %}
+{%- if fixed_field %}
+#include "fe.h"
+{%- endif %}
+{% import ops_template as ops %}
 {% from "action.c" import start_action, end_action %}
 
-{{ ops.render_static_init(allocations, formula.shortname) }}
+/* Optimization saved {{ saved.M }}M + {{ saved.S }}S. Peak live temporaries: {{ temporaries }}. */
 
-{{ ops.render_static_zero(allocations, formula.shortname) }}
+{{ ops.render_static_init(allocations, name, initializations) }}
 
-{{ ops.render_static_clear(frees, formula.shortname) }}
+{{ ops.render_static_set_curve(initializations, invariant_operations, name, multiples, curve_loads) }}
 
-__attribute__((noinline)) void point_add(const point_t *one, const point_t *other, const curve_t *curve, point_t *out_one) {
+{{ ops.render_static_zero(allocations, name, invariants) }}
+
+{{ ops.render_static_clear(frees, name) }}
+
+__attribute__((noinline)) void point_{{ name }}(const point_t *one, const point_t *other, const curve_t *curve, point_t *out_one) {
 	{{ start_action("add") }}
 	//NOP_128();
 	{%- if short_circuit %}
@@ -23,7 +30,7 @@ __attribute__((noinline)) void point_add(const point_t *one, const point_t *othe
 			goto end;
 		}
 	{%- endif %}
-	{{ ops.render_initializations(initializations) }}
+	{{ ops.render_loads(loads) }}
 	{{ ops.render_ops(operations) }}
 	{{ ops.render_returns(returns) }}
 	//NOP_128();
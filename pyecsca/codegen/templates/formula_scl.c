@@ -1,12 +1,19 @@
 #include "point.h"
 #include "action.h"
 #include "hal/hal.h"
-{% import "ops.c" as ops %}
+{%- if fixed_field %}
+#include "fe.h"
+{%- endif %}
+{% import ops_template as ops %}
 {% from "action.c" import start_action, end_action %}
 
-{{ ops.render_static_init(allocations, formula.shortname) }}
+/* Optimization saved {{ saved.M }}M + {{ saved.S }}S. Peak live temporaries: {{ temporaries }}. */
 
-{{ ops.render_static_zero(allocations, formula.shortname) }}
+{{ ops.render_static_init(allocations, formula.shortname, initializations) }}
+
+{{ ops.render_static_set_curve(initializations, invariant_operations, formula.shortname, multiples, curve_loads) }}
+
+{{ ops.render_static_zero(allocations, formula.shortname, invariants) }}
 
 {{ ops.render_static_clear(frees, formula.shortname) }}
 
@@ -19,7 +26,7 @@ __attribute__((noinline)) void point_scl(const point_t *one, const curve_t *curv
 			goto end;
 		}
 	{%- endif %}
-	{{ ops.render_initializations(initializations) }}
+	{{ ops.render_loads(loads) }}
 	{{ ops.render_ops(operations) }}
 	{{ ops.render_returns(returns) }}
 	//NOP_128();
@@ -1,13 +1,28 @@
 #include "point.h"
 #include "formulas.h"
+{%- if fixed_field %}
+#include "fe.h"
+{%- endif %}
 
 
 void formulas_init(void) {
+	{%- if fixed_field %}
+	fe_init();
+	{%- endif %}
 	{%- for name in names %}
 	point_{{ name }}_init();
 	{%- endfor %}
 }
 
+void formulas_set_curve(const curve_t *curve) {
+	{%- if fixed_field %}
+	fe_set_curve(curve);
+	{%- endif %}
+	{%- for name in names %}
+	point_{{ name }}_set_curve(curve);
+	{%- endfor %}
+}
+
 void formulas_zero(void) {
     {%- for name in names %}
 	point_{{ name }}_zero();
@@ -18,4 +33,7 @@ void formulas_clear(void) {
 	{%- for name in names %}
 	point_{{ name }}_clear();
 	{%- endfor %}
+	{%- if fixed_field %}
+	fe_clear();
+	{%- endif %}
 }
\ No newline at end of file
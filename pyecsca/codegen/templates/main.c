@@ -71,6 +71,7 @@ static uint8_t cmd_init_prng(uint8_t *data, uint16_t len) {
     return 0;
 }
 
+{%- if not baked %}
 /**
  * Callback function to `parse_data` that is used for the set_params
  * command and that loads curve parameters from the command data and
@@ -81,7 +82,7 @@ static void parse_set_params(const char *path, const uint8_t *data, size_t len,
 		switch (*path) {
 		{%- for param in curve_parameters + ["p", "n", "h"] %}
 			case '{{ param }}': bn_from_bin(data, len, &curve->{{ param }});
-			{% if param == "p" %}
+			{% if param in ("p", "n") %}
 								bn_red_setup(&curve->{{ param }}, &curve->{{ param }}_red);
 			{%- endif %}
 								return;
@@ -114,11 +115,16 @@ static void parse_set_params(const char *path, const uint8_t *data, size_t len,
 	}
 	{%- endfor %}
 }
+{%- endif %}
 
 /**
  * "Command": Set curve parameters.
  */
 static uint8_t cmd_set_params(uint8_t *data, uint16_t len) {
+    {%- if baked %}
+    // The curve is baked into the implementation (and the formulas are specialized to it).
+    return 0;
+    {%- else %}
     // need p, [params], n, h, g[xy], i[variables]
 	fat_t affine[2] = {fat_empty, fat_empty};
 	parse_data(data, len, "", parse_set_params, (void *) affine);
@@ -141,9 +147,55 @@ static uint8_t cmd_set_params(uint8_t *data, uint16_t len) {
 	bn_clear(&y);
 	free(affine[0].value);
 	free(affine[1].value);
+	{%- if lazy_bound %}
+	if (!bn_red_lazy_ok(&curve->p, {{ lazy_bound }})) {
+		// The formulas reduce lazily, the prime does not leave enough headroom for that.
+		return 1;
+	}
+	{%- endif %}
+	formulas_set_curve(curve);
 	return 0;
+	{%- endif %}
 }
 
+{%- if baked %}
+
+/**
+ * Set the baked curve parameters on the `curve` used by the implementation.
+ */
+static void set_baked_params(void) {
+	bn_from_hex("{{ baked.p }}", &curve->p);
+	bn_red_setup(&curve->p, &curve->p_red);
+	bn_from_hex("{{ baked.n }}", &curve->n);
+	bn_red_setup(&curve->n, &curve->n_red);
+	bn_from_hex("{{ baked.h }}", &curve->h);
+	{%- for param, value in baked.params.items() %}
+	bn_from_hex("{{ value }}", &curve->{{ param }});
+	bn_red_encode(&curve->{{ param }}, &curve->p, &curve->p_red);
+	{%- endfor %}
+	{%- if baked.neutral is none %}
+	curve->neutral->infinity = true;
+	{%- else %}
+	curve->neutral->infinity = false;
+	{%- for variable, value in baked.neutral.items() %}
+	bn_from_hex("{{ value }}", &curve->neutral->{{ variable }});
+	{%- endfor %}
+	point_red_encode(curve->neutral, curve);
+	{%- endif %}
+
+	bn_t x; bn_init(&x);
+	bn_t y; bn_init(&y);
+	bn_from_hex("{{ baked.gx }}", &x);
+	bn_from_hex("{{ baked.gy }}", &y);
+	bn_red_encode(&x, &curve->p, &curve->p_red);
+	bn_red_encode(&y, &curve->p, &curve->p_red);
+	point_from_affine(&x, &y, curve, curve->generator);
+	bn_clear(&x);
+	bn_clear(&y);
+	formulas_set_curve(curve);
+}
+{%- endif %}
+
 /**
  * "Command": Generate a keypair on a curve (needs an initialized
  * PRNG and a curve setup), replies with the privkey and affine pubkey.
@@ -440,15 +492,19 @@ static uint8_t cmd_ecdsa_sign(uint8_t *data, uint16_t len) {
 
 	bn_mod(&r, &curve->n, &r);
 	// r = ([k]G).x mod n
+	bn_mod(&h, &curve->n, &h);
 
+	// Only x and k are encoded for the reduction mod n, a product of an encoded and a plain value is plain.
 	bn_t s; bn_init(&s);
 	bn_copy(&privkey, &s);
+	bn_red_encode(&s, &curve->n, &curve->n_red);
 	// s = x
-	bn_mod_mul(&s, &r, &curve->n, &s);
+	bn_red_mul(&s, &r, &curve->n, &curve->n_red, &s);
 	// s = rx mod n
-	bn_mod_add(&s, &h, &curve->n, &s);
+	bn_red_add(&s, &h, &curve->n, &curve->n_red, &s);
 	// s = rx + H(m) mod n
-	bn_mod_div(&s, &k, &curve->n, &s);
+	bn_red_encode(&k, &curve->n, &curve->n_red);
+	bn_red_div(&s, &k, &curve->n, &curve->n_red, &s);
 	// s = k^(-1)*(rx + H(m)) mod n
 
 	size_t result_len = 0;
@@ -502,18 +558,22 @@ static uint8_t cmd_ecdsa_verify(uint8_t *data, uint16_t len) {
 		free(sig.value);
 		return 0;
 	}
-	bn_t orig_r; bn_init(&orig_r);
-	bn_copy(&r, &orig_r);
-
-	bn_mod_inv(&s, &curve->n, &s);
-	bn_mod_mul(&r, &s, &curve->n, &r); //r = u2
-	bn_mod_mul(&h, &s, &curve->n, &h); //h = u1
+	// The inverse of s is encoded for the reduction mod n, its products with the plain h and r are plain.
+	bn_t u[2];
+	bn_init(&u[0]);
+	bn_init(&u[1]);
+	bn_mod(&h, &curve->n, &u[0]);
+	bn_copy(&r, &u[1]);
+	bn_mod(&s, &curve->n, &s);
+	bn_red_encode(&s, &curve->n, &curve->n_red);
+	bn_red_inv(&s, &curve->n, &curve->n_red, &s);
+	bn_red_mul_batch(&s, u, 2, &curve->n, &curve->n_red, u); //u = [u1, u2]
 
 	point_t *p1 = point_new();
 	point_t *p2 = point_new();
 
-	scalar_mult(&h, curve->generator, curve, p1);
-	scalar_mult(&r, pubkey, curve, p2);
+	scalar_mult(&u[0], curve->generator, curve, p1);
+	scalar_mult(&u[1], pubkey, curve, p2);
 
 	point_add(p1, p2, curve, p1);
 	bn_t x; bn_init(&x);
@@ -521,7 +581,7 @@ static uint8_t cmd_ecdsa_verify(uint8_t *data, uint16_t len) {
 	bn_red_decode(&x, &curve->p, &curve->p_red);
 	bn_mod(&x, &curve->n, &x);
 
-	bool result = bn_eq(&orig_r, &x);
+	bool result = bn_eq(&r, &x);
 	uint8_t res_data[1] = {(uint8_t) result};
 	{{ end_action("ecdsa_verify") }}
 
@@ -529,7 +589,8 @@ static uint8_t cmd_ecdsa_verify(uint8_t *data, uint16_t len) {
 	point_free(p1);
 	point_free(p2);
 	bn_clear(&x);
-	bn_clear(&orig_r);
+	bn_clear(&u[0]);
+	bn_clear(&u[1]);
 	bn_clear(&h);
 	bn_clear(&r);
 	bn_clear(&s);
@@ -566,12 +627,18 @@ __attribute__((noinline)) void init_implementation(void) {
     // Initialize some components that preallocate stuff.
     prng_init();
     formulas_init();
+    {%- if point_pool %}
+    point_pool_init();
+    {%- endif %}
     math_init();
 
     // Allocate space for the curve, pubkey and privkey.
     curve = curve_new();
     pubkey = point_new();
     bn_init(&privkey);
+    {%- if baked %}
+    set_baked_params();
+    {%- endif %}
 }
 
 __attribute__((noinline)) void init(void) {
@@ -589,6 +656,9 @@ __attribute__((noinline)) void deinit(void) {
     curve_free(curve);
     point_free(pubkey);
     formulas_clear();
+    {%- if point_pool %}
+    point_pool_clear();
+    {%- endif %}
 }
 
 int main(void) {
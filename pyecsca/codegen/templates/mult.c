@@ -1,3 +1,8 @@
+{#- The input point (mapped from affine coordinates) and the normalized tables have Z = 1, with a mixed
+    addition these are added with it. The negation of a point keeps its Z coordinate. #}
+{%- set accumulate_point = "point_accumulate_mixed" if madd else "point_accumulate" %}
+{%- set accumulate_table = "point_accumulate_mixed" if madd and normalize_tables else "point_accumulate" %}
+{%- set add_point = "point_madd" if madd else "point_add" %}
 
 {%- if isinstance(scalarmult, LTRMultiplier) -%}
 
@@ -64,6 +69,12 @@
 void scalar_mult(bn_t *scalar, point_t *point, curve_t *curve, point_t *out) {
 	{{ start_action("mult") }}
 	formulas_zero();
+	{%- if point_pool %}
+	point_pool_begin();
+	{%- endif %}
 	scalar_mult_inner(scalar, point, curve, out);
+	{%- if point_pool %}
+	point_pool_end();
+	{%- endif %}
 	{{ end_action("mult") }}
 }
\ No newline at end of file
@@ -22,6 +22,9 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
         }
     }
     point_free(current);
+    {%- if normalize_tables %}
+    point_normalize_batch(points, d, curve);
+    {%- endif %}
 
     small_base_t *bs = bn_convert_base_small(scalar, {{ 2**scalarmult.width }});
 
@@ -29,13 +32,13 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
         {%- if scalarmult.direction == ProcessingDirection.RTL %}
             for (int i = 0; i < bs->length; i++) {
                 if (bs->data[i] == j) {
-                    point_accumulate(b, points[i], curve, b);
+                    {{ accumulate_table }}(b, points[i], curve, b);
                 }
             }
         {%- else %}
             for (int i = bs->length - 1; i >= 0; i--) {
                 if (bs->data[i] == j) {
-                    point_accumulate(b, points[i], curve, b);
+                    {{ accumulate_table }}(b, points[i], curve, b);
                 }
             }
         {%- endif -%}
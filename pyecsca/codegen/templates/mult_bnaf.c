@@ -30,14 +30,14 @@ point_t *scalar_mult_ltr(point_t *point, point_t *neg, curve_t *curve, wnaf_t *n
         {% endif %}
 
 		if (naf->data[i] == 1) {
-			point_accumulate(q, point, curve, q);
+			{{ accumulate_point }}(q, point, curve, q);
 			{% if scalarmult.always %}
-                point_accumulate(q_copy, neg, curve, q_copy);
+                {{ accumulate_point }}(q_copy, neg, curve, q_copy);
             {% endif %}
 		} else if (naf->data[i] == -1) {
-			point_accumulate(q, neg, curve, q);
+			{{ accumulate_point }}(q, neg, curve, q);
 			{% if scalarmult.always %}
-                point_accumulate(q_copy, point, curve, q_copy);
+                {{ accumulate_point }}(q_copy, point, curve, q_copy);
             {% endif %}
 		}
 	}
@@ -13,13 +13,13 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
     point_t *dbl = point_new();
     point_dbl(current, curve, dbl);
     points[0] = point_copy(current);
-    {% if scalarmult.precompute_negation %}
+    {% if scalarmult.precompute_negation and not normalize_tables %}
         points_neg[0] = point_new();
         point_neg(points[0], curve, points_neg[0]);
     {% endif %}
     {% if scalarmult.width > 1 %}
         points[1] = point_copy(dbl);
-        {% if scalarmult.precompute_negation %}
+        {% if scalarmult.precompute_negation and not normalize_tables %}
             points_neg[1] = point_new();
             point_neg(points[1], curve, points_neg[1]);
         {% endif %}
@@ -28,9 +28,9 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
     point_set(dbl, current);
     {% if scalarmult.width > 2 %}
         for (long i = 2; i < {{ 2 ** (scalarmult.width - 1) }}; i++) {
-            point_add(current, point, curve, current);
+            {{ add_point }}(current, point, curve, current);
             points[i] = point_copy(current);
-            {% if scalarmult.precompute_negation %}
+            {% if scalarmult.precompute_negation and not normalize_tables %}
                 points_neg[i] = point_new();
                 point_neg(points[i], curve, points_neg[i]);
             {% endif %}
@@ -38,6 +38,15 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
     {% endif %}
     point_free(current);
     point_free(dbl);
+    {%- if normalize_tables %}
+    point_normalize_batch(points, {{ 2 ** (scalarmult.width - 1) }}, curve);
+        {%- if scalarmult.precompute_negation %}
+    for (long i = 0; i < {{ 2 ** (scalarmult.width - 1) }}; i++) {
+        points_neg[i] = point_new();
+        point_neg(points[i], curve, points_neg[i]);
+    }
+        {%- endif %}
+    {%- endif %}
 
     size_t bits = bn_bit_length(&curve->n);
 
@@ -51,13 +60,13 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
         }
         int32_t val = bs->data[i];
         if (val > 0) {
-            point_accumulate(q, points[val - 1], curve, q);
+            {{ accumulate_table }}(q, points[val - 1], curve, q);
         } else if (val < 0) {
             {% if scalarmult.precompute_negation %}
-                point_accumulate(q, points_neg[-val - 1], curve, q);
+                {{ accumulate_table }}(q, points_neg[-val - 1], curve, q);
             {% else %}
                 point_neg(points[-val - 1], curve, neg);
-                point_accumulate(q, neg, curve, q);
+                {{ accumulate_table }}(q, neg, curve, q);
             {% endif %}
         }
     }
@@ -34,6 +34,10 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
 	    }
         points[j] = alloc_point;
 	}
+	{%- if normalize_tables %}
+	/* The first entry (the empty combination) is not a point. */
+	point_normalize_batch(points + 1, {{ 2**scalarmult.width - 1 }}, curve);
+	{%- endif %}
 
 	bn_t base; bn_init(&base);
 	bn_from_int(1, &base);
@@ -53,14 +57,14 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
             }
         }
         if (word) {
-            point_accumulate(q, points[word], curve, q);
+            {{ accumulate_table }}(q, points[word], curve, q);
         } else {
             {% if scalarmult.always %}
                 int j = i % {{ 2**scalarmult.width }};
                 if (j == 0) {
-                    point_accumulate(q, point, curve, dummy);
+                    {{ accumulate_point }}(q, point, curve, dummy);
                 } else {
-                    point_accumulate(q, points[j], curve, dummy);
+                    {{ accumulate_table }}(q, points[j], curve, dummy);
                 }
             {% endif %}
         }
@@ -70,7 +74,7 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
 
 
     {%- if "scl" in scalarmult.formulas %}
-    	point_scl(a, curve, a);
+    	point_scl(q, curve, q);
     {%- endif %}
     point_set(q, out);
     for (int i = 0; i < {{ scalarmult.width }}; i++) {
@@ -8,7 +8,7 @@ void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, point_t *ou
 	int nbits = bn_bit_length(scalar);
 	for (int i = nbits - 2; i >= 0; i--) {
 	  point_dbl(p0, curve, p0);
-	  point_add(p0, point, curve, p1);
+	  {{ add_point }}(p0, point, curve, p1);
 	  if (bn_get_bit(scalar, i) != 0) {
 		 point_set(p1, p0);
 	  }
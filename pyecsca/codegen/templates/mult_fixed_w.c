@@ -32,12 +32,15 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
     point_set(dbl, current);
     {% if scalarmult.m > 3 %}
         for (long i = 2; i < {{ scalarmult.m - 1 }}; i++) {
-            point_add(current, point, curve, current);
+            {{ add_point }}(current, point, curve, current);
             points[i] = point_copy(current);
         }
     {% endif %}
     point_free(current);
     point_free(dbl);
+    {%- if normalize_tables %}
+    point_normalize_batch(points, {{ scalarmult.m - 1 }}, curve);
+    {%- endif %}
 
     small_base_t *bs = bn_convert_base_small(scalar, {{ scalarmult.m }});
 
@@ -50,7 +53,7 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
 
 		int val = bs->data[i];
 		if (val) {
-			point_accumulate(q, points[val-1], curve, q);
+			{{ accumulate_table }}(q, points[val-1], curve, q);
         }
 	}
 	bn_small_base_clear(bs);
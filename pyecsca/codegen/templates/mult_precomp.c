@@ -14,10 +14,10 @@ void scalar_mult_ltr(int order_blen, point_t **points, bn_t *scalar, point_t *po
 
     for (int i = nbits; i >= 0; i--) {
         if (bn_get_bit(scalar, i) == 1) {
-            point_accumulate(point, points[i], curve, point);
+            {{ accumulate_table }}(point, points[i], curve, point);
         } else {
         	{%- if scalarmult.always %}
-			    point_accumulate(point, points[i], curve, dummy);
+			    {{ accumulate_table }}(point, points[i], curve, dummy);
 			{%- endif %}
         }
     }
@@ -40,10 +40,10 @@ void scalar_mult_rtl(int order_blen, point_t **points, bn_t *scalar, point_t *po
 
     for (int i = 0; i < nbits; i++) {
         if (bn_get_bit(scalar, i) == 1) {
-            point_accumulate(point, points[i], curve, point);
+            {{ accumulate_table }}(point, points[i], curve, point);
         } else {
             {%- if scalarmult.always %}
-			    point_accumulate(point, points[i], curve, dummy);
+			    {{ accumulate_table }}(point, points[i], curve, dummy);
 			{%- endif %}
         }
     }
@@ -66,6 +66,9 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
         }
     }
     point_free(current);
+    {%- if normalize_tables %}
+    point_normalize_batch(points, order_blen + 1, curve);
+    {%- endif %}
 
     {%- if scalarmult.direction == ProcessingDirection.LTR %}
         scalar_mult_ltr(order_blen, points, scalar, q, curve);
@@ -16,6 +16,9 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
     }
     point_free(current);
     point_free(dbl);
+    {%- if normalize_tables %}
+    point_normalize_batch(points, {{ 2 ** (scalarmult.width - 1) }}, curve);
+    {%- endif %}
 
     {% if scalarmult.recoding_direction == ProcessingDirection.LTR %}
 	    wsliding_t *ws = bn_wsliding_ltr(scalar, {{ scalarmult.width }});
@@ -27,7 +30,7 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
 		point_dbl(q, curve, q);
 		uint8_t val = ws->data[i];
 		if (val) {
-			point_accumulate(q, points[(val - 1) / 2], curve, q);
+			{{ accumulate_table }}(q, points[(val - 1) / 2], curve, q);
         }
 	}
 
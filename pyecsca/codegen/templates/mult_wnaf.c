@@ -15,7 +15,7 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
     point_dbl(current, curve, dbl);
     for (long i = 0; i < {{ 2 ** (scalarmult.width - 2) }}; i++) {
         points[i] = point_copy(current);
-        {%- if scalarmult.precompute_negation %}
+        {%- if scalarmult.precompute_negation and not normalize_tables %}
             points_neg[i] = point_copy(current);
             point_neg(points_neg[i], curve, points_neg[i]);
         {%- endif %}
@@ -25,6 +25,15 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
     }
     point_free(current);
     point_free(dbl);
+    {%- if normalize_tables %}
+    point_normalize_batch(points, {{ 2 ** (scalarmult.width - 2) }}, curve);
+        {%- if scalarmult.precompute_negation %}
+    for (long i = 0; i < {{ 2 ** (scalarmult.width - 2) }}; i++) {
+        points_neg[i] = point_new();
+        point_neg(points[i], curve, points_neg[i]);
+    }
+        {%- endif %}
+    {%- endif %}
 
 	wnaf_t *naf = bn_wnaf(scalar, {{ scalarmult.width }});
 
@@ -32,13 +41,13 @@ static void scalar_mult_inner(bn_t *scalar, point_t *point, curve_t *curve, poin
 		point_dbl(q, curve, q);
 		int8_t val = naf->data[i];
 		if (val > 0) {
-			point_accumulate(q, points[(val - 1) / 2], curve, q);
+			{{ accumulate_table }}(q, points[(val - 1) / 2], curve, q);
 		} else if (val < 0) {
 		    {%- if scalarmult.precompute_negation %}
-		        point_accumulate(q, points_neg[(-val - 1) / 2], curve, q);
+		        {{ accumulate_table }}(q, points_neg[(-val - 1) / 2], curve, q);
 		    {%- else %}
 		        point_neg(points[(-val - 1) / 2], curve, neg);
-                point_accumulate(q, neg, curve, q);
+                {{ accumulate_table }}(q, neg, curve, q);
 		    {%- endif %}
 		}
 	}
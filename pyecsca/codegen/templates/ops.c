@@ -24,9 +24,15 @@
 	{%- endfor %}
 {%- endmacro %}
 
+{% macro render_loads(loads) -%}
+	{%- for src, dst in loads.items() %}
+		bn_copy(&{{ src }}, &{{ dst }});
+	{%- endfor %}
+{%- endmacro %}
+
 {% macro render_ops(operations) -%}
-	{%- for op, result, left, right in operations %}
-		{{ render_op(op, result, left, right, "curve->p", "curve->p_red")}}
+	{%- for op, result, left, right, lazy in operations %}
+		{{ render_op(op, result, left, right, "curve->p", "curve->p_red", lazy)}}
 	{%- endfor %}
 {%- endmacro %}
 
@@ -42,7 +48,7 @@
 	{%- endif %}
 {%- endmacro %}
 
-{% macro render_static_init(allocations, name) -%}
+{% macro render_static_init(allocations, name, initializations={}) -%}
 	{{ render_static_allocs(allocations) }}
 
 	bool point_{{ name }}_init(void) {
@@ -51,13 +57,30 @@
 		if (err != BN_OKAY) {
 			return false;
 		}
+		{%- for init, (value, encode) in initializations.items() if not encode %}
+		bn_from_int({{ value }}, &{{ init }});
+		{%- endfor %}
 		return true;
 	}
 {%- endmacro %}
 
-{% macro render_static_zero(allocations, name) -%}
+{% macro render_static_set_curve(initializations, operations, name, multiples={}, loads={}) -%}
+	void point_{{ name }}_set_curve(const curve_t *curve) {
+		{{- render_loads(loads) }}
+		{%- for init, (value, encode) in initializations.items() if encode %}
+		bn_from_int({{ value }}, &{{ init }});
+		bn_red_encode(&{{ init }}, &curve->p, &curve->p_red);
+		{%- endfor %}
+		{%- for multiple, value in multiples.items() %}
+		bn_mul_int(&curve->p, {{ value }}, &{{ multiple }});
+		{%- endfor %}
+		{{ render_ops(operations) }}
+	}
+{%- endmacro %}
+
+{% macro render_static_zero(allocations, name, invariants=[]) -%}
 	void point_{{ name }}_zero(void) {
-		{%- for alloc in allocations -%}
+		{%- for alloc in allocations if alloc not in invariants -%}
 		    bn_from_int(0, &{{alloc}});
 		{%- endfor -%}
 	}
@@ -0,0 +1,70 @@
+{#- The ops macros for the fixed-width field elements (fe_t), see ops.c for the bn_t ones. -#}
+{#- The non-encoded constants (the exponents) stay bn_t, they are the only ones freed. -#}
+
+{% macro render_static_allocs(allocations, initializations={}) -%}
+	{%- for alloc in allocations %}
+		{%- if alloc in initializations and not initializations[alloc][1] %}
+		static bn_t {{ alloc }};
+		{%- else %}
+		static fe_t {{ alloc }};
+		{%- endif %}
+	{%- endfor %}
+{%- endmacro %}
+
+{% macro render_loads(loads) -%}
+	{%- for src, dst in loads.items() %}
+		fe_from_bn(&{{ src }}, &{{ dst }});
+	{%- endfor %}
+{%- endmacro %}
+
+{% macro render_ops(operations) -%}
+	{%- for op, result, left, right, lazy in operations %}
+		{{ render_fe_op(op, result, left, right) }}
+	{%- endfor %}
+{%- endmacro %}
+
+{% macro render_returns(returns) -%}
+	{%- for src, dst in returns.items() %}
+		fe_to_bn(&{{ src }}, &{{ dst }});
+	{%- endfor %}
+{%- endmacro %}
+
+{% macro render_static_init(allocations, name, initializations={}) -%}
+	{{ render_static_allocs(allocations, initializations) }}
+
+	bool point_{{ name }}_init(void) {
+		{%- for init, (value, encode) in initializations.items() if not encode %}
+		if (bn_init(&{{ init }}) != BN_OKAY) {
+			return false;
+		}
+		bn_from_int({{ value }}, &{{ init }});
+		{%- endfor %}
+		return true;
+	}
+{%- endmacro %}
+
+{% macro render_static_set_curve(initializations, operations, name, multiples={}, loads={}) -%}
+	void point_{{ name }}_set_curve(const curve_t *curve) {
+		{{- render_loads(loads) }}
+		{%- for init, (value, encode) in initializations.items() if encode %}
+		fe_from_int({{ value }}, &{{ init }});
+		{%- endfor %}
+		{{ render_ops(operations) }}
+	}
+{%- endmacro %}
+
+{% macro render_static_zero(allocations, name, invariants=[]) -%}
+	void point_{{ name }}_zero(void) {
+		{%- for alloc in allocations if alloc not in invariants -%}
+		    fe_zero(&{{alloc}});
+		{%- endfor -%}
+	}
+{%- endmacro %}
+
+{% macro render_static_clear(frees, name) -%}
+	void point_{{ name }}_clear(void) {
+		{%- if frees %}
+		bn_clear_multi(&{{ frees | join(", &") }}, NULL);
+		{%- endif %}
+	}
+{%- endmacro %}
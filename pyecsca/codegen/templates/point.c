@@ -4,10 +4,64 @@
 {% import "ops.c" as ops %}
 {% from "action.c" import start_action, end_action %}
 
+{%- if pool_size %}
+/* The pool of points for the scalar multiplication, with their coordinates preallocated. */
+#define POINT_POOL_SIZE {{ pool_size }}
+static point_t point_pool[POINT_POOL_SIZE];
+static bool point_pool_used[POINT_POOL_SIZE];
+static size_t point_pool_top = 0;
+static bool point_pool_active = false;
+
+bool point_pool_init(void) {
+	for (size_t i = 0; i < POINT_POOL_SIZE; i++) {
+		if (bn_init_multi(&point_pool[i].{{ variables | join(", &point_pool[i].") }}, NULL) != BN_OKAY) {
+			return false;
+		}
+	}
+	return true;
+}
+
+/**
+ * Starts allocating the points from the pool, until point_pool_end.
+ */
+void point_pool_begin(void) {
+	point_pool_top = 0;
+	point_pool_active = true;
+}
+
+/**
+ * Stops allocating the points from the pool and resets it, the points allocated from it are all released.
+ */
+void point_pool_end(void) {
+	for (size_t i = 0; i < point_pool_top; i++) {
+		point_pool_used[i] = false;
+	}
+	point_pool_top = 0;
+	point_pool_active = false;
+}
+
+void point_pool_clear(void) {
+	for (size_t i = 0; i < POINT_POOL_SIZE; i++) {
+		bn_clear_multi(&point_pool[i].{{ variables | join(", &point_pool[i].") }}, NULL);
+	}
+}
+{%- endif %}
+
 /**
  * Constructs (allocates) a new point.
  */
 point_t *point_new(void) {
+	{%- if pool_size %}
+	if (point_pool_active && point_pool_top < POINT_POOL_SIZE) {
+		point_t *pooled = &point_pool[point_pool_top];
+		point_pool_used[point_pool_top++] = true;
+		{%- for variable in variables %}
+		bn_zero(&pooled->{{ variable }});
+		{%- endfor %}
+		pooled->infinity = false;
+		return pooled;
+	}
+	{%- endif %}
 	point_t *result = malloc(sizeof(point_t));
 	{%- for variable in variables %}
 	bn_init(&result->{{ variable }});
@@ -33,6 +87,16 @@ void point_set(const point_t *from, point_t *out) {
 }
 
 void point_free(point_t *point) {
+	{%- if pool_size %}
+	if (point >= point_pool && point < point_pool + POINT_POOL_SIZE) {
+		point_pool_used[point - point_pool] = false;
+		/* Release the freed points from the top of the pool, so that they can be reused. */
+		while (point_pool_top > 0 && !point_pool_used[point_pool_top - 1]) {
+			point_pool_top--;
+		}
+		return;
+	}
+	{%- endif %}
 	{%- for variable in variables %}
 	bn_clear(&point->{{ variable }});
 	{%- endfor %}
@@ -127,9 +191,9 @@ void point_from_affine(bn_t *x, bn_t *y, const curve_t *curve, point_t *out) {
 		{%- if variable in ("X", "Y") %}
 	bn_copy({{ variable | lower }}, &out->{{ variable }});
 		{%- endif %}
-		{%- if variable == "Z" %}
-	bn_from_int(1, &out->Z);
-	bn_red_encode(&out->Z, &curve->p, &curve->p_red);
+		{%- if variable in ("Z", "ZZ", "ZZZ") %}
+	bn_from_int(1, &out->{{ variable }});
+	bn_red_encode(&out->{{ variable }}, &curve->p, &curve->p_red);
 		{%- endif %}
 		{%- if variable == "T" %}
 	bn_red_mul(x, y, &curve->p, &out->T);
@@ -138,10 +202,76 @@ void point_from_affine(bn_t *x, bn_t *y, const curve_t *curve, point_t *out) {
 	{{ end_action("coord_map") }}
 }
 
+/**
+ * Normalizes the points (brings them to the representation with the denominator {{ normalize.denominator if normalize else "Z" }} = 1)
+ * using Montgomery's simultaneous inversion, i.e. one inversion for all of the points.
+ */
+void point_normalize_batch(point_t **points, size_t n, const curve_t *curve) {
+	{%- if normalize %}
+	if (n == 0) {
+		return;
+	}
+	bn_t *prefix = malloc(n * sizeof(bn_t));
+	bn_t inv; bn_init(&inv);
+	bn_t zinv; bn_init(&zinv);
+	/* prefix[i] is the product of the denominators of the points up to i (the neutral points are skipped). */
+	bn_from_int(1, &inv);
+	bn_red_encode(&inv, &curve->p, &curve->p_red);
+	for (size_t i = 0; i < n; i++) {
+		bn_init(&prefix[i]);
+		if (!points[i]->infinity && !bn_is_0(&points[i]->{{ normalize.denominator }})) {
+			bn_red_mul(&inv, &points[i]->{{ normalize.denominator }}, &curve->p, &curve->p_red, &inv);
+		}
+		bn_copy(&inv, &prefix[i]);
+	}
+	bn_red_inv(&inv, &curve->p, &curve->p_red, &inv);
+
+	bn_err err;
+	{{ ops.render_full_allocs(normalize.allocations, "err") }}
+	{{ ops.render_initializations(normalize.initializations) }}
+	for (size_t i = n; i-- > 0;) {
+		point_t *point = points[i];
+		if (point->infinity || bn_is_0(&point->{{ normalize.denominator }})) {
+			continue;
+		}
+		/* Peel off the inverse of this denominator, inv then inverts the product of the preceding ones. */
+		if (i > 0) {
+			bn_red_mul(&inv, &prefix[i - 1], &curve->p, &curve->p_red, &zinv);
+		} else {
+			bn_copy(&inv, &zinv);
+		}
+		bn_red_mul(&inv, &point->{{ normalize.denominator }}, &curve->p, &curve->p_red, &inv);
+		{{ ops.render_ops(normalize.operations) }}
+		{{ ops.render_returns(normalize.returns) }}
+	}
+	{{ ops.render_frees(normalize.frees) }}
+	for (size_t i = 0; i < n; i++) {
+		bn_clear(&prefix[i]);
+	}
+	free(prefix);
+	bn_clear(&inv);
+	bn_clear(&zinv);
+	{%- else %}
+	/* The coordinate system has no scaling formula, the points are left as they are. */
+	{%- endif %}
+}
+
 void point_accumulate(const point_t *one, const point_t *other, const curve_t *curve, point_t *out_one) {
     {% if accumulation_order == AccumulationOrder.PeqPR %}
         point_add(one, other, curve, out_one);
     {% elif accumulation_order == AccumulationOrder.PeqRP %}
         point_add(other, one, curve, out_one);
     {% endif %}
+}
+
+/**
+ * Accumulates a point mapped from affine coordinates (other, with Z = 1), using the mixed addition if present.
+ */
+void point_accumulate_mixed(const point_t *one, const point_t *other, const curve_t *curve, point_t *out_one) {
+    {% if madd and accumulation_order == AccumulationOrder.PeqPR %}
+        point_madd(one, other, curve, out_one);
+    {% else %}
+        {#- The mixed addition takes the affine point as its second operand, PeqRP keeps the general one. #}
+        point_accumulate(one, other, curve, out_one);
+    {% endif %}
 }
\ No newline at end of file
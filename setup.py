@@ -17,7 +17,7 @@ class CustomTommath(Command):
     def run(self) -> None:
         if self.build_lib:
             tommath_dir = Path("..") / self.build_lib / Path("pyecsca/codegen/tommath")
-            subprocess.run(["make", "host", "nano", "stm32f0", "stm32f3", f"TOMMATH_DIR={tommath_dir}"], cwd="ext")
+            subprocess.run(["make", "host", "host-speed", "nano", "stm32f0", "stm32f3", f"TOMMATH_DIR={tommath_dir}"], cwd="ext")
             
 
 
@@ -17,7 +17,8 @@ int test_wsliding_ltr() {
         {"1234", 2, 11, {1, 0, 0, 0, 3, 0, 1, 0, 0, 1, 0}},
         {"170", 4, 6, {5, 0, 0, 0, 5, 0}},
         {"554", 5, 6, {17, 0, 0, 0, 5, 0}},
-        {"123456789123456789123456789", 5, 83, {25, 1, 0, 0, 0, 0, 0, 0, 0, 15, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 23, 0, 0, 0, 0, 25, 0, 0, 0, 7, 0, 0, 0, 0, 0, 0, 0, 29, 0, 0, 0, 0, 17, 0, 0, 0, 0, 19, 0, 0, 0, 0, 29, 0, 0, 0, 15, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 17, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 21}}
+        {"123456789123456789123456789", 5, 83, {25, 1, 0, 0, 0, 0, 0, 0, 0, 15, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 23, 0, 0, 0, 0, 25, 0, 0, 0, 7, 0, 0, 0, 0, 0, 0, 0, 29, 0, 0, 0, 0, 17, 0, 0, 0, 0, 19, 0, 0, 0, 0, 29, 0, 0, 0, 15, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 17, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 21}},
+        {"1237940039285380274899124223", 8, 83, {255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 3}}
         // sliding_window_ltr end
     };
     int num_cases = sizeof(cases) / sizeof(cases[0]);
@@ -70,7 +71,8 @@ int test_wsliding_rtl() {
         {"1234", 2, 11, {1, 0, 0, 0, 3, 0, 1, 0, 0, 1, 0}},
         {"170", 4, 6, {5, 0, 0, 0, 5, 0}},
         {"554", 5, 10, {1, 0, 0, 0, 0, 0, 0, 0, 21, 0}},
-        {"123456789123456789123456789",5, 87, {1, 0, 0, 0, 0, 19, 0, 0, 0, 0, 1, 0, 0, 0, 0, 29, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 11, 0, 0, 0, 0, 17, 0, 0, 0, 0, 27, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 17, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 21}}
+        {"123456789123456789123456789",5, 87, {1, 0, 0, 0, 0, 19, 0, 0, 0, 0, 1, 0, 0, 0, 0, 29, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 11, 0, 0, 0, 0, 17, 0, 0, 0, 0, 27, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 17, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 21}},
+        {"1237940039285380274899124223", 8, 89, {3, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255}}
         // sliding_window_rtl end
     };
     int num_cases = sizeof(cases) / sizeof(cases[0]);
@@ -123,7 +125,8 @@ int test_convert_base_small() {
         {"1234", 10, 4, {4, 3, 2, 1}},
         {"0", 2, 1, {0}},
         {"1", 2, 1, {1}},
-        {"123456789123456789123456789", 16, 22, {5, 1, 15, 5, 4, 0, 12, 7, 15, 9, 1, 11, 3, 14, 2, 15, 13, 15, 14, 1, 6, 6}}
+        {"123456789123456789123456789", 16, 22, {5, 1, 15, 5, 4, 0, 12, 7, 15, 9, 1, 11, 3, 14, 2, 15, 13, 15, 14, 1, 6, 6}},
+        {"57896044618658097718038074311076780469077330570514481952338175485823720357889", 256, 32, {1, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 0, 128}}
         // convert_base_small end
     };
     int num_cases = sizeof(cases) / sizeof(cases[0]);
@@ -173,7 +176,8 @@ int test_convert_base_large() {
         // convert_base_large begin
         {"123456789123456", "2", 47, {"0", "0", "0", "0", "0", "0", "0", "1", "1", "0", "0", "0", "1", "0", "0", "1", "1", "1", "1", "1", "0", "0", "0", "0", "0", "1", "1", "0", "0", "0", "0", "1", "0", "0", "0", "1", "0", "0", "1", "0", "0", "0", "0", "0", "1", "1", "1"}},
         {"123456789123456789123456789", "123456", 6, {"104661", "75537", "83120", "74172", "37630", "4"}},
-        {"352099265818416392997042486274568094251", "18446744073709551616", 3, {"12367597952119210539", "640595372834356666", "1"}}
+        {"352099265818416392997042486274568094251", "18446744073709551616", 3, {"12367597952119210539", "640595372834356666", "1"}},
+        {"57896044618658097718038074311076780469077330570514481952338175485823720357889", "18446744073709551616", 4, {"1", "18446744073709551615", "18374686479671623680", "9223372036854775808"}}
         // convert_base_large end
     };
     int num_cases = sizeof(cases) / sizeof(cases[0]);
@@ -240,7 +244,9 @@ int test_bn_wnaf() {
         {"1", 2, 1, {1}},
         {"21", 4, 5, {1, 0, 0, 0, 5}},
         {"123456789", 3, 28, {1, 0, 0, -1, 0, 0, 3, 0, 0, -1, 0, 0, 0, 0, 0, -3, 0, 0, 0, -3, 0, 0, 0, 0, 3, 0, 0, -3}},
-        {"123456789123456789123456789", 5, 84, {13, 0, 0, 0, 0, 0, -15, 0, 0, 0, 0, -1, 0, 0, 0, 0, 0, 0, -1, 0, 0, 0, 0, 0, 0, 0, 0, -13, 0, 0, 0, 0, 0, -7, 0, 0, 0, 0, 0, -5, 0, 0, 0, 0, 0, 0, 13, 0, 0, 0, 0, 0, -1, 0, 0, 0, 0, -1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0, 0, -7, 0, 0, 0, 0, -11}}
+        {"123456789123456789123456789", 5, 84, {13, 0, 0, 0, 0, 0, -15, 0, 0, 0, 0, -1, 0, 0, 0, 0, 0, 0, -1, 0, 0, 0, 0, 0, 0, 0, 0, -13, 0, 0, 0, 0, 0, -7, 0, 0, 0, 0, 0, -5, 0, 0, 0, 0, 0, 0, 13, 0, 0, 0, 0, 0, -1, 0, 0, 0, 0, -1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0, 0, -7, 0, 0, 0, 0, -11}},
+        {"618970019642690137449562111", 8, 90, {1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, -1}},
+        {"38081163317860819003247617", 7, 80, {63, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 3, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1}}
         // wnaf end
     };
     int num_cases = sizeof(cases) / sizeof(cases[0]);
@@ -401,6 +407,340 @@ int test_booth() {
     return 0;
 }
 
+int test_red_special() {
+    printf("test_red_special: ");
+    int failed = 0;
+    struct {
+        const char *prime;
+        int expected_terms;
+    } cases[] = {
+        {"7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffed", 3}, // 2^255 - 19
+        {"fffffffffffffffffffffffffffffffffffffffffffffffffffffffefffffc2f", 5}, // secp256k1
+        {"ffffffffffffffffffffffffffffffff000000000000000000000001", 2}, // P-224
+        {"ffffffff00000001000000000000000000000000ffffffffffffffffffffffff", 0}, // P-256
+        {"fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffeffffffff0000000000000000ffffffff", 4}, // P-384
+        {"a9fb57dba1eea9bc3e660a909d838d726e3bf623d52620282013481d1f6e5377", 0}, // brainpoolP256r1
+    };
+    int num_cases = sizeof(cases) / sizeof(cases[0]);
+    for (int t = 0; t < num_cases; t++) {
+        bn_t p, one, other, result, expected;
+        red_t red;
+        bn_init_multi(&p, &one, &other, &result, &expected, NULL);
+        bn_red_init(&red);
+        bn_from_hex(cases[t].prime, &p);
+        bn_red_setup(&p, &red);
+        if (red.special_terms != cases[t].expected_terms) {
+            printf("Case %d: Bad number of terms (%i instead of %i)\n", t, red.special_terms, cases[t].expected_terms);
+            failed++;
+        }
+        // Multiply p - 1 by p - 2, p / 2 and p / 8.
+        mp_sub_d(&p, 1, &one);
+        for (int i = 0; i < 3; i++) {
+            if (i == 0) {
+                mp_sub_d(&p, 2, &other);
+            } else {
+                mp_div_2d(&p, 2 * i - 1, &other, NULL);
+            }
+            bn_red_mul(&one, &other, &p, &red, &result);
+            mp_mulmod(&one, &other, &p, &expected);
+            if (mp_cmp(&result, &expected) != MP_EQ) {
+                printf("Case %d: Bad product %d\n", t, i);
+                failed++;
+            }
+        }
+        bn_red_clear(&red);
+        bn_clear_multi(&p, &one, &other, &result, &expected, NULL);
+    }
+    if (failed == 0) {
+        printf("OK\n");
+    } else {
+        printf("FAILED (%d cases)\n", failed);
+    }
+    return failed;
+}
+
+int test_red_add_sub() {
+    printf("test_red_add_sub: ");
+    int failed = 0;
+    const char *primes[] = {
+        "7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffed", // 2^255 - 19
+        "fffffffdffffffffffffffffffffffff", // secp128r1
+        "a9fb57dba1eea9bc3e660a909d838d726e3bf623d52620282013481d1f6e5377", // brainpoolP256r1
+    };
+    int num_primes = sizeof(primes) / sizeof(primes[0]);
+    for (int t = 0; t < num_primes; t++) {
+        bn_t p, one, other, result, expected;
+        red_t red;
+        bn_init_multi(&p, &one, &other, &result, &expected, NULL);
+        bn_red_init(&red);
+        bn_from_hex(primes[t], &p);
+        bn_red_setup(&p, &red);
+        // All pairs of 0, 1, p / 2, p - 2 and p - 1.
+        for (int i = 0; i < 25; i++) {
+            bn_t *values[] = {&one, &other};
+            for (int j = 0; j < 2; j++) {
+                int which = j == 0 ? i / 5 : i % 5;
+                if (which < 2) {
+                    mp_set(values[j], which);
+                } else if (which == 2) {
+                    mp_div_2d(&p, 1, values[j], NULL);
+                } else {
+                    mp_sub_d(&p, which - 2, values[j]);
+                }
+            }
+            bn_red_add(&one, &other, &p, &red, &result);
+            mp_addmod(&one, &other, &p, &expected);
+            if (mp_cmp(&result, &expected) != MP_EQ || result.used != expected.used) {
+                printf("Case %d: Bad sum %d\n", t, i);
+                failed++;
+            }
+            bn_red_sub(&one, &other, &p, &red, &result);
+            mp_submod(&one, &other, &p, &expected);
+            if (mp_cmp(&result, &expected) != MP_EQ || result.used != expected.used) {
+                printf("Case %d: Bad difference %d\n", t, i);
+                failed++;
+            }
+            bn_red_neg(&one, &p, &red, &result);
+            mp_submod(&result, &result, &p, &expected);
+            mp_submod(&expected, &one, &p, &expected);
+            if (mp_cmp(&result, &expected) != MP_EQ || result.used != expected.used) {
+                printf("Case %d: Bad negation %d\n", t, i);
+                failed++;
+            }
+            // In place, as the formulas do.
+            mp_copy(&one, &result);
+            bn_red_add(&result, &other, &p, &red, &result);
+            mp_addmod(&one, &other, &p, &expected);
+            if (mp_cmp(&result, &expected) != MP_EQ) {
+                printf("Case %d: Bad in-place sum %d\n", t, i);
+                failed++;
+            }
+        }
+        bn_red_clear(&red);
+        bn_clear_multi(&p, &one, &other, &result, &expected, NULL);
+    }
+    if (failed == 0) {
+        printf("OK\n");
+    } else {
+        printf("FAILED (%d cases)\n", failed);
+    }
+    return failed;
+}
+
+int test_mod_inv() {
+    printf("test_mod_inv: ");
+    int failed = 0;
+    const char *primes[] = {
+        "7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffed", // 2^255 - 19
+        "ffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551", // order of P-256
+        "01ffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff", // 2^521 - 1
+        "fffffffdffffffffffffffffffffffff", // secp128r1
+    };
+    int num_primes = sizeof(primes) / sizeof(primes[0]);
+    for (int t = 0; t < num_primes; t++) {
+        bn_t p, one, result, expected;
+        red_t red;
+        bn_init_multi(&p, &one, &result, &expected, NULL);
+        bn_red_init(&red);
+        bn_from_hex(primes[t], &p);
+        bn_red_setup(&p, &red);
+        // Invert 1, 2, p / 3, p - 2 and p - 1.
+        for (int i = 0; i < 5; i++) {
+            if (i < 2) {
+                mp_set(&one, i + 1);
+            } else if (i == 2) {
+                mp_div_d(&p, 3, &one, NULL);
+            } else {
+                mp_sub_d(&p, i - 1, &one);
+            }
+            mp_invmod(&one, &p, &expected);
+            bn_mod_inv(&one, &p, &result);
+            if (mp_cmp(&result, &expected) != MP_EQ) {
+                printf("Case %d: Bad inverse %d\n", t, i);
+                failed++;
+            }
+            bn_red_encode(&one, &p, &red);
+            bn_red_inv(&one, &p, &red, &result);
+            bn_red_mul(&one, &result, &p, &red, &result);
+            bn_red_decode(&result, &p, &red);
+            if (mp_cmp_d(&result, 1) != MP_EQ) {
+                printf("Case %d: Bad reduced inverse %d\n", t, i);
+                failed++;
+            }
+        }
+        bn_red_clear(&red);
+        bn_clear_multi(&p, &one, &result, &expected, NULL);
+    }
+    if (failed == 0) {
+        printf("OK\n");
+    } else {
+        printf("FAILED (%d cases)\n", failed);
+    }
+    return failed;
+}
+
+int test_mod_inv_invalid() {
+    printf("test_mod_inv_invalid: ");
+    int failed = 0;
+    bn_t mod, one, result;
+    red_t red;
+    bn_init_multi(&mod, &one, &result, NULL);
+    bn_red_init(&red);
+    // 0 modulo a prime has no inverse, with any inversion.
+    bn_from_hex("7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffed", &mod);
+    bn_red_setup(&mod, &red);
+    mp_zero(&one);
+    if (bn_mod_inv(&one, &mod, &result) != BN_VAL) {
+        printf("Inverted zero\n");
+        failed++;
+    }
+    bn_red_encode(&one, &mod, &red);
+    if (bn_red_inv(&one, &mod, &red, &result) != BN_VAL) {
+        printf("Inverted reduced zero\n");
+        failed++;
+    }
+#if INVERSION != INV_EULER
+    // Neither has 3 * 2^64 modulo 3 * (2^255 - 19), the Fermat inversion needs a prime modulus though.
+    mp_mul_d(&mod, 3, &mod);
+    mp_set(&one, 3);
+    mp_mul_2d(&one, 64, &one);
+    if (bn_mod_inv(&one, &mod, &result) != BN_VAL) {
+        printf("Inverted a common factor\n");
+        failed++;
+    }
+    // While 2 still has one.
+    mp_set(&one, 2);
+    if (bn_mod_inv(&one, &mod, &result) != BN_OKAY) {
+        printf("Did not invert 2\n");
+        failed++;
+    }
+#endif
+    bn_red_clear(&red);
+    bn_clear_multi(&mod, &one, &result, NULL);
+    if (failed == 0) {
+        printf("OK\n");
+    } else {
+        printf("FAILED (%d cases)\n", failed);
+    }
+    return failed;
+}
+
+int test_red_pow() {
+    printf("test_red_pow: ");
+    int failed = 0;
+    const char *exps[] = {"0", "1", "2", "3", "4", "181", "65537", "123456789123456789123456789",
+                          "7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffeb"};
+    int num_exps = sizeof(exps) / sizeof(exps[0]);
+    bn_t p, base, exp, result, expected;
+    red_t red;
+    bn_init_multi(&p, &base, &exp, &result, &expected, NULL);
+    bn_red_init(&red);
+    bn_from_hex("7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffed", &p);
+    bn_red_setup(&p, &red);
+    bn_from_hex("1234567890abcdef1234567890abcdef1234567890abcdef", &base);
+    for (int t = 0; t < num_exps; t++) {
+        if (t == num_exps - 1) {
+            bn_from_hex(exps[t], &exp);
+        } else {
+            bn_from_dec(exps[t], &exp);
+        }
+        mp_exptmod(&base, &exp, &p, &expected);
+        bn_red_pow(&base, &exp, &p, &red, &result);
+        if (mp_cmp(&result, &expected) != MP_EQ) {
+            printf("Case %d: Bad power\n", t);
+            failed++;
+        }
+    }
+    bn_red_clear(&red);
+    bn_clear_multi(&p, &base, &exp, &result, &expected, NULL);
+    if (failed == 0) {
+        printf("OK\n");
+    } else {
+        printf("FAILED (%d cases)\n", failed);
+    }
+    return failed;
+}
+
+int test_red_mul_batch() {
+    printf("test_red_mul_batch: ");
+    int failed = 0;
+    const char *others[] = {"0", "1", "2", "deadbeef", "7fffffffffffffffffffffffffffffffffffffffffffffff",
+                            "ffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632550"};
+    int num_others = sizeof(others) / sizeof(others[0]);
+    bn_t n, one, enc;
+    bn_t values[num_others], expected[num_others];
+    red_t red;
+    bn_init_multi(&n, &one, &enc, NULL);
+    for (int i = 0; i < num_others; i++) {
+        bn_init(&values[i]);
+        bn_init(&expected[i]);
+    }
+    bn_red_init(&red);
+    bn_from_hex("ffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551", &n);
+    bn_red_setup(&n, &red);
+    bn_from_hex("1234567890abcdef1234567890abcdef1234567890abcdef", &one);
+    bn_copy(&one, &enc);
+    bn_red_encode(&enc, &n, &red);
+    for (int i = 0; i < num_others; i++) {
+        bn_from_hex(others[i], &values[i]);
+        mp_mulmod(&one, &values[i], &n, &expected[i]);
+    }
+    /* The encoded one times the plain others gives the plain products, in place. */
+    bn_red_mul_batch(&enc, values, num_others, &n, &red, values);
+    for (int i = 0; i < num_others; i++) {
+        if (mp_cmp(&values[i], &expected[i]) != MP_EQ) {
+            printf("Case %d: Bad product\n", i);
+            failed++;
+        }
+    }
+    bn_red_clear(&red);
+    for (int i = 0; i < num_others; i++) {
+        bn_clear(&values[i]);
+        bn_clear(&expected[i]);
+    }
+    bn_clear_multi(&n, &one, &enc, NULL);
+    if (failed == 0) {
+        printf("OK\n");
+    } else {
+        printf("FAILED (%d cases)\n", failed);
+    }
+    return failed;
+}
+
+int test_red_normalize() {
+    printf("test_red_normalize: ");
+    int failed = 0;
+    const char *rests[] = {"0", "1", "deadbeef", "7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffec"};
+    int num_rests = sizeof(rests) / sizeof(rests[0]);
+    bn_t p, rest, value, result;
+    bn_init_multi(&p, &rest, &value, &result, NULL);
+    bn_from_hex("7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffed", &p);
+    for (int t = 0; t < num_rests; t++) {
+        bn_from_hex(rests[t], &rest);
+        for (unsigned int k = 0; k < (1U << LAZY_BOUND_BITS); k++) {
+            bn_mul_int(&p, k, &value);
+            mp_add(&value, &rest, &value);
+            bn_red_normalize(&value, &p, &result);
+            if (mp_cmp(&result, &rest) != MP_EQ) {
+                printf("Case %d (%u): Bad normalization\n", t, k);
+                failed++;
+            }
+            bn_red_normalize(&value, &p, &value);
+            if (mp_cmp(&value, &rest) != MP_EQ) {
+                printf("Case %d (%u): Bad normalization in place\n", t, k);
+                failed++;
+            }
+        }
+    }
+    bn_clear_multi(&p, &rest, &value, &result, NULL);
+    if (failed == 0) {
+        printf("OK\n");
+    } else {
+        printf("FAILED (%d cases)\n", failed);
+    }
+    return failed;
+}
+
 int main(void) {
-    return test_wsliding_ltr() + test_wsliding_rtl() + test_convert_base_small() + test_convert_base_large() + test_bn_wnaf() + test_bn_wnaf_manipulation() + test_booth();
+    return test_wsliding_ltr() + test_wsliding_rtl() + test_convert_base_small() + test_convert_base_large() + test_bn_wnaf() + test_bn_wnaf_manipulation() + test_booth() + test_red_special() + test_red_add_sub() + test_mod_inv() + test_mod_inv_invalid() + test_red_pow() + test_red_mul_batch() + test_red_normalize();
 }
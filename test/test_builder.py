@@ -1,6 +1,12 @@
+import json
+import shutil
+import subprocess
+from os import path, makedirs
+
 import pytest
+from pyecsca.ec.configuration import Reduction
 
-from pyecsca.codegen.builder import build_impl, list_impl
+from pyecsca.codegen.builder import build_impl, list_impl, build_matrix, expand_matrix
 
 
 @pytest.mark.parametrize(
@@ -52,6 +58,203 @@ from pyecsca.codegen.builder import build_impl, list_impl
                 ".",
             ],
         ),
+        (
+            "cache",
+            [
+                "--platform",
+                "HOST",
+                "--cache",
+                "--cache-dir",
+                "cache",
+                "shortw",
+                "projective",
+                "add-1998-cmo",
+                "dbl-1998-cmo",
+                "z",
+                "ltr(complete=True)",
+                ".",
+            ],
+        ),
+        (
+            "speed",
+            [
+                "--platform",
+                "HOST",
+                "--profile",
+                "speed",
+                "shortw",
+                "projective",
+                "add-1998-cmo",
+                "dbl-1998-cmo",
+                "z",
+                "ltr(complete=True)",
+                ".",
+            ],
+        ),
+        (
+            "lazy",
+            [
+                "--platform",
+                "HOST",
+                "--red",
+                "MONTGOMERY",
+                "--lazy",
+                "shortw",
+                "projective",
+                "add-2015-rcb",
+                "dbl-2015-rcb",
+                "z",
+                "ltr(complete=True)",
+                ".",
+            ],
+        ),
+        (
+            "schedule",
+            [
+                "--platform",
+                "HOST",
+                "--schedule",
+                "-v",
+                "shortw",
+                "projective",
+                "add-2007-bl",
+                "dbl-2007-bl",
+                "z",
+                "ltr(complete=True)",
+                ".",
+            ],
+        ),
+        (
+            "normalize",
+            [
+                "--platform",
+                "HOST",
+                "--normalize-tables",
+                "shortw",
+                "jacobian",
+                "add-2007-bl",
+                "dbl-2007-bl",
+                "neg",
+                "z",
+                "wnaf(width=4)",
+                ".",
+            ],
+        ),
+        (
+            "pool",
+            [
+                "--platform",
+                "HOST",
+                "--pool",
+                "shortw",
+                "projective",
+                "add-2007-bl",
+                "dbl-2007-bl",
+                "comb(width=3)",
+                ".",
+            ],
+        ),
+        (
+            "madd",
+            [
+                "--platform",
+                "HOST",
+                "--normalize-tables",
+                "shortw",
+                "jacobian",
+                "add-2007-bl",
+                "madd-2007-bl",
+                "dbl-2007-bl",
+                "neg",
+                "wnaf(width=4)",
+                ".",
+            ],
+        ),
+        (
+            "field",
+            [
+                "--platform",
+                "HOST",
+                "--curve",
+                "secg/secp128r1",
+                "--red",
+                "MONTGOMERY",
+                "--field",
+                "FIXED",
+                "shortw",
+                "jacobian",
+                "add-2007-bl",
+                "dbl-2007-bl",
+                "z",
+                "ltr(complete=True)",
+                ".",
+            ],
+        ),
+        (
+            "special",
+            [
+                "--platform",
+                "HOST",
+                "--red",
+                "BARRETT",
+                "--special-prime",
+                "shortw",
+                "projective",
+                "add-2007-bl",
+                "dbl-2007-bl",
+                "ltr()",
+                ".",
+            ],
+        ),
+        (
+            "inversion",
+            [
+                "--platform",
+                "HOST",
+                "--red",
+                "MONTGOMERY",
+                "--inv",
+                "EULER",
+                "shortw",
+                "projective",
+                "add-2007-bl",
+                "dbl-2007-bl",
+                "ltr()",
+                ".",
+            ],
+        ),
+        (
+            "safegcd",
+            [
+                "--platform",
+                "HOST",
+                "--safegcd",
+                "shortw",
+                "projective",
+                "add-2007-bl",
+                "dbl-2007-bl",
+                "ltr()",
+                ".",
+            ],
+        ),
+        (
+            "workdir",
+            [
+                "--platform",
+                "HOST",
+                "--workdir",
+                "work",
+                "-j",
+                "2",
+                "shortw",
+                "projective",
+                "add-1998-cmo",
+                "dbl-1998-cmo",
+                "z",
+                "ltr(complete=True)",
+                ".",
+            ],
+        ),
         (
             "montgom",
             [
@@ -194,6 +397,130 @@ def test_cli_build_fails(isolated_cli_runner):
         ],
     )
     assert result.exit_code == 2
+    result = isolated_cli_runner.invoke(
+        build_impl,
+        [
+            "--platform",
+            "HOST",
+            "--field",
+            "FIXED",
+            "shortw",
+            "projective",
+            "add-1998-cmo",
+            "dbl-1998-cmo",
+            "ltr(complete=True)",
+            ".",
+        ],
+    )
+    assert result.exit_code == 2
+    result = isolated_cli_runner.invoke(
+        build_impl,
+        [
+            "--platform",
+            "HOST",
+            "--inv",
+            "EULER",
+            "--safegcd",
+            "shortw",
+            "projective",
+            "add-1998-cmo",
+            "dbl-1998-cmo",
+            "ltr(complete=True)",
+            ".",
+        ],
+    )
+    assert result.exit_code == 2
+    # formula with unsupported assumptions on its inputs
+    result = isolated_cli_runner.invoke(
+        build_impl,
+        [
+            "--platform",
+            "HOST",
+            "shortw",
+            "jacobian",
+            "mmadd-2007-bl",
+            "dbl-2007-bl",
+            "ltr()",
+            ".",
+        ],
+    )
+    assert result.exit_code == 2
+
+
+def test_cli_build_cached(isolated_cli_runner, monkeypatch):
+    def fake_build(dir, elf_file, hex_file, outdir, strip=False, remove=True, runtime_lib=None, jobs=None,
+                   verbose=False):
+        makedirs(outdir, exist_ok=True)
+        for fname in (elf_file, hex_file):
+            with open(path.join(outdir, fname), "w") as f:
+                f.write(fname)
+        if remove:
+            shutil.rmtree(dir)
+        return subprocess.CompletedProcess(["make"], 0)
+
+    monkeypatch.setattr("pyecsca.codegen.render.build", fake_build)
+    monkeypatch.setattr("pyecsca.codegen.render.build_runtime", lambda dir, config, cache: None)
+    args = ["--platform", "HOST", "--cache", "--cache-dir", "cache", "shortw", "projective", "add-1998-cmo",
+            "dbl-1998-cmo", "ltr()"]
+    result = isolated_cli_runner.invoke(build_impl, args + ["first"])
+    assert result.exit_code == 0
+    assert "[*] Built." in result.output
+    result = isolated_cli_runner.invoke(build_impl, args + ["second"])
+    assert result.exit_code == 0
+    assert "[*] Cache hit." in result.output
+    assert "pyecsca-codegen-HOST.elf" in result.output
+    assert path.isfile(path.join("second", "pyecsca-codegen-HOST.hex"))
+
+
+def test_expand_matrix():
+    spec = {
+        "model": "shortw",
+        "coords": "projective",
+        "formulas": [["add-2007-bl", "dbl-2007-bl"], ["add-1998-cmo", "dbl-1998-cmo", "z"]],
+        "multipliers": ["ltr()", "rtl()"],
+        "reductions": ["BASE", "MONTGOMERY", "BARRETT"],
+    }
+    configs = expand_matrix(spec)
+    assert len(configs) == 2 * 2 * 3
+    assert {config.red for config in configs} == {Reduction.BASE, Reduction.MONTGOMERY, Reduction.BARRETT}
+    assert len(expand_matrix(dict(spec, formulas=["add-2007-bl", "dbl-2007-bl"]))) == 2 * 3
+    assert len(expand_matrix(dict(spec, profiles=["size", "speed"]))) == 2 * 2 * 3 * 2
+    with pytest.raises(ValueError):
+        expand_matrix(dict(spec, coords="missing"))
+    with pytest.raises(ValueError):
+        expand_matrix(dict(spec, formulas=[["add-2007-bl", "add-1998-cmo"]]))
+    assert len(expand_matrix(dict(spec, formulas=[["add-2007-bl", "madd-1998-cmo", "dbl-2007-bl"]]))) == 2 * 3
+    with pytest.raises(ValueError):
+        expand_matrix(dict(spec, formulas=[["madd-1998-cmo", "dbl-2007-bl"]]))
+    with pytest.raises(ValueError):
+        expand_matrix(dict(spec, coords="jacobian", formulas=[["mmadd-2007-bl", "dbl-2007-bl"]]))
+    with pytest.raises(ValueError):
+        expand_matrix(dict(spec, multipliers=["ladder()"]))
+    with pytest.raises(ValueError):
+        expand_matrix(dict(spec, reductions=["MISSING"]))
+    with pytest.raises(ValueError):
+        expand_matrix(dict(spec, invs=["GCD", "EULER"], safegcd=True))
+
+
+def test_cli_build_matrix(isolated_cli_runner):
+    spec = {
+        "model": "shortw",
+        "coords": "projective",
+        "formulas": [["add-1998-cmo", "dbl-1998-cmo"]],
+        "multipliers": ["ltr()", "rtl()"],
+    }
+    with open("spec.json", "w") as f:
+        json.dump(spec, f)
+    result = isolated_cli_runner.invoke(build_matrix, ["--workers", "2", "spec.json", "out"])
+    assert result.exit_code == 0
+    with open("out/manifest.json") as f:
+        manifest = json.load(f)
+    assert len(manifest) == 2
+    assert all(entry["status"] == "built" for entry in manifest)
+    with open("bad.json", "w") as f:
+        json.dump(dict(spec, model="missing"), f)
+    result = isolated_cli_runner.invoke(build_matrix, ["bad.json", "out"])
+    assert result.exit_code == 2
 
 
 def test_cli_list(cli_runner):
@@ -205,3 +532,15 @@ def test_cli_list(cli_runner):
     assert result.exit_code == 0
     result = cli_runner.invoke(list_impl, ["montgom", "xz", "ladd-1987-m"])
     assert result.exit_code == 0
+    result = cli_runner.invoke(list_impl, ["--costs", "shortw", "projective"])
+    assert result.exit_code == 0
+    assert "add-2007-bl: 12M + 6S" in result.output
+    result = cli_runner.invoke(list_impl, ["--costs", "--scalarmult", "ldr()", "montgom", "xz", "ladd-1987-m", "dbl-1987-m"])
+    assert result.exit_code == 0
+    assert "ldr() (256 bits)" in result.output
+    result = cli_runner.invoke(list_impl, ["--scalarmult", "wnaf(width=5)", "--normalize-tables", "shortw", "projective",
+                                           "add-1998-cmo", "madd-1998-cmo", "dbl-1998-cmo", "neg"])
+    assert result.exit_code == 0
+    assert "1inv" in result.output
+    result = cli_runner.invoke(list_impl, ["--scalarmult", "ltr()", "montgom", "xz", "ladd-1987-m"])
+    assert result.exit_code == 2
@@ -0,0 +1,147 @@
+import os
+from dataclasses import replace
+
+import pytest
+from pyecsca.ec.configuration import (
+    HashType,
+    RandomMod,
+    Multiplication,
+    Squaring,
+    Reduction,
+    Inversion,
+)
+from pyecsca.ec.mult import LTRMultiplier
+
+from pyecsca.codegen.cache import BuildCache
+from pyecsca.codegen.common import Platform, Profile, Field, DeviceConfiguration
+from pyecsca.codegen.render import render_and_build, render_and_build_many
+
+
+@pytest.fixture(scope="module")
+def config(secp128r1):
+    coords = secp128r1.curve.coordinate_model
+    add = coords.formulas["add-1998-cmo"]
+    dbl = coords.formulas["dbl-1998-cmo"]
+    scl = coords.formulas["z"]
+    return DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl, scl],
+        LTRMultiplier(add, dbl, scl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.BASE,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+    )
+
+
+def make_artifacts(tmp_path, name, size):
+    elf = tmp_path / f"{name}.elf"
+    hex = tmp_path / f"{name}.hex"
+    elf.write_bytes(os.urandom(size))
+    hex.write_bytes(os.urandom(size))
+    return str(elf), str(hex)
+
+
+def test_key(config, tmp_path):
+    cache = BuildCache(str(tmp_path))
+    key = cache.key(config)
+    assert key == cache.key(config)
+    assert key != cache.key(config, strip=True)
+    assert key != cache.key(replace(config, red=Reduction.MONTGOMERY))
+    assert key != cache.key(replace(config, defines={"BN_NON_CONST": 1}))
+    assert key != cache.key(replace(config, profile=Profile.SPEED))
+    assert key != cache.key(replace(config, curve="secg/secp128r1"))
+    assert key != cache.key(replace(config, lazy_reduction=True))
+    assert key != cache.key(replace(config, scheduling=True))
+    assert key != cache.key(replace(config, normalize_tables=True))
+    assert key != cache.key(replace(config, point_pool=True))
+    assert key != cache.key(replace(config, field=Field.FIXED))
+    assert key != cache.key(replace(config, special_prime=True))
+    assert key != cache.key(replace(config, safegcd=True))
+
+
+def test_key_dependencies(config, tmp_path, monkeypatch):
+    cache = BuildCache(str(tmp_path))
+    key = cache.key(config)
+    runtime_key = cache.runtime_key(config)
+    monkeypatch.setattr("pyecsca.codegen.cache.dependency_digest", lambda: "upgraded")
+    assert key != cache.key(config)
+    assert runtime_key != cache.runtime_key(config)
+
+
+def test_put_get(config, tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"))
+    key = cache.key(config)
+    assert cache.get(key, str(tmp_path / "out")) is None
+    elf, hex = make_artifacts(tmp_path, "pyecsca-codegen-HOST", 100)
+    cache.put(key, elf, hex)
+    assert cache.get(key, str(tmp_path / "out")) == ("pyecsca-codegen-HOST.elf", "pyecsca-codegen-HOST.hex")
+    assert (tmp_path / "out" / "pyecsca-codegen-HOST.elf").read_bytes() == (tmp_path / "pyecsca-codegen-HOST.elf").read_bytes()
+    cache.clear()
+    assert cache.get(key, str(tmp_path / "out")) is None
+
+
+def test_runtime(config, tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"))
+    key = cache.runtime_key(config)
+    assert key == cache.runtime_key(replace(config, scalarmult=None))
+    assert key != cache.runtime_key(replace(config, red=Reduction.MONTGOMERY))
+    assert key != cache.runtime_key(replace(config, platform=Platform.STM32F3))
+    assert key != cache.runtime_key(replace(config, special_prime=True))
+    assert key != cache.runtime_key(replace(config, inv=Inversion.EULER))
+    assert key != cache.runtime_key(replace(config, safegcd=True))
+    assert cache.get_runtime(key) is None
+    lib = tmp_path / "libruntime-pyecsca-codegen-HOST.a"
+    lib.write_bytes(os.urandom(100))
+    stored = cache.put_runtime(key, str(lib))
+    assert cache.get_runtime(key) == stored
+    assert cache.size() > 0
+    cache.clear()
+    assert cache.get_runtime(key) is None
+
+
+def test_evict(tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"), max_size=1000)
+    for i in range(3):
+        elf, hex = make_artifacts(tmp_path, f"a{i}", 100)
+        cache.put(f"key{i}", elf, hex)
+        # Make sure the access times differ.
+        os.utime(os.path.join(cache.entry(f"key{i}"), "meta.json"), (i, i))
+    # Use the oldest entry, making key1 the least recently used one.
+    assert cache.get("key0", str(tmp_path / "out")) is not None
+    elf, hex = make_artifacts(tmp_path, "a3", 100)
+    cache.put("key3", elf, hex)
+    assert cache.size() <= 1000
+    assert cache.get("key1", str(tmp_path / "out")) is None
+    assert cache.get("key0", str(tmp_path / "out")) is not None
+    assert cache.get("key3", str(tmp_path / "out")) is not None
+
+
+def test_render_and_build_cached(config, tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"))
+    dir, elf_file, hex_file, res = render_and_build(config, str(tmp_path / "first"), cache=cache)
+    assert res.returncode == 0
+    dir, elf_file, hex_file, res = render_and_build(config, str(tmp_path / "second"), cache=cache)
+    assert dir is None
+    assert res is None
+    assert (tmp_path / "second" / elf_file).read_bytes() == (tmp_path / "first" / elf_file).read_bytes()
+
+
+def test_render_and_build_hit(config, tmp_path):
+    cache = BuildCache(str(tmp_path / "cache"))
+    elf, hex = make_artifacts(tmp_path, "impl", 100)
+    cache.put(cache.key(config), elf, hex)
+    dir, elf_file, hex_file, res = render_and_build(config, str(tmp_path / "out"), cache=cache)
+    assert dir is None
+    assert res is None
+    assert (tmp_path / "out" / elf_file).read_bytes() == (tmp_path / "impl.elf").read_bytes()
+    results = render_and_build_many([config], str(tmp_path / "many"), workers=1, cache=cache)
+    assert results[0].status == "cached"
+    assert os.path.isfile(os.path.join(results[0].outdir, results[0].hex_file))
@@ -0,0 +1,95 @@
+import pytest
+from pyecsca.ec.mult import LTRMultiplier, LadderMultiplier, WindowNAFMultiplier, CombMultiplier, CoronMultiplier
+
+from pyecsca.codegen.costs import (OpCounts, count_ops, formula_costs, multiplier_calls, scalarmult_costs,
+                                   normalization_costs)
+from pyecsca.codegen.render import optimize_formula
+
+
+def test_formula_costs(secp128r1):
+    coords = secp128r1.curve.coordinate_model
+    counts = formula_costs(coords.formulas["add-2007-bl"])
+    assert (counts.mult, counts.sqr, counts.add, counts.sub) == (12, 6, 10, 6)
+    assert counts.inv == 0
+    counts = formula_costs(coords.formulas["z"])
+    assert counts.inv == 1
+    ops, invariants, _ = optimize_formula(coords.formulas["dbl-2015-rcb"])
+    assert invariants > 0
+    assert formula_costs(coords.formulas["dbl-2015-rcb"]) == count_ops(ops[invariants:])
+
+
+def test_formula_costs_specialized(secp128r1):
+    coords = secp128r1.curve.coordinate_model
+    dbl = coords.formulas["dbl-2007-bl"]
+    # Baking the curve in turns the multiplication by a into a multiplication by a constant.
+    assert formula_costs(dbl, secp128r1).cost() <= formula_costs(dbl).cost()
+
+
+def test_op_counts():
+    one = OpCounts(mult=2, sqr=1, add=3)
+    two = OpCounts(mult=1, inv=1)
+    assert one + two == OpCounts(mult=3, sqr=1, add=3, inv=1)
+    assert one * 2 == 2 * one == OpCounts(mult=4, sqr=2, add=6)
+    assert one.cost({"sqr": 1, "add": 0}) == 3
+    assert str(one) == "2M + 1S + 3add"
+
+
+def test_multiplier_calls(secp128r1):
+    coords = secp128r1.curve.coordinate_model
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    neg = coords.formulas["neg"]
+    scl = coords.formulas["z"]
+    calls = multiplier_calls(LTRMultiplier(add, dbl, scl), 128)
+    assert calls == {"dbl": 128, "add": 64, "scl": 1}
+    calls = multiplier_calls(LTRMultiplier(add, dbl, always=True), 128)
+    assert calls == {"dbl": 128, "add": 128}
+    calls = multiplier_calls(WindowNAFMultiplier(add, dbl, neg, 4, precompute_negation=True), 128)
+    assert calls["neg"] == 4
+    assert calls["add"] == pytest.approx(3 + 129 / 5)
+    calls = multiplier_calls(CombMultiplier(add, dbl, 4), 128)
+    assert calls["dbl"] == 128
+    assert calls["add"] == pytest.approx(17 + 32 * 15 / 16)
+
+
+def test_multiplier_calls_mixed(secp128r1):
+    coords = secp128r1.curve.coordinate_model
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    neg = coords.formulas["neg"]
+    assert multiplier_calls(LTRMultiplier(add, dbl), 128, madd=True) == {"dbl": 128, "madd": 64}
+    assert multiplier_calls(CoronMultiplier(add, dbl), 128, madd=True) == {"dbl": 127, "madd": 127}
+    # The tables are only added with the mixed addition once they are normalized.
+    wnaf = WindowNAFMultiplier(add, dbl, neg, 4)
+    calls = multiplier_calls(wnaf, 128, madd=True)
+    assert "madd" not in calls
+    assert "normalize" not in calls
+    calls = multiplier_calls(wnaf, 128, madd=True, normalize_tables=True)
+    assert calls["add"] == 3
+    assert calls["madd"] == pytest.approx(129 / 5)
+    assert calls["normalize"] == 4
+
+
+def test_scalarmult_costs(secp128r1, curve25519):
+    coords = secp128r1.curve.coordinate_model
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    neg = coords.formulas["neg"]
+    ltr = scalarmult_costs(LTRMultiplier(add, dbl), 128)
+    assert ltr == formula_costs(dbl) * 128 + formula_costs(add) * 64
+    wnaf = scalarmult_costs(WindowNAFMultiplier(add, dbl, neg, 5), 128)
+    assert wnaf.cost() < ltr.cost()
+
+    madd = coords.formulas["madd-1998-cmo"]
+    ltr_mixed = scalarmult_costs(LTRMultiplier(add, dbl), 128, madd=madd)
+    assert ltr_mixed == formula_costs(dbl) * 128 + formula_costs(madd) * 64
+    assert ltr_mixed.cost() < ltr.cost()
+    wnaf_normalized = scalarmult_costs(WindowNAFMultiplier(add, dbl, neg, 5), 128, madd=madd, normalize_tables=True)
+    assert wnaf_normalized.inv == 1
+    assert normalization_costs(coords, 8).inv == 1
+    assert normalization_costs(coords, 0) == OpCounts()
+
+    coords = curve25519.curve.coordinate_model
+    ladd = coords.formulas["ladd-1987-m"]
+    ldr = scalarmult_costs(LadderMultiplier(ladd, short_circuit=False), 255)
+    assert ldr == formula_costs(ladd) * 255
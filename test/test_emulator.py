@@ -260,4 +260,48 @@ def test_tracing(cli_runner, curve32):
         target.trace = []
         target.scalar_mult(2355498743, curve32.generator)
         trace = target.transform_trace()
-        assert trace is not None
\ No newline at end of file
+        assert trace is not None
+
+
+def test_fixed_field(cli_runner, secp128r1):
+    formulas = ["add-2007-bl", "dbl-2007-bl"]
+    scalar = 2355498743
+    coords = secp128r1.curve.coordinate_model
+    mult = LTRMultiplier(*[coords.formulas[formula] for formula in formulas])
+    mult.init(secp128r1, secp128r1.generator)
+    expected = mult.multiply(scalar)
+    instructions = {}
+    for field in ("BN", "FIXED"):
+        with cli_runner.isolated_filesystem() as tmpdir:
+            cli_runner.invoke(
+                build_impl,
+                [
+                    "--platform",
+                    "STM32F3",
+                    "--no-ecdsa",
+                    "--no-ecdh",
+                    "--curve",
+                    "secg/secp128r1",
+                    "--red",
+                    "MONTGOMERY",
+                    "--field",
+                    field,
+                    secp128r1.curve.model.shortname,
+                    coords.name,
+                    *formulas,
+                    "ltr()",
+                    ".",
+                ],
+            )
+            target = EmulatorTarget(secp128r1.curve.model, coords, trace_config=TraceConfig(instruction=True))
+            target.connect(binary=join(tmpdir, "pyecsca-codegen-CW308_STM32F3.elf"))
+            target.set_params(secp128r1)
+            target.trace = []
+            result = target.scalar_mult(scalar, secp128r1.generator)
+            instructions[field] = len(target.trace)
+            target.disconnect()
+            del target
+            gc.collect()
+        assert result.equals(expected)
+    # The fixed-width field elements (with the column-wise Montgomery kernels) execute fewer instructions.
+    assert instructions["FIXED"] < instructions["BN"]
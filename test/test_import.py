@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def imported_modules(module, preload=()):
+    """
+    Import `module` in a fresh interpreter and get the import times of all imported modules.
+    The `preload` modules are imported first, so that the time of `module` only covers what it adds.
+    """
+    code = "".join("import {}; ".format(name) for name in preload) + "import " + module
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         capture_output=True, text=True, check=True)
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            continue
+    return times
+
+
+@pytest.fixture(scope="module")
+def target_time():
+    """The cumulative import time of the target base classes, which every client needs anyway."""
+    return imported_modules("pyecsca.sca.target")["pyecsca.sca.target"]
+
+
+@pytest.mark.parametrize(
+    "module,lazy",
+    [
+        ("pyecsca.codegen.client", ("rainbow", "unicorn", "pyecsca.codegen.emulator", "pyecsca.codegen.device")),
+        ("pyecsca.codegen.builder", ("rainbow", "unicorn", "chipwhisperer", "jinja2")),
+    ],
+)
+def test_lazy_imports(module, lazy, target_time):
+    times = imported_modules(module)
+    assert module in times
+    for name in lazy:
+        assert name not in times
+    # On top of the target base classes and the domain parameters, the module adds a small
+    # fraction of their import time, importing the emulator would add more than a twentieth.
+    own = imported_modules(module, ("pyecsca.sca.target", "pyecsca.ec.params"))[module]
+    assert own < target_time / 20
+
+
+def test_lazy_targets():
+    from pyecsca.codegen import client
+    from pyecsca.codegen.emulator import EmulatorTarget
+
+    assert client.EmulatorTarget is EmulatorTarget
+    assert "EmulatorTarget" in client.__all__
+    with pytest.raises(AttributeError):
+        client.SomethingElse
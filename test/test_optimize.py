@@ -0,0 +1,464 @@
+import random
+import re
+
+import pytest
+from importlib_resources import files
+from pyecsca.ec.op import OpType, CodeOp
+from pyecsca.ec.params import get_params
+from pyecsca.misc.utils import pexec
+
+from pyecsca.codegen.optimize import (
+    optimize,
+    specialize,
+    eliminate_dead_code,
+    make_op,
+    allocate_temporaries,
+    count_multiplications,
+    strength_reduce,
+    hoist_invariants,
+    lazy_reduce,
+    schedule,
+    LAZY_BOUND,
+)
+from pyecsca.codegen.render import optimize_formula, is_mixed_addition
+
+
+def execute(ops, values, prime):
+    """Execute the operations over GF(prime), starting with the given `values`."""
+    values = dict(values)
+
+    def get(operand):
+        return operand if isinstance(operand, int) else values[operand]
+
+    for op in ops:
+        if op.operator == OpType.Add:
+            res = get(op.left) + get(op.right)
+        elif op.operator == OpType.Sub:
+            res = get(op.left) - get(op.right)
+        elif op.operator == OpType.Neg:
+            res = -get(op.right)
+        elif op.operator == OpType.Mult:
+            res = get(op.left) * get(op.right)
+        elif op.operator == OpType.Div:
+            res = get(op.left) * pow(get(op.right), -1, prime)
+        elif op.operator == OpType.Inv:
+            res = pow(get(op.right), -1, prime)
+        elif op.operator == OpType.Sqr:
+            res = get(op.left) ** 2
+        elif op.operator == OpType.Pow:
+            res = pow(get(op.left), get(op.right), prime)
+        elif op.operator == OpType.Id:
+            res = get(op.left)
+        else:
+            raise ValueError(op)
+        values[op.result] = res % prime
+    return values
+
+
+def execute_lazy(ops, annotations, values, prime):
+    """Execute the lazily reduced operations over the integers, checking the bounds on the values."""
+    values = dict(values)
+
+    def get(operand):
+        return operand if isinstance(operand, int) else values[operand]
+
+    for op, annotation in zip(ops, annotations):
+        if annotation is None:
+            if op.operator in (OpType.Mult, OpType.Sqr):
+                right = op.left if op.operator == OpType.Sqr else op.right
+                assert get(op.left) * get(right) < LAZY_BOUND * prime**2
+            res = execute([op], values, prime)[op.result]
+        elif op.operator == OpType.Add:
+            res = get(op.left) + get(op.right)
+        elif op.operator == OpType.Sub:
+            assert get(op.right) <= annotation * prime
+            res = get(op.left) + annotation * prime - get(op.right)
+        elif op.operator == OpType.Neg:
+            assert get(op.right) <= annotation * prime
+            res = annotation * prime - get(op.right)
+        elif op.operator == OpType.Id:
+            res = get(op.left) % prime
+        else:
+            raise ValueError(op)
+        assert 0 <= res < LAZY_BOUND * prime
+        values[op.result] = res
+    return values
+
+
+def random_inputs(formula, params):
+    prime = params.curve.prime
+    values = {name: int(value) for name, value in params.curve.parameters.items()}
+    for name in formula.inputs:
+        values[name] = random.randrange(1, prime)
+    return values
+
+
+def count(ops, *operators):
+    return sum(1 for op in ops if op.operator in operators)
+
+
+@pytest.mark.parametrize(
+    "category,curve,coords,formula",
+    [
+        ("secg", "secp256k1", "jacobian", "dbl-2007-bl"),
+        ("secg", "secp256k1", "jacobian", "add-2007-bl"),
+        ("secg", "secp256k1", "projective", "dbl-2007-bl"),
+        ("secg", "secp256r1", "projective", "dbl-2007-bl"),
+        ("other", "Curve25519", "xz", "ladd-1987-m"),
+        ("other", "Ed25519", "extended", "add-2008-hwcd"),
+    ],
+)
+def test_specialize(category, curve, coords, formula):
+    params = get_params(category, curve, coords)
+    formula = params.curve.coordinate_model.formulas[formula]
+    prime = params.curve.prime
+    values = {name: int(value) for name, value in params.curve.parameters.items()}
+    ops = specialize(formula.code, values, prime, formula.outputs)
+    assert len(ops) <= len(formula.code)
+    for _ in range(5):
+        inputs = random_inputs(formula, params)
+        expected = execute(formula.code, inputs, prime)
+        result = execute(ops, inputs, prime)
+        for output in formula.outputs:
+            assert result[output] == expected[output]
+
+
+@pytest.mark.parametrize(
+    "category,curve,coords",
+    [
+        ("secg", "secp256r1", "jacobian"),
+        ("secg", "secp256r1", "projective"),
+        ("secg", "secp256r1", "modified"),
+        ("other", "Curve25519", "xz"),
+        ("other", "Ed25519", "extended"),
+    ],
+)
+def test_optimize(category, curve, coords):
+    params = get_params(category, curve, coords)
+    prime = params.curve.prime
+    for formula in params.curve.coordinate_model.formulas.values():
+        if formula.assumptions or formula.shortname == "neg":
+            continue
+        ops = optimize(formula.code, formula.outputs)
+        mults, sqrs = count_multiplications(ops)
+        orig_mults, orig_sqrs = count_multiplications(formula.code)
+        assert mults <= orig_mults and sqrs <= orig_sqrs
+        for _ in range(3):
+            inputs = random_inputs(formula, params)
+            expected = execute(formula.code, inputs, prime)
+            result = execute(ops, inputs, prime)
+            for output in formula.outputs:
+                assert result[output] == expected[output]
+
+
+@pytest.mark.parametrize(
+    "category,curve,coords",
+    [
+        ("secg", "secp256r1", "jacobian"),
+        ("secg", "secp256r1", "projective"),
+        ("secg", "secp256r1", "xyzz"),
+        ("other", "Ed25519", "extended"),
+    ],
+)
+def test_optimize_mixed(category, curve, coords):
+    params = get_params(category, curve, coords)
+    prime = params.curve.prime
+    for formula in params.curve.coordinate_model.formulas.values():
+        assumed = {assumption.split(" == ")[0] for assumption in formula.assumptions_str}
+        if not is_mixed_addition(formula) or not assumed <= formula.inputs:
+            continue
+        ops, _, _ = optimize_formula(formula)
+        assert count_multiplications(ops) <= count_multiplications(formula.code)
+        for _ in range(3):
+            inputs = random_inputs(formula, params)
+            inputs.update({name: 1 for name in assumed})
+            expected = execute(formula.code, inputs, prime)
+            # The optimized operations do not read the coordinates assumed to be one.
+            result = execute(ops, {k: v for k, v in inputs.items() if k not in assumed}, prime)
+            for output in formula.outputs:
+                assert result[output] == expected[output]
+
+
+def test_optimize_cse():
+    ops = [
+        make_op("t0", OpType.Sqr, "Z1", 2),
+        make_op("t1", OpType.Mult, "X1", "t0"),
+        make_op("t2", OpType.Mult, "Z1", "Z1"),
+        make_op("t3", OpType.Mult, "t2", "X1"),
+        make_op("t4", OpType.Id, "t3", None),
+        make_op("t5", OpType.Mult, 2, 3),
+        make_op("X1", OpType.Add, "t4", "t5"),
+        make_op("t6", OpType.Mult, "X1", "t0"),
+        make_op("X3", OpType.Sub, "t6", "t1"),
+        make_op("Y3", OpType.Mult, "t1", "t5"),
+    ]
+    result = optimize(ops, {"X3", "Y3"})
+    assert count_multiplications(result) == (3, 1)
+    assert all(op.operator != OpType.Id for op in result)
+    for _ in range(5):
+        inputs = {"X1": random.randrange(101), "Z1": random.randrange(101)}
+        expected = execute(ops, inputs, 101)
+        got = execute(result, inputs, 101)
+        assert (got["X3"], got["Y3"]) == (expected["X3"], expected["Y3"])
+
+
+def test_specialize_zero():
+    params = get_params("secg", "secp256k1", "jacobian")
+    formula = params.curve.coordinate_model.formulas["dbl-2007-bl"]
+    ops = specialize(formula.code, {"a": 0, "b": 7}, params.curve.prime, formula.outputs)
+    assert count(ops, OpType.Mult) < count(formula.code, OpType.Mult)
+    assert count(ops, OpType.Sqr) < count(formula.code, OpType.Sqr)
+    assert all("a" not in op.parameters for op in ops)
+
+
+def test_specialize_copies():
+    ops = [
+        make_op("t0", OpType.Mult, "a", "X1"),
+        make_op("t1", OpType.Add, "t0", "Y1"),
+        make_op("t2", OpType.Mult, 1, "t1"),
+        make_op("Y1", OpType.Sqr, "Y1", None),
+        make_op("X3", OpType.Mult, "t2", "Y1"),
+        make_op("Y3", OpType.Sub, 0, "t1"),
+        make_op("Z3", OpType.Add, 2, 3),
+    ]
+    prime = 101
+    result = specialize(ops, {"a": 0}, prime, {"X3", "Y3", "Z3"})
+    inputs = {"X1": 5, "Y1": 7}
+    expected = execute(ops, dict(inputs, a=0), prime)
+    got = execute(result, inputs, prime)
+    for output in ("X3", "Y3", "Z3"):
+        assert got[output] == expected[output]
+    assert count(result, OpType.Mult) == 1
+    assert count(result, OpType.Neg) == 1
+
+
+def test_eliminate_dead_code():
+    ops = [
+        make_op("t0", OpType.Mult, "X1", "X1"),
+        make_op("t1", OpType.Add, "X1", "Y1"),
+        make_op("X3", OpType.Add, "t1", "Y1"),
+    ]
+    result = eliminate_dead_code(ops, {"X3"})
+    assert [op.result for op in result] == ["t1", "X3"]
+
+
+@pytest.mark.parametrize(
+    "coords,formula",
+    [
+        ("jacobian", "add-2007-bl"),
+        ("jacobian", "dbl-2007-bl"),
+        ("projective", "add-1998-cmo"),
+        ("modified", "dbl-2009-bl"),
+    ],
+)
+def test_allocate_temporaries(secp128r1, coords, formula):
+    model = secp128r1.curve.model
+    formula = model.coordinates[coords].formulas[formula]
+    intermediates = {op.result for op in formula.code} - set(formula.outputs)
+    ops, temporaries = allocate_temporaries(formula.code, intermediates)
+    assert 0 < temporaries <= len(intermediates)
+    assert {op.result for op in ops} - set(formula.outputs) == {f"tmp{i}" for i in range(temporaries)}
+    prime = secp128r1.curve.prime
+    values = {name: int(value) for name, value in secp128r1.curve.parameters.items()}
+    for _ in range(5):
+        inputs = dict(values, **{name: random.randrange(1, prime) for name in formula.inputs})
+        expected = execute(formula.code, inputs, prime)
+        result = execute(ops, inputs, prime)
+        for output in formula.outputs:
+            assert result[output] == expected[output]
+
+
+def test_allocate_temporaries_reuse():
+    ops = [
+        make_op("t0", OpType.Mult, "X1", "X1"),
+        make_op("t1", OpType.Add, "t0", "Y1"),
+        make_op("t2", OpType.Sqr, "X1", 2),
+        make_op("t3", OpType.Mult, "t1", "t2"),
+        make_op("t0", OpType.Sub, "t3", "X1"),
+        make_op("X3", OpType.Add, "t0", "t3"),
+    ]
+    result, temporaries = allocate_temporaries(ops, {"t0", "t1", "t2", "t3"})
+    assert temporaries == 2
+    assert [op.result for op in result] == ["tmp0", "tmp0", "tmp1", "tmp0", "tmp1", "X3"]
+    assert execute(result, {"X1": 3, "Y1": 5}, 101)["X3"] == execute(ops, {"X1": 3, "Y1": 5}, 101)["X3"]
+
+
+@pytest.mark.parametrize("constant", [2, 3, 4, 5, 7, 8, 16, 31])
+def test_strength_reduce(constant):
+    ops = [
+        make_op("t0", OpType.Mult, constant, "X1"),
+        make_op("t1", OpType.Mult, "t0", constant),
+        make_op("X1", OpType.Mult, constant, "X1"),
+        make_op("X3", OpType.Add, "t1", "X1"),
+    ]
+    result = strength_reduce(ops)
+    mults, _ = count_multiplications(result)
+    adds = len(bin(constant)) - 3 + bin(constant).count("1") - 1
+    assert mults == (0 if adds <= 4 else 3)
+    for _ in range(5):
+        inputs = {"X1": random.randrange(101)}
+        assert execute(result, inputs, 101)["X3"] == execute(ops, inputs, 101)["X3"]
+
+
+def test_strength_reduce_sqr():
+    ops = [
+        make_op("t0", OpType.Mult, "X1", "X1"),
+        CodeOp(pexec("t1 = t0**2")),
+        make_op("X3", OpType.Pow, "t1", 3),
+    ]
+    ops[1].operator = OpType.Pow
+    result = strength_reduce(ops)
+    assert [op.operator for op in result] == [OpType.Sqr, OpType.Sqr, OpType.Sqr, OpType.Mult]
+    assert execute(result, {"X1": 5}, 101)["X3"] == execute(ops, {"X1": 5}, 101)["X3"]
+
+
+@pytest.mark.parametrize("exponent", [3, 4, 5, 11, 23, 1000])
+def test_strength_reduce_pow(exponent):
+    ops = [
+        make_op("X1", OpType.Pow, "X1", exponent),
+        make_op("X3", OpType.Add, "X1", "Y1"),
+    ]
+    result = strength_reduce(ops)
+    steps = len(bin(exponent)) - 3 + bin(exponent).count("1") - 1
+    if steps <= 8:
+        assert OpType.Pow not in {op.operator for op in result}
+    else:
+        assert result == ops
+    assert count_multiplications(result) == count_multiplications(ops)
+    for _ in range(5):
+        inputs = {"X1": random.randrange(101), "Y1": random.randrange(101)}
+        assert execute(result, inputs, 101)["X3"] == execute(ops, inputs, 101)["X3"]
+
+
+def test_hoist_invariants():
+    ops = [
+        make_op("t0", OpType.Mult, "X1", "X1"),
+        make_op("t1", OpType.Add, "b", "b"),
+        make_op("b3", OpType.Add, "t1", "b"),
+        make_op("t2", OpType.Mult, "t0", "b3"),
+        make_op("t3", OpType.Mult, "a", 5),
+        make_op("t3", OpType.Add, "t3", "t2"),
+        make_op("X3", OpType.Add, "t3", "a"),
+    ]
+    result, invariants = hoist_invariants(ops, ["a", "b"], {"X3"})
+    assert invariants == 2
+    assert [op.result for op in result[:invariants]] == ["t1", "b3"]
+    inputs = {"X1": 5, "a": 3, "b": 7}
+    assert execute(result, inputs, 101)["X3"] == execute(ops, inputs, 101)["X3"]
+
+
+@pytest.mark.parametrize(
+    "category,curve,coords",
+    [
+        ("secg", "secp256r1", "projective"),
+        ("secg", "secp256r1", "jacobian"),
+        ("other", "Curve25519", "xz"),
+        ("other", "Ed25519", "extended"),
+    ],
+)
+def test_lazy_reduce(category, curve, coords):
+    params = get_params(category, curve, coords)
+    prime = params.curve.prime
+    for formula in params.curve.coordinate_model.formulas.values():
+        if formula.assumptions or formula.shortname == "neg":
+            continue
+        ops = strength_reduce(optimize(formula.code, formula.outputs))
+        lazy_ops, annotations = lazy_reduce(ops, formula.outputs)
+        assert len(lazy_ops) == len(annotations)
+        for _ in range(3):
+            inputs = random_inputs(formula, params)
+            expected = execute(formula.code, inputs, prime)
+            result = execute_lazy(lazy_ops, annotations, inputs, prime)
+            for output in formula.outputs:
+                assert result[output] == expected[output]
+
+
+def test_lazy_reduce_bounds():
+    ops = [
+        make_op("t0", OpType.Add, "X1", "Y1"),
+        make_op("t1", OpType.Add, "t0", "t0"),
+        make_op("t2", OpType.Sub, "Z1", "t1"),
+        make_op("t3", OpType.Mult, "t2", "t1"),
+        make_op("X3", OpType.Add, "t0", "X1"),
+    ]
+    result, annotations = lazy_reduce(ops, {"X3"}, bound=8)
+    # The product of the bounds of t2 (5) and t1 (4) exceeds 8, so one of them is reduced.
+    assert [op.result for op, annotation in zip(result, annotations) if op.operator == OpType.Id] == ["t2", "X3"]
+    assert annotations[2] == 4
+
+
+def test_lazy_bound_bits():
+    # The runtime normalizes values below 2^LAZY_BOUND_BITS times the prime.
+    header = files("pyecsca.codegen").joinpath("bn", "bn.h").read_text()
+    bits = int(re.search(r"#define LAZY_BOUND_BITS (\d+)", header).group(1))
+    assert LAZY_BOUND == 1 << bits
+
+
+def test_lazy_reduce_neg_zero():
+    ops = [
+        make_op("X3", OpType.Neg, None, "X1"),
+        make_op("t0", OpType.Neg, None, "Y1"),
+        make_op("Y3", OpType.Add, "t0", "t0"),
+    ]
+    result, annotations = lazy_reduce(ops, {"X3", "Y3"})
+    # Negating zero gives the multiple of p, so the outputs are still reduced.
+    assert [op.result for op in result if op.operator == OpType.Id] == ["X3", "Y3"]
+    values = execute_lazy(result, annotations, {"X1": 0, "Y1": 0}, 101)
+    assert values["X3"] == 0
+    assert values["Y3"] == 0
+
+
+@pytest.mark.parametrize(
+    "category,curve,coords",
+    [
+        ("secg", "secp256r1", "projective"),
+        ("secg", "secp256r1", "jacobian"),
+        ("other", "Curve25519", "xz"),
+        ("other", "Ed25519", "extended"),
+    ],
+)
+def test_schedule(category, curve, coords):
+    params = get_params(category, curve, coords)
+    prime = params.curve.prime
+    for formula in params.curve.coordinate_model.formulas.values():
+        if formula.assumptions or formula.shortname == "neg":
+            continue
+        ops = strength_reduce(optimize(formula.code, formula.outputs))
+        intermediates = {op.result for op in ops} - set(formula.outputs)
+        scheduled = schedule(ops, intermediates)
+        assert sorted(map(str, scheduled)) == sorted(map(str, ops))
+        assert allocate_temporaries(scheduled, intermediates)[1] <= allocate_temporaries(ops, intermediates)[1]
+        for _ in range(3):
+            inputs = random_inputs(formula, params)
+            expected = execute(formula.code, inputs, prime)
+            result = execute(scheduled, inputs, prime)
+            for output in formula.outputs:
+                assert result[output] == expected[output]
+
+
+def test_schedule_reorder():
+    ops = [
+        make_op("t0", OpType.Mult, "X1", "Y1"),
+        make_op("t1", OpType.Mult, "X1", "Z1"),
+        make_op("t2", OpType.Mult, "Y1", "Z1"),
+        make_op("t3", OpType.Sqr, "t0", 2),
+        make_op("t4", OpType.Sqr, "t1", 2),
+        make_op("t5", OpType.Sqr, "t2", 2),
+        make_op("t6", OpType.Add, "t3", "t4"),
+        make_op("X3", OpType.Add, "t6", "t5"),
+    ]
+    temporaries = {"t0", "t1", "t2", "t3", "t4", "t5", "t6"}
+    assert allocate_temporaries(ops, temporaries)[1] == 3
+    result = schedule(ops, temporaries)
+    assert allocate_temporaries(result, temporaries)[1] == 2
+    inputs = {"X1": 3, "Y1": 5, "Z1": 7}
+    assert execute(result, inputs, 101)["X3"] == execute(ops, inputs, 101)["X3"]
+    # A reassignment stays after the uses of the previous value.
+    ops = [
+        make_op("t0", OpType.Mult, "X1", "Y1"),
+        make_op("t1", OpType.Add, "t0", "X1"),
+        make_op("t0", OpType.Sqr, "Y1", 2),
+        make_op("X3", OpType.Mult, "t0", "t1"),
+    ]
+    result = schedule(ops, {"t0", "t1"})
+    assert execute(result, inputs, 101)["X3"] == execute(ops, inputs, 101)["X3"]
@@ -1,4 +1,8 @@
+import os
 import tempfile
+from dataclasses import replace
+
+import pytest
 
 from pyecsca.ec.configuration import (
     HashType,
@@ -8,10 +12,12 @@ from pyecsca.ec.configuration import (
     Reduction,
     Inversion,
 )
-from pyecsca.ec.mult import LTRMultiplier
+from pyecsca.ec.mult import LTRMultiplier, WindowNAFMultiplier, FullPrecompMultiplier
+from pyecsca.ec.params import get_params
 
-from pyecsca.codegen.common import Platform, DeviceConfiguration
-from pyecsca.codegen.render import render_and_build
+from pyecsca.codegen.common import Platform, DeviceConfiguration, Field
+from pyecsca.codegen.render import (render, render_and_build, render_and_build_many, render_formula_impl, transform_formula,
+                                    is_mixed_addition, point_pool_size, special_prime_form, check_config)
 
 
 def test_basic_build(secp128r1, tmp_path):
@@ -47,3 +53,456 @@ def test_basic_build(secp128r1, tmp_path):
     )
     dir, elf_file, hex_file, res = render_and_build(config, str(tmp_path), True)
     assert res.returncode == 0
+
+
+def test_build_many(secp128r1, tmp_path):
+    model = secp128r1.curve.model
+    coords = secp128r1.curve.coordinate_model
+    add = coords.formulas["add-1998-cmo"]
+    dbl = coords.formulas["dbl-1998-cmo"]
+    scl = coords.formulas["z"]
+    config = DeviceConfiguration(
+        model,
+        coords,
+        [add, dbl, scl],
+        LTRMultiplier(add, dbl, scl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.BASE,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+    )
+    configs = [config, replace(config, red=Reduction.MONTGOMERY), replace(config, red=Reduction.BARRETT)]
+    results = render_and_build_many(configs, str(tmp_path), workers=2)
+    assert len(results) == len(configs)
+    assert len({result.outdir for result in results}) == len(configs)
+    for config, result in zip(configs, results):
+        assert result.config == config
+        assert result.status == "built"
+        assert (tmp_path / result.outdir / result.elf_file).exists()
+
+
+def test_render_workdir(secp128r1, tmp_path):
+    model = secp128r1.curve.model
+    coords = secp128r1.curve.coordinate_model
+    add = coords.formulas["add-1998-cmo"]
+    dbl = coords.formulas["dbl-1998-cmo"]
+    scl = coords.formulas["z"]
+    config = DeviceConfiguration(
+        model,
+        coords,
+        [add, dbl, scl],
+        LTRMultiplier(add, dbl, scl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.BASE,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+    )
+    workdir = tmp_path / "work"
+    dir, elf_file, hex_file = render(config, str(workdir))
+    assert dir == str(workdir)
+    gen = workdir / "gen"
+    mtimes = {}
+    for fname in os.listdir(gen):
+        os.utime(gen / fname, (0, 0))
+        mtimes[fname] = os.path.getmtime(gen / fname)
+    os.utime(workdir / "Makefile", (0, 0))
+
+    render(config, str(workdir))
+    assert os.path.getmtime(workdir / "Makefile") == 0
+    for fname, mtime in mtimes.items():
+        assert os.path.getmtime(gen / fname) == mtime
+
+    render(replace(config, scalarmult=LTRMultiplier(add, dbl, scl, complete=False)), str(workdir))
+    assert os.path.getmtime(workdir / "Makefile") == 0
+    for fname, mtime in mtimes.items():
+        if fname == "mult.c":
+            assert os.path.getmtime(gen / fname) != mtime
+        else:
+            assert os.path.getmtime(gen / fname) == mtime
+
+    render(replace(config, formulas=[add, dbl], scalarmult=LTRMultiplier(add, dbl)), str(workdir))
+    assert not (gen / "formula_scl.c").exists()
+
+
+def test_render_baked(tmp_path, monkeypatch):
+    params = get_params("secg", "secp256k1", "jacobian")
+    coords = params.curve.coordinate_model
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    config = DeviceConfiguration(
+        params.curve.model,
+        coords,
+        [add, dbl],
+        LTRMultiplier(add, dbl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.BASE,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+    )
+    render(config, str(tmp_path / "generic"))
+    render(replace(config, curve="secg/secp256k1"), str(tmp_path / "baked"))
+    baked_main = (tmp_path / "baked" / "main.c").read_text()
+    assert "set_baked_params();" in baked_main
+    assert "set_baked_params" not in (tmp_path / "generic" / "main.c").read_text()
+    generic_dbl = (tmp_path / "generic" / "gen" / "formula_dbl.c").read_text()
+    baked_dbl = (tmp_path / "baked" / "gen" / "formula_dbl.c").read_text()
+    assert baked_dbl.count("bn_red_mul") < generic_dbl.count("bn_red_mul")
+    assert "curve->a" not in baked_dbl
+    with pytest.raises(ValueError):
+        render(replace(config, curve="other/Curve25519"), str(tmp_path / "wrong"))
+    assert not (tmp_path / "wrong").exists()
+    # A rejected configuration does not leave a temporary directory behind.
+    monkeypatch.setattr("tempfile.mkdtemp", lambda: pytest.fail("Temporary directory created."))
+    with pytest.raises(ValueError):
+        render(replace(config, curve="other/Curve25519"))
+    assert check_config(config) is None
+    assert check_config(replace(config, curve="secg/secp256k1")).curve == params.curve
+    with pytest.raises(ValueError):
+        check_config(replace(config, curve="other/Curve25519"))
+    with pytest.raises(ValueError):
+        check_config(replace(config, field=Field.FIXED))
+
+
+def test_render_set_curve(secp128r1, tmp_path):
+    coords = secp128r1.curve.model.coordinates["projective"]
+    add = coords.formulas["add-2015-rcb"]
+    dbl = coords.formulas["dbl-2015-rcb"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl],
+        LTRMultiplier(add, dbl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.MONTGOMERY,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+    )
+    render(config, str(tmp_path))
+    source = (tmp_path / "gen" / "formula_dbl.c").read_text()
+    set_curve, body = source.split("void point_dbl(")
+    set_curve = set_curve.split("point_dbl_set_curve")[1]
+    assert "bn_red_encode" not in body and "bn_from_int" not in body
+    assert "b3);" in set_curve
+    assert "point_dbl_set_curve(curve);" in (tmp_path / "gen" / "formulas.c").read_text()
+
+
+def test_render_lazy(secp128r1, tmp_path):
+    coords = secp128r1.curve.model.coordinates["projective"]
+    add = coords.formulas["add-2015-rcb"]
+    dbl = coords.formulas["dbl-2015-rcb"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl],
+        LTRMultiplier(add, dbl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.MONTGOMERY,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+        lazy_reduction=True,
+    )
+    render(config, str(tmp_path))
+    source = (tmp_path / "gen" / "formula_add.c").read_text()
+    assert "bn_add_unred" in source and "bn_sub_unred" in source
+    assert "bn_red_add" not in source.split("void point_add(")[1]
+    assert "bn_red_lazy_ok" in (tmp_path / "main.c").read_text()
+    with pytest.raises(ValueError):
+        render(replace(config, curve="nist/P-224", platform=Platform.STM32F3), str(tmp_path / "baked"))
+
+
+def test_render_schedule(secp128r1):
+    coords = secp128r1.curve.model.coordinates["jacobian"]
+    add = coords.formulas["add-1998-cmo-2"]
+    assert transform_formula(add, scheduling=True)["temporaries"] < transform_formula(add)["temporaries"]
+    source = render_formula_impl(add, scheduling=True)
+    assert "Peak live temporaries: {}.".format(transform_formula(add, scheduling=True)["temporaries"]) in source
+
+
+def test_render_normalize_tables(secp128r1, tmp_path):
+    coords = secp128r1.curve.model.coordinates["jacobian"]
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    neg = coords.formulas["neg"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl, neg],
+        WindowNAFMultiplier(add, dbl, neg, 4, precompute_negation=True),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.MONTGOMERY,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+        normalize_tables=True,
+    )
+    render(config, str(tmp_path))
+    mult = (tmp_path / "gen" / "mult.c").read_text()
+    assert "point_normalize_batch(points, 4, curve);" in mult
+    # The negated table is computed from the normalized one.
+    assert mult.index("point_normalize_batch") < mult.index("point_neg(points[i]")
+    point = (tmp_path / "gen" / "point.c").read_text().split("void point_normalize_batch(")[1]
+    assert point.count("bn_red_inv") == 1
+    assert "bn_red_sqr(&zinv" in point
+
+    modified = secp128r1.curve.model.coordinates["modified"]
+    with pytest.raises(ValueError):
+        render(replace(config, coords=modified), str(tmp_path / "modified"))
+
+
+def test_render_madd(secp128r1, tmp_path):
+    coords = secp128r1.curve.model.coordinates["jacobian"]
+    add = coords.formulas["add-2007-bl"]
+    madd = coords.formulas["madd-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    neg = coords.formulas["neg"]
+    assert is_mixed_addition(madd)
+    assert not is_mixed_addition(add)
+    assert not is_mixed_addition(coords.formulas["mmadd-2007-bl"])
+    assert transform_formula(madd)["temporaries"] <= transform_formula(add)["temporaries"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, madd, dbl, neg],
+        WindowNAFMultiplier(add, dbl, neg, 4),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.MONTGOMERY,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+        normalize_tables=True,
+    )
+    render(config, str(tmp_path))
+    gen = tmp_path / "gen"
+    source = (gen / "formula_madd.c").read_text()
+    assert "void point_madd(" in source
+    assert "other->Z" not in source
+    assert "point_add(" in (gen / "formula_add.c").read_text()
+    assert "point_madd_init();" in (gen / "formulas.c").read_text()
+    assert "point_madd(one, other, curve, out_one);" in (gen / "point.c").read_text()
+    mult = (gen / "mult.c").read_text()
+    assert "point_accumulate_mixed(q, points[" in mult
+
+    render(replace(config, normalize_tables=False), str(tmp_path / "plain"))
+    assert "point_accumulate_mixed" not in (tmp_path / "plain" / "gen" / "mult.c").read_text()
+    ltr = replace(config, scalarmult=LTRMultiplier(add, dbl))
+    render(ltr, str(tmp_path / "ltr"))
+    assert "point_accumulate_mixed(r, q, curve, r);" in (tmp_path / "ltr" / "gen" / "mult.c").read_text()
+    with pytest.raises(ValueError):
+        render(replace(config, scalarmult=LTRMultiplier(madd, dbl)), str(tmp_path / "general"))
+    with pytest.raises(ValueError):
+        render(replace(config, formulas=[add, coords.formulas["mmadd-2007-bl"], dbl, neg]), str(tmp_path / "mmadd"))
+
+
+def test_render_point_pool(secp128r1, tmp_path):
+    coords = secp128r1.curve.model.coordinates["projective"]
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl],
+        FullPrecompMultiplier(add, dbl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.BASE,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+        curve="secg/secp128r1",
+        point_pool=True,
+    )
+    assert point_pool_size(config.scalarmult, 128) == point_pool_size(config.scalarmult, 64) + 64
+    render(config, str(tmp_path))
+    point = (tmp_path / "gen" / "point.c").read_text()
+    assert "#define POINT_POOL_SIZE {}".format(point_pool_size(config.scalarmult, 128)) in point
+    mult = (tmp_path / "gen" / "mult.c").read_text()
+    assert mult.index("point_pool_begin();") < mult.index("scalar_mult_inner(scalar") < mult.index("point_pool_end();")
+    assert "point_pool_init();" in (tmp_path / "main.c").read_text()
+
+    render(replace(config, point_pool=False), str(tmp_path / "heap"))
+    assert "POINT_POOL_SIZE" not in (tmp_path / "heap" / "gen" / "point.c").read_text()
+    assert "point_pool_begin" not in (tmp_path / "heap" / "gen" / "mult.c").read_text()
+
+
+def test_render_fixed_field(secp128r1, tmp_path):
+    coords = secp128r1.curve.model.coordinates["jacobian"]
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-1998-cmo"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl],
+        LTRMultiplier(add, dbl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.MONTGOMERY,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+        curve="secg/secp128r1",
+        field=Field.FIXED,
+    )
+    render(config, str(tmp_path))
+    assert "#define FE_BITS 128" in (tmp_path / "gen" / "fe.h").read_text()
+    assert "fe_set_curve(curve);" in (tmp_path / "gen" / "formulas.c").read_text()
+    formula = (tmp_path / "gen" / "formula_add.c").read_text()
+    assert "fe_mul(" in formula
+    assert "bn_red_" not in formula
+    assert "fe_from_bn(&one->X, &one_X);" in formula
+    assert "fe_to_bn(&X3, &out_one->X);" in formula
+
+    # Without specialization the curve parameter is loaded once per curve.
+    generic = render_formula_impl(dbl, fixed_field=True)
+    assert "fe_from_bn(&curve->a, &curve_a);" in generic
+    assert generic.index("fe_from_bn(&curve->a, &curve_a);") < generic.index("void point_dbl(")
+
+    render(replace(config, field=Field.BN), str(tmp_path))
+    assert not (tmp_path / "gen" / "fe.h").exists()
+    assert "bn_red_mul(" in (tmp_path / "gen" / "formula_add.c").read_text()
+
+    with pytest.raises(ValueError):
+        render(replace(config, curve=None), str(tmp_path / "nocurve"))
+    with pytest.raises(ValueError):
+        render(replace(config, red=Reduction.BARRETT), str(tmp_path / "barrett"))
+    with pytest.raises(ValueError):
+        render(replace(config, lazy_reduction=True), str(tmp_path / "lazy"))
+
+
+@pytest.mark.parametrize(
+    "category,name,terms",
+    [
+        ("other", "Curve25519", 3),
+        ("secg", "secp256k1", 5),
+        ("secg", "secp224r1", 2),
+        ("secg", "secp256r1", None),
+        ("secg", "secp384r1", 4),
+        ("secg", "secp521r1", 1),
+        ("brainpool", "brainpoolP256r1", None),
+    ],
+)
+def test_special_prime_form(category, name, terms):
+    prime = get_params(category, name, "affine" if category != "other" else "xz").curve.prime
+    form = special_prime_form(prime)
+    if terms is None:
+        assert form is None
+        return
+    k, c = form
+    assert len(c) == terms
+    assert 2**k - sum(sign << shift for sign, shift in c) == prime
+
+
+def test_render_special_prime(secp128r1, tmp_path):
+    coords = secp128r1.curve.model.coordinates["projective"]
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl],
+        LTRMultiplier(add, dbl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.BARRETT,
+        Inversion.GCD,
+        Platform.HOST,
+        True,
+        True,
+        True,
+        curve="secg/secp256k1",
+        special_prime=True,
+    )
+    render(config, str(tmp_path))
+    assert "-DSPECIAL_PRIME" in (tmp_path / "Makefile").read_text()
+    render(replace(config, special_prime=False), str(tmp_path))
+    assert "-DSPECIAL_PRIME" not in (tmp_path / "Makefile").read_text()
+
+    with pytest.raises(ValueError):
+        render(replace(config, red=Reduction.MONTGOMERY), str(tmp_path / "montgomery"))
+    with pytest.raises(ValueError):
+        render(replace(config, curve="brainpool/brainpoolP160r1"), str(tmp_path / "brainpool"))
+    assert not (tmp_path / "brainpool").exists()
+    with pytest.raises(ValueError):
+        render(replace(config, curve="secg/secp256r1"), str(tmp_path / "p256"))
+
+
+@pytest.mark.parametrize("inv,safegcd,define", [
+    (Inversion.GCD, False, "-DINVERSION=INV_GCD"),
+    (Inversion.EULER, False, "-DINVERSION=INV_EULER"),
+    (Inversion.GCD, True, "-DINVERSION=INV_SAFEGCD"),
+])
+def test_render_inversion(secp128r1, tmp_path, inv, safegcd, define):
+    coords = secp128r1.curve.model.coordinates["projective"]
+    add = coords.formulas["add-2007-bl"]
+    dbl = coords.formulas["dbl-2007-bl"]
+    config = DeviceConfiguration(
+        secp128r1.curve.model,
+        coords,
+        [add, dbl],
+        LTRMultiplier(add, dbl),
+        HashType.SHA1,
+        RandomMod.REDUCE,
+        Multiplication.BASE,
+        Squaring.BASE,
+        Reduction.MONTGOMERY,
+        inv,
+        Platform.HOST,
+        True,
+        True,
+        True,
+        safegcd=safegcd,
+    )
+    render(config, str(tmp_path))
+    assert define in (tmp_path / "Makefile").read_text()
+
+    with pytest.raises(ValueError):
+        render(replace(config, inv=Inversion.EULER, safegcd=True), str(tmp_path / "euler"))